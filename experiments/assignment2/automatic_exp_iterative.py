@@ -1,32 +1,22 @@
-from datetime import datetime
-import os
-from src.agents.strategies.communication_chain_agent import CommunicationChainAgent
-from src.agents.strategies.roaming_agent import RoamingAgent
-from src.agents.perception import Perception
+import logging
+import random
+import pandas as pd
+from src.agents.perception import PERCEPTION_MODE_ARRAY, Perception
 from src.utils.position import Position
-from src.environment.package_point import PACKAGE_POINT_END, PACKAGE_POINT_INTERMEDIATE, PACKAGE_POINT_START, PackagePoint
+from src.environment.package_point import PACKAGE_POINT_INTERMEDIATE, PACKAGE_POINT_START, PackagePoint
 from src.environment.obstacle import Obstacle
 from src.environment.environment import Environment
-import random
 from src.visualization.save import Save
 from src.utils.automatic_environment import distribute_agents
-from src.environment.communication.broker import Broker
-from src.environment.communication.recruiter import Recruiter
-from src.environment.communication.communication_layer import CommunicationLayer
-import traceback
-
+from src.utils.logger import set_verbosity
+from src.utils.profiler import StepProfiler
+from src.utils.sweep import run_sweep
 
 
-# Define seed for reproducibility, this will be used for the whole program
-random.seed(1)
 
 base_log_dir = f"logs/"
 
 # Environment parameters
-# Grid dimensions
-grid_sides = [10, 50, 100, 250, 500]
-# Obstacles
-n_obstacles_percs = [0, 10, 25]
 # Starting package point
 package_spawn_interval = 5
 n_packages_per_spawn = 5
@@ -36,18 +26,27 @@ n_intermediate_package_points = 8
 n_ending_package_points = 10
 
 # Experiment parameters
-n_iterations = [100, 250, 500]
-n_shuffles = 1
 perception_cells = 3
-
-# Agents parameters
-n_chain_agents = [2, 8, 32]
-n_roaming_agents = [2, 8, 32]
+perception_mode = PERCEPTION_MODE_ARRAY
+n_shuffles = 1
 movement_algorithm = 'dijkstra'
-
-# Communication parameters
-communication_mechanisms = ['broker', 'naive']
-optimality_criterias = ['naive', 'closer_to_package', 'loneliest']
+# Time the phases of every step, the agents and the messages, saved to profile_summary.csv and profile_steps.csv in the log directory of each configuration
+profile = False
+
+# Every combination of these values is run, each one in its own process
+parameter_space = {
+    # Grid dimensions
+    'grid_side': [10, 50, 100, 250, 500],
+    # Agents parameters
+    'n_chain_agent': [2, 8, 32],
+    'n_roaming_agent': [2, 8, 32],
+    # Obstacles
+    'n_obstacles_perc': [0, 10, 25],
+    # Communication parameters: any mechanism other than 'broker' runs a recruiter
+    'communication_mechanism': ['broker', 'naive'],
+    'optimality_criteria': ['naive', 'closer_to_package', 'loneliest'],
+    'max_iterations': [100, 250, 500],
+}
 
 # Environment elements
 intermediate_pp_positions = [
@@ -58,95 +57,87 @@ ending_pp_positions = [
     Position(0,1), Position(5, 1), Position(8, 1),
     Position(0,5), Position(8,5),
     Position(0,9), Position(5,9), Position(8,9)
-]    
-
-
-
-for grid_side in grid_sides:
-    try:
-        for n_chain_agent in n_chain_agents:
-            for n_roaming_agent in n_roaming_agents:
-                for n_obstacles_perc in n_obstacles_percs:
-                    for communication_mechanism in communication_mechanisms:
-                        for optimality_criteria in optimality_criterias:
-                            for max_iterations in n_iterations:
-                                # Logging
-                                print(f'Current parameters: grid_side={grid_side}, n_chain_agent={n_chain_agent}, n_roaming_agent={n_roaming_agent}, n_obstacles_perc={n_obstacles_perc}, max_iterations={max_iterations}, communication_mechanism={communication_mechanism}, optimality_criteria={optimality_criteria}')
-                                log_dir = f'{base_log_dir}/g{grid_side}_it{max_iterations}_{communication_mechanism[:2]}_{optimality_criteria[:2]}_ca{n_chain_agent}_ra{n_roaming_agent}_ob{n_obstacles_perc}-{datetime.now()}'
-                                os.makedirs(log_dir, exist_ok=True)
-                                Save.log_dir = log_dir
-                                # Environment dimensions
-                                grid_height = grid_side
-                                grid_width = grid_side
-                                # Starting package point
-                                starting_package_point_pos = Position(grid_height//2, grid_width//2)
-                                starting_package_point = PackagePoint('spp', starting_package_point_pos, PACKAGE_POINT_START, package_spawn_interval=package_spawn_interval, n_packages_per_spawn=n_packages_per_spawn)
-                                # Agents
-                                total_n_agents = n_chain_agent + n_roaming_agent
-
-                                agents_configurations = distribute_agents(total_n_agents,
-                                                                            {'CommunicationChainAgent' :
-                                                                            [
-                                                                                {'id':f'comcha_{i}', 'position':starting_package_point_pos, 'packages':[], 'perception':Perception(perception_cells), 'goal_package_point_type': PACKAGE_POINT_INTERMEDIATE, 'algorithm_name':movement_algorithm}
-                                                                                for i in range(n_chain_agent)
-                                                                            ],
-                                                                            'RoamingAgent' :
-                                                                            [
-                                                                                {'id':f'roaming_{i}', 'position':None, 'packages':[], 'perception':Perception(perception_cells), 'algorithm_name':movement_algorithm}
-                                                                                for i in range(n_roaming_agent)
-                                                                            ]
-                                                                            },
-                                                                            n_shuffles
-                                                                        )
-
-                                # Obstacles
-                                obstacle_number = int((grid_height * grid_width) * (n_obstacles_perc/100))
-                                obstacle_heights = [random.randint(1,3) for i in range(obstacle_number)]
-                                obstacle_widths = list(map(lambda x: x[1] if obstacle_heights[x[0]] == 1 else 1, enumerate([random.randint(1,3) for i in range(obstacle_number)])))
-                                obstacles = [
-                                    Obstacle('o1', Position(random.randint(0,grid_width-1), random.randint(0,grid_height-1)), width=obstacle_widths[i], height=obstacle_heights[i], starting_iteration=random.randint(1,max_iterations-1), duration=random.randint(1,5))
-                                    for i in range(obstacle_number)
+]
+
+
+def log_dir_name(configuration: dict) -> str:
+    return f"g{configuration['grid_side']}_it{configuration['max_iterations']}_{configuration['communication_mechanism'][:2]}_{configuration['optimality_criteria'][:2]}_ca{configuration['n_chain_agent']}_ra{configuration['n_roaming_agent']}_ob{configuration['n_obstacles_perc']}"
+
+
+def run(configuration: dict) -> dict:
+    grid_side = configuration['grid_side']
+    n_chain_agent = configuration['n_chain_agent']
+    n_roaming_agent = configuration['n_roaming_agent']
+    n_obstacles_perc = configuration['n_obstacles_perc']
+    max_iterations = configuration['max_iterations']
+    # Environment dimensions
+    grid_height = grid_side
+    grid_width = grid_side
+    # Starting package point
+    starting_package_point_pos = Position(grid_height//2, grid_width//2)
+    starting_package_point = PackagePoint('spp', starting_package_point_pos, PACKAGE_POINT_START, package_spawn_interval=package_spawn_interval, n_packages_per_spawn=n_packages_per_spawn)
+    # Agents
+    total_n_agents = n_chain_agent + n_roaming_agent
+
+    agents_configurations = distribute_agents(total_n_agents,
+                                {'CommunicationChainAgent' :
+                                [
+                                    {'id':f'comcha_{i}', 'position':starting_package_point_pos, 'packages':[], 'perception':Perception(perception_cells, perception_mode), 'goal_package_point_type': PACKAGE_POINT_INTERMEDIATE, 'algorithm_name':movement_algorithm}
+                                    for i in range(n_chain_agent)
+                                ],
+                                'RoamingAgent' :
+                                [
+                                    {'id':f'roaming_{i}', 'position':None, 'packages':[], 'perception':Perception(perception_cells, perception_mode), 'algorithm_name':movement_algorithm}
+                                    for i in range(n_roaming_agent)
                                 ]
-                                # Communication
-                                if communication_mechanism == 'broker':
-                                    broker = Broker('broker', optimality_criteria)
-                                else:
-                                    broker = Recruiter('recruiter', optimality_criteria)
-                                for agents in agents_configurations:
-                                    CommunicationLayer.instance(agents, broker)
-                                    environment = Environment(grid_height, grid_width, agents, starting_package_point, intermediate_pp_positions, ending_pp_positions, obstacles, pp_distribution_strategy='')
-                                    # Start experiment
-                                    m = environment.grid_as_matrix(mode='visualization')
-                                    """
-                                    for m_i in range(len(m)):
-                                        print(m[m_i])
-                                    """
-
-                                    for agent in agents:
-                                        Save.save_agent_data(agent, 0, "init_agent_data.csv")
-
-                                    for n_iteration in range(max_iterations):
-                                        #print(f'Iteration {n_iteration}') 
-                                        environment.step()
-                                        broker.step()
-                                        m = environment.grid_as_matrix(mode='visualization')
-                                        """
-                                        for i in range(len(m)):
-                                            print(m[i])
-                                        print()
-                                        print()
-                                        """
-    except KeyboardInterrupt:
-        print('Interrupted')
-        exit()
-    except Exception as e:
-        print(f'Exception with parameters: grid_side={grid_side}, n_chain_agent={n_chain_agent}, n_roaming_agent={n_roaming_agent}, n_obstacles_perc={n_obstacles_perc}, max_iterations={max_iterations}')
-        # save to log
-        with open(f'{log_dir}/exception.log', 'w') as f:
-            f.write(f'Exception with parameters: grid_side={grid_side}, n_chain_agent={n_chain_agent}, n_roaming_agent={n_roaming_agent}, n_obstacles_perc={n_obstacles_perc}, max_iterations={max_iterations}')
-            f.write(traceback.format_exc())
-        print()
-        print()
-        print()
-    exit()
-                    
+                                },
+                                n_shuffles
+                            )
+
+    # Obstacles
+    obstacle_number = int((grid_height * grid_width) * (n_obstacles_perc/100))
+    obstacle_heights = [random.randint(1,3) for i in range(obstacle_number)]
+    obstacle_widths = list(map(lambda x: x[1] if obstacle_heights[x[0]] == 1 else 1, enumerate([random.randint(1,3) for i in range(obstacle_number)])))
+    obstacles = [
+        Obstacle('o1', Position(random.randint(0,grid_width-1), random.randint(0,grid_height-1)), width=obstacle_widths[i], height=obstacle_heights[i], starting_iteration=random.randint(1,max_iterations-1), duration=random.randint(1,5))
+        for i in range(obstacle_number)
+    ]
+    # Communication: the environment creates the broker (or recruiter) and registers it in the communication layer
+    communication_mechanism = 'broker' if configuration['communication_mechanism'] == 'broker' else 'recruiter'
+    for agents in agents_configurations:
+        environment = Environment(grid_height, grid_width, agents, starting_package_point, intermediate_pp_positions, ending_pp_positions, obstacles, pp_distribution_strategy='',
+                                  broker_optimality_criteria=configuration['optimality_criteria'], communication_mechanism=communication_mechanism)
+
+        profiler = None
+        if profile:
+            profiler = StepProfiler()
+            profiler.attach(environment)
+
+        # Start experiment
+        for agent in agents:
+            Save.save_agent_data(agent, 0, "init_agent_data.csv")
+
+        for n_iteration in range(max_iterations):
+            environment.step()
+            if profiler is None:
+                environment.broker.step()
+            else:
+                with profiler.phase('broker'):
+                    environment.broker.step()
+
+        if profiler is not None:
+            profiler.save()
+
+    # Summary of the run for sweep_summary.csv, the detailed data is in the log directory
+    return {
+        'n_generated_packages': len(starting_package_point.packages),
+        'n_carried_packages': sum(len(agent.packages) for agent in agents),
+    }
+
+
+if __name__ == '__main__':
+    logger = set_verbosity(logging.INFO)
+    # Configurations already run with the same code are read from the cache, so an interrupted sweep resumes where it stopped
+    results = run_sweep(run, parameter_space, base_log_dir, seed=1, name_function=log_dir_name, cache_dir=f'{base_log_dir}/cache')
+    pd.DataFrame(results).to_csv(f'{base_log_dir}/sweep_summary.csv', index=False)
+    logger.info('%d configurations finished, %d failed', len(results), sum('exception' in result for result in results))
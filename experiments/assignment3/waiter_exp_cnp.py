@@ -1,3 +1,4 @@
+import logging
 import os
 from datetime import datetime
 from src.agents.strategies.waiter_cnp import WaiterCNP
@@ -5,7 +6,7 @@ from src.environment.kitchen import KitchenInitiator
 from src.agents.tips_functions import constant_tips, linear_decreasing_time_tips
 from src.agents.strategies.chain_agent import ChainAgent
 from src.agents.strategies.waiter import Waiter
-from src.agents.perception import Perception
+from src.agents.perception import PERCEPTION_MODE_ARRAY, Perception
 from src.utils.position import Position
 from src.environment.package import Package
 from src.environment.package_point import PACKAGE_POINT_END, PACKAGE_POINT_INTERMEDIATE, PACKAGE_POINT_START, PackagePoint
@@ -14,6 +15,9 @@ from src.environment.environment import Environment
 from src.agents.strategies.greedy_agent import GreedyAgent
 import random
 from src.visualization.save import Save
+from src.utils.logger import set_verbosity
+from src.utils.checkpoint import Checkpointer, load_checkpoint
+from src.utils.profiler import StepProfiler
 from src.utils.automatic_environment import ENV_PP_UNIFORM_SQUARES
 from src.visualization.save_grid import save_grid
 
@@ -25,6 +29,9 @@ log_dir = f"logs/{timestamp}"
 os.makedirs(log_dir, exist_ok=True)
 Save.log_dir = log_dir
 
+# Verbosity of the run: logging.INFO shows the grid at every iteration, and logging.DEBUG also every event of the agents
+logger = set_verbosity(logging.WARNING)
+
 # Grid dimensions
 grid_height = 20
 grid_width = 20
@@ -38,34 +45,49 @@ ending_package_points = [Position(0, 0)]
 
 total_iterations = 1000
 
-# Agents
-agents = [WaiterCNP(f'w{i}', starting_package_point_pos, [], Perception(3), 'dijkstra', 'naive_greedy', linear_decreasing_time_tips, starting_package_point_pos) for i in range(15)]
+# Checkpoints
+checkpoint_interval = 100
+# Checkpoint of an interrupted run to resume (e.g. "logs/<timestamp>/checkpoint.ckpt"), or None to start a new run
+resume_checkpoint = None
+
+# Time the phases of every step, the agents and the messages, saved to profile_summary.csv and profile_steps.csv in the log directory
+profile = False
 
+if resume_checkpoint is not None:
+    # The run continues in its original log directory, with the state of all its entities and random number generators
+    environment = load_checkpoint(resume_checkpoint)
+    agents = environment.agents_l
+else:
+    # Agents
+    agents = [WaiterCNP(f'w{i}', starting_package_point_pos, [], Perception(3, PERCEPTION_MODE_ARRAY), 'dijkstra', 'naive_greedy', linear_decreasing_time_tips, starting_package_point_pos) for i in range(15)]
 
-environment = Environment(grid_height, grid_width, agents, starting_package_point, 9, 25, [], pp_distribution_strategy=ENV_PP_UNIFORM_SQUARES, initiator=kitchen_initiator)
 
-m = environment.grid_as_matrix(mode='visualization')
+    environment = Environment(grid_height, grid_width, agents, starting_package_point, 9, 25, [], pp_distribution_strategy=ENV_PP_UNIFORM_SQUARES, initiator=kitchen_initiator)
+
+    for agent in agents:
+        Save.save_agent_data(agent, 0, "init_agent_data.csv")
 
-for agent in agents:
-    Save.save_agent_data(agent, 0, "init_agent_data.csv")
+    save_grid(environment.grid, Save.log_dir)
 
-save_grid(environment.grid, Save.log_dir)
+    if logger.isEnabledFor(logging.INFO):
+        m = environment.grid_as_matrix(mode='visualization')
+        logger.info('Initial grid:\n%s', '\n'.join(str(row) for row in m))
 
-m = environment.grid_as_matrix(mode='visualization')
-print('Initial grid:')
-for m_i in range(len(m)):
-    print(m[m_i])
-print()
+if profile and environment.profiler is None:
+    StepProfiler().attach(environment)
 
-for iteration in range(1, total_iterations+1):
-    print(f'Iteration {iteration}')
+checkpointer = Checkpointer(f"{Save.log_dir}/checkpoint.ckpt", checkpoint_interval)
+
+for iteration in range(environment.current_iteration + 1, total_iterations+1):
+    logger.info('Iteration %d', iteration)
     environment.step()
-    m = environment.grid_as_matrix(mode='visualization')
-    for i in range(len(m)):
-        print(m[i])
-    print()
-    for agent in agents:
-        print(f"Agent {agent.id} tips: {agent.collected_tips}")
-    print()
-    
-Save.save_agent_final_state(agents, "final_agent_data_cnp.csv")
\ No newline at end of file
+    checkpointer.step(environment)
+    if logger.isEnabledFor(logging.INFO):
+        m = environment.grid_as_matrix(mode='visualization')
+        logger.info('Grid:\n%s', '\n'.join(str(row) for row in m))
+        for agent in agents:
+            logger.info('Agent %s tips: %s', agent.id, agent.collected_tips)
+
+Save.save_agent_final_state(agents, "final_agent_data_cnp.csv")
+if environment.profiler is not None:
+    environment.profiler.save()
\ No newline at end of file
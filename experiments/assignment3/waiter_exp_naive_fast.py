@@ -1,4 +1,5 @@
 from datetime import datetime
+import logging
 import os
 
 import numpy as np
@@ -17,6 +18,7 @@ from src.environment.environment import Environment
 from src.agents.strategies.greedy_agent import GreedyAgent
 import random
 from src.visualization.save import Save
+from src.utils.logger import set_verbosity
 from utils.automatic_environment import ENV_PP_UNIFORM_SQUARES
 
 # Define seed for reproducibility, this will be used for the whole program
@@ -27,6 +29,9 @@ log_dir = r"logs/{timestamp}"
 os.makedirs(log_dir, exist_ok=True)
 Save.log_dir = log_dir
 
+# Verbosity of the run: logging.INFO shows the grid at every iteration, and logging.DEBUG also every event of the agents
+logger = set_verbosity(logging.WARNING)
+
 # Grid dimensions
 grid_height = 20
 grid_width = 20
@@ -59,23 +64,17 @@ agents = [Waiter('naive_fast1', Position(10, 10), [], Perception(3), 'dijkstra',
 
 environment = Environment(grid_height, grid_width, agents, starting_package_point, 9, 25, [], pp_distribution_strategy=ENV_PP_UNIFORM_SQUARES)
 
-m = environment.grid_as_matrix(mode='visualization')
-
-m = environment.grid_as_matrix(mode='visualization')
-print('Initial grid:')
-for m_i in range(len(m)):
-    print(m[m_i])
-print()
+if logger.isEnabledFor(logging.INFO):
+    m = environment.grid_as_matrix(mode='visualization')
+    logger.info('Initial grid:\n%s', '\n'.join(str(row) for row in m))
 
 for iteration in range(1, total_iterations+1):
-    #printf'Iteration {iteration}')
+    logger.info('Iteration %d', iteration)
     environment.step()
-    m = environment.grid_as_matrix(mode='visualization')
-    for i in range(len(m)):
-        print(m[i])
-    print()
-    for agent in agents:
-        print(f"Agent {agent.id} tips: {agent.collected_tips}")
-    print()
+    if logger.isEnabledFor(logging.INFO):
+        m = environment.grid_as_matrix(mode='visualization')
+        logger.info('Grid:\n%s', '\n'.join(str(row) for row in m))
+        for agent in agents:
+            logger.info('Agent %s tips: %s', agent.id, agent.collected_tips)
 
 Save.save_agent_final_state(agents, "naive_fast_agents_data.csv")
@@ -14,9 +14,15 @@ from src.agents.perception import Perception
 from src.environment.obstacle import Obstacle
 
 from src.agents.path_algorithms.dijkstra import Dijkstra
-from src.utils.grid2matrix import convert_grid_to_matrix
+from src.agents.path_algorithms.astar import AStar
+from src.agents.path_algorithms.jps import JumpPointSearch
+from src.agents.path_algorithms.dstar_lite import DStarLite
+from src.agents.path_algorithms.hpa import HierarchicalPathfinding
 from src.visualization.save import Save
 
+# Algorithms that search the occupancy bitmap through the routing engine of the environment
+SEARCH_ALGORITHMS = ['dijkstra', 'astar', 'jps', 'dstar_lite', 'hpa']
+
 class Agent(MesaAgent):
     """ Parent class for all agents implemented in this project."""
 
@@ -30,7 +36,7 @@ class Agent(MesaAgent):
                                             If not defined, agent will return to first encountered package point
             package (List[Package]): The packages the agent is carrying.
             perception (Perception): The subgrid the agent is currently perceiving.
-            algorithm_name (str): Algorithm name to use for pathfinding. (Possible values: 'dijkstra', 'pheromone')
+            algorithm_name (str): Algorithm name to use for pathfinding. (Possible values: 'dijkstra', 'astar', 'jps', 'dstar_lite', 'hpa', 'pheromones')
         
         Returns:
             None 
@@ -44,6 +50,14 @@ class Agent(MesaAgent):
         self.goal_package_point_type = None
         if self.algorithm_name == 'dijkstra':
             self.algorithm = Dijkstra()
+        elif self.algorithm_name == 'astar':
+            self.algorithm = AStar()
+        elif self.algorithm_name == 'jps':
+            self.algorithm = JumpPointSearch()
+        elif self.algorithm_name == 'dstar_lite':
+            self.algorithm = DStarLite()
+        elif self.algorithm_name == 'hpa':
+            self.algorithm = HierarchicalPathfinding()
         elif self.algorithm_name == 'pheromones':
             self.algorithm = PheromonePath()
         else:
@@ -103,8 +117,8 @@ class Agent(MesaAgent):
 
     def get_next_position(self, grid, destination: Position) -> Position:
         perception = self.perception.percept(self.pos, grid)
-        if self.algorithm_name == 'dijkstra':
-            chosen_new_position = self.algorithm.get_next_position(self.pos, destination, grid.height, grid.width, convert_grid_to_matrix(grid))
+        if self.algorithm_name in SEARCH_ALGORITHMS:
+            chosen_new_position = grid.router.get_next_position(self.id, self.pos, destination, self.algorithm)
         elif self.algorithm_name == 'pheromones':
             chosen_new_position = self.algorithm.get_next_position(self.pos, self.previous_point, self.previous_point_type, destination, self.goal_package_point_type, perception, grid, False, True)
         else:
@@ -141,6 +155,7 @@ class Agent(MesaAgent):
 
         self.append = self.packages.append(package)
         package.picked = True
+        package.carrier_id = self.id
         #printf"Agent {self.id}: Picked up package with ID {package.id} and position ({package.pos.x}, {package.pos.y})!")
 
 
@@ -164,6 +179,8 @@ class Agent(MesaAgent):
         if package_point.point_type == PACKAGE_POINT_END:
             # The package has reached its destination! 
             # Therefore, now the agent is not carrying any package and the package has to disappear from the environment (so it is not visible anymore).
+            if package.store is not None:
+                package.store.record_delivery(package)
             package.picked = False
             Save.save_to_csv_package(package)
             # grid.remove_agent(package)
@@ -186,6 +203,15 @@ class Agent(MesaAgent):
         # TODO: let's think about the logic what we should do after parcel was received and brokers knows about it
         return Message(MSG_PICKUP_RESPONSE, self.id, message.sender_id, {"response": "no"}) # placeholder
 
+    def is_available(self) -> bool:
+        """ Whether the agent would accept a pickup request right now, so that the broker can consider it when assigning packages in batch.
+        Agents that take pickup requests from the broker override it.
+
+        Returns:
+            bool: True if the agent is free to pick up a package.
+        """
+        return False
+
     def send_broker_message(self, message: Message):
         """Send message to a broker
 
@@ -0,0 +1,80 @@
+import heapq
+from typing import List
+
+from src.agents.path_algorithms.path_algorithm import PathAlgorithm, neighbour_cells
+
+from src.utils.position import Position
+
+
+class AStar(PathAlgorithm):
+
+    def get_next_position(self, pos: Position, dest: Position, grid_height: int, grid_width: int, matrix) -> Position:
+        """ Next cell of the shortest path to the destination.
+
+        Args:
+            pos (Position): Where the agent is at.
+            dest (Position): Where the agent wants to go.
+            grid_height (int): Height of the grid.
+            grid_width (int): Width of the grid.
+            matrix (np.ndarray): Occupancy bitmap of the grid (see convert_grid_to_matrix), indexed as [x, y].
+
+        Returns:
+            Position: The next cell the agent should go to.
+        """
+        path = self.find_path(pos, dest, matrix)
+
+        if len(path) > 1:
+            new_position = path[1]
+        else:
+            new_position = Position(pos.x, pos.y)
+
+        return new_position
+
+
+    def find_path(self, start: Position, end: Position, occupancy) -> List[Position]:
+        """ Shortest 4-connected path between two cells, guided by the Manhattan distance (Position.dist_to) to the end.
+
+        Args:
+            start (Position): Where the agent is at.
+            end (Position): Where the agent wants to go.
+            occupancy (np.ndarray): Occupancy bitmap of the grid, indexed as [x, y]. 1 means that the cell is occupied by an obstacle.
+
+        Returns:
+            List[Position]: The cells from start to end, both included. Empty if end cannot be reached.
+        """
+        width, height = occupancy.shape
+        # Flat, zero-copy view of the bitmap: cell (x, y) is at index x * height + y
+        blocked = memoryview(occupancy).cast('B')
+        start_cell = start.x * height + start.y
+        end_cell = end.x * height + end.y
+        if blocked[end_cell]:
+            return []
+
+        distances = {start_cell: 0}
+        parents = {start_cell: None}
+        # Ties in the estimate are broken in favour of the cells furthest from the start, which are closer to the end
+        queue = [(start.dist_to(end), 0, start_cell)]
+        while queue:
+            _, negative_distance, cell = heapq.heappop(queue)
+            if cell == end_cell:
+                break
+            distance = -negative_distance
+            if distance > distances[cell]:
+                continue
+            for neighbour in neighbour_cells(cell, width, height):
+                if not blocked[neighbour] and (neighbour not in distances or distance + 1 < distances[neighbour]):
+                    distances[neighbour] = distance + 1
+                    parents[neighbour] = cell
+                    estimate = distance + 1 + abs(neighbour // height - end.x) + abs(neighbour % height - end.y)
+                    heapq.heappush(queue, (estimate, -(distance + 1), neighbour))
+        else:
+            # The queue got empty without reaching the end
+            return []
+
+        path = []
+        cell = end_cell
+        while cell is not None:
+            path.append(Position(cell // height, cell % height))
+            cell = parents[cell]
+        path.reverse()
+        return path
@@ -1,7 +1,7 @@
-from pathfinding.core.diagonal_movement import DiagonalMovement
-from pathfinding.core.grid import Grid
-from pathfinding.finder.dijkstra import DijkstraFinder
-from src.agents.path_algorithms.path_algorithm import PathAlgorithm
+import heapq
+from typing import List
+
+from src.agents.path_algorithms.path_algorithm import PathAlgorithm, neighbour_cells
 
 from src.utils.position import Position
 
@@ -16,26 +16,63 @@ class Dijkstra(PathAlgorithm):
             dest (Position): Where the agent wants to go.
             grid_height (int): Height of the grid.
             grid_width (int): Width of the grid.
-            matrix (_type_): Matrix of the grid for the Dijkstra algorithm. 
+            matrix (np.ndarray): Occupancy bitmap of the grid (see convert_grid_to_matrix), indexed as [x, y].
                 Each element is a 0 or a 1. 0 means that the cell is free, 1 means that the cell is occupied by an obstacle.
 
         Returns:
             Position: The next cell the agent should go to.
-        """        
-        # create grid for dijkstra
-        grid = Grid(width=grid_width, height=grid_height, matrix=matrix)
-        # start and end points on the grid
-        start = grid.node(pos.x, pos.y)
-        end = grid.node(dest.x, dest.y)
-
-        # runs a dijkstra
-        finder = DijkstraFinder()
-        path, runs = finder.find_path(start, end, grid)
+        """
+        path = self.find_path(pos, dest, matrix)
 
         if len(path) > 1:
-            new_position = Position(path[1].x, path[1].y)
+            new_position = path[1]
         else:
-            new_position = Position(path[0].x, path[0].y)
+            new_position = Position(pos.x, pos.y)
 
         return new_position
-    
\ No newline at end of file
+
+
+    def find_path(self, start: Position, end: Position, occupancy) -> List[Position]:
+        """ Shortest 4-connected path between two cells, computed directly on the occupancy bitmap of the grid.
+
+        Args:
+            start (Position): Where the agent is at.
+            end (Position): Where the agent wants to go.
+            occupancy (np.ndarray): Occupancy bitmap of the grid, indexed as [x, y]. 1 means that the cell is occupied by an obstacle.
+
+        Returns:
+            List[Position]: The cells from start to end, both included. Empty if end cannot be reached.
+        """
+        width, height = occupancy.shape
+        # Flat, zero-copy view of the bitmap: cell (x, y) is at index x * height + y
+        blocked = memoryview(occupancy).cast('B')
+        start_cell = start.x * height + start.y
+        end_cell = end.x * height + end.y
+        if blocked[end_cell]:
+            return []
+
+        distances = {start_cell: 0}
+        parents = {start_cell: None}
+        queue = [(0, start_cell)]
+        while queue:
+            distance, cell = heapq.heappop(queue)
+            if cell == end_cell:
+                break
+            if distance > distances[cell]:
+                continue
+            for neighbour in neighbour_cells(cell, width, height):
+                if not blocked[neighbour] and (neighbour not in distances or distance + 1 < distances[neighbour]):
+                    distances[neighbour] = distance + 1
+                    parents[neighbour] = cell
+                    heapq.heappush(queue, (distance + 1, neighbour))
+        else:
+            # The queue got empty without reaching the end
+            return []
+
+        path = []
+        cell = end_cell
+        while cell is not None:
+            path.append(Position(cell // height, cell % height))
+            cell = parents[cell]
+        path.reverse()
+        return path
@@ -0,0 +1,173 @@
+import heapq
+from typing import Dict, List, Set, Tuple
+
+from src.agents.path_algorithms.path_algorithm import PathAlgorithm, neighbour_cells
+
+from src.utils.position import Position
+
+INFINITY = float('inf')
+
+
+class DStarLite(PathAlgorithm):
+    """ Incremental planner (D* Lite) for a single agent.
+
+    The search runs backwards, from the destination to the agent, and its search tree is kept between calls.
+    When obstacles appear or disappear, only the cells whose distance to the destination is affected are expanded again,
+    instead of searching the whole grid from scratch. Each agent needs its own instance.
+    """
+    def __init__(self) -> None:
+        """ Constructor.
+
+        Returns:
+            None
+        """
+        self.goal = None
+        self.last_start = None
+        self.key_modifier = 0
+        # Distances to the goal (g) and their one step lookahead (rhs), by flat cell index
+        self.g: Dict[int, float] = {}
+        self.rhs: Dict[int, float] = {}
+        # Priority queue of the locally inconsistent cells, with lazy deletion: an entry is valid if its key is still in queued_keys
+        self.queue: List[Tuple[float, float, int]] = []
+        self.queued_keys: Dict[int, Tuple[float, float]] = {}
+        # Flat indices of the cells whose obstacles changed since the last call
+        self.changed_cells: Set[int] = set()
+        # Nodes expanded by the last call, either searching for the first time or repairing
+        self.n_expanded_nodes = 0
+
+
+    def get_next_position(self, pos: Position, dest: Position, grid_height: int, grid_width: int, matrix) -> Position:
+        """ Next cell of the shortest path to the destination, repairing the previous search if the obstacles changed.
+
+        Args:
+            pos (Position): Where the agent is at.
+            dest (Position): Where the agent wants to go.
+            grid_height (int): Height of the grid.
+            grid_width (int): Width of the grid.
+            matrix (np.ndarray): Occupancy bitmap of the grid (see convert_grid_to_matrix), indexed as [x, y].
+
+        Returns:
+            Position: The next cell the agent should go to. It is the current position if the destination is reached or unreachable.
+        """
+        width, height = matrix.shape
+        # Flat, zero-copy view of the bitmap: cell (x, y) is at index x * height + y
+        blocked = memoryview(matrix).cast('B')
+        start = pos.x * height + pos.y
+        goal = dest.x * height + dest.y
+        self.n_expanded_nodes = 0
+
+        if goal != self.goal:
+            self.reset(start, goal, height)
+        else:
+            # The heuristic is measured from the agent, so the keys already queued are corrected as it moves
+            self.key_modifier += self.heuristic(self.last_start, start, height)
+            self.last_start = start
+            for cell in self.changed_cells:
+                # The cost of every edge around the cell changed
+                self.update_cell(cell, blocked, width, height)
+                for neighbour in neighbour_cells(cell, width, height):
+                    self.update_cell(neighbour, blocked, width, height)
+        self.changed_cells.clear()
+
+        self.compute_shortest_path(start, blocked, width, height)
+
+        if start == goal or self.g.get(start, INFINITY) == INFINITY:
+            return Position(pos.x, pos.y)
+        best_neighbour = min((neighbour for neighbour in neighbour_cells(start, width, height) if not blocked[neighbour]),
+                             key=lambda neighbour: self.g.get(neighbour, INFINITY))
+        return Position(best_neighbour // height, best_neighbour % height)
+
+
+    def update(self, changed_cells: List[Position], grid_height: int) -> None:
+        """ Records the cells whose obstacles changed, so that the search is repaired in the next call.
+
+        Args:
+            changed_cells (List[Position]): The cells whose obstacles changed in the last iteration.
+            grid_height (int): Height of the grid.
+
+        Returns:
+            None
+        """
+        if self.goal is not None:
+            self.changed_cells.update(cell.x * grid_height + cell.y for cell in changed_cells)
+
+
+    def reset(self, start: int, goal: int, height: int) -> None:
+        """ Discards the previous search and starts a new one towards another goal.
+
+        Args:
+            start (int): Flat index of the cell where the agent is at.
+            goal (int): Flat index of the destination.
+            height (int): Height of the grid.
+
+        Returns:
+            None
+        """
+        self.goal = goal
+        self.last_start = start
+        self.key_modifier = 0
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.queue = []
+        self.queued_keys = {}
+        self.push(goal, self.calculate_key(goal, start, height))
+
+
+    def heuristic(self, a: int, b: int, height: int) -> int:
+        """ Manhattan distance between two cells given by their flat index, like Position.dist_to."""
+        return abs(a // height - b // height) + abs(a % height - b % height)
+
+
+    def calculate_key(self, cell: int, start: int, height: int) -> Tuple[float, float]:
+        """ Priority of a cell in the queue: the lowest, the sooner it is expanded."""
+        distance = min(self.g.get(cell, INFINITY), self.rhs.get(cell, INFINITY))
+        return (distance + self.heuristic(start, cell, height) + self.key_modifier, distance)
+
+
+    def push(self, cell: int, key: Tuple[float, float]) -> None:
+        """ Adds a cell to the queue, or moves it if it was already queued."""
+        self.queued_keys[cell] = key
+        heapq.heappush(self.queue, (key[0], key[1], cell))
+
+
+    def top_key(self) -> Tuple[float, float]:
+        """ Key of the first valid cell of the queue, dropping the outdated entries on the way."""
+        while self.queue:
+            k1, k2, cell = self.queue[0]
+            if self.queued_keys.get(cell) == (k1, k2):
+                return (k1, k2)
+            heapq.heappop(self.queue)
+        return (INFINITY, INFINITY)
+
+
+    def update_cell(self, cell: int, blocked, width: int, height: int) -> None:
+        """ Recomputes the lookahead of a cell from its neighbours, and queues it if it became inconsistent."""
+        if cell != self.goal:
+            if blocked[cell]:
+                self.rhs[cell] = INFINITY
+            else:
+                self.rhs[cell] = min((self.g.get(neighbour, INFINITY) for neighbour in neighbour_cells(cell, width, height) if not blocked[neighbour]), default=INFINITY) + 1
+        self.queued_keys.pop(cell, None)
+        if self.g.get(cell, INFINITY) != self.rhs.get(cell, INFINITY):
+            self.push(cell, self.calculate_key(cell, self.last_start, height))
+
+
+    def compute_shortest_path(self, start: int, blocked, width: int, height: int) -> None:
+        """ Expands the queued cells until the distance from the agent to the goal is known."""
+        while self.top_key() < self.calculate_key(start, start, height) or self.rhs.get(start, INFINITY) != self.g.get(start, INFINITY):
+            k1, k2, cell = heapq.heappop(self.queue)
+            del self.queued_keys[cell]
+            self.n_expanded_nodes += 1
+            new_key = self.calculate_key(cell, start, height)
+            if (k1, k2) < new_key:
+                # Outdated priority, the agent moved since the cell was queued
+                self.push(cell, new_key)
+            elif self.g.get(cell, INFINITY) > self.rhs.get(cell, INFINITY):
+                self.g[cell] = self.rhs[cell]
+                for neighbour in neighbour_cells(cell, width, height):
+                    self.update_cell(neighbour, blocked, width, height)
+            else:
+                self.g[cell] = INFINITY
+                self.update_cell(cell, blocked, width, height)
+                for neighbour in neighbour_cells(cell, width, height):
+                    self.update_cell(neighbour, blocked, width, height)
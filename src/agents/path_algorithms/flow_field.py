@@ -0,0 +1,279 @@
+import heapq
+from collections import deque
+from typing import Dict, List, Set, Union
+
+import numpy as np
+
+from src.agents.path_algorithms.path_algorithm import neighbour_cells
+from src.utils.position import Position
+
+# Distance of the cells from which the target cannot be reached (including the ones occupied by obstacles)
+UNREACHABLE = np.iinfo(np.int32).max
+
+
+class FlowField:
+    """ BFS distance map from every cell of the grid to a single target.
+
+    Agents heading to the target only need to step to the neighbour one cell closer, so no search is needed.
+    When obstacles change, only the cells whose shortest path went through the changed cells are recomputed.
+    """
+    def __init__(self, target: Position) -> None:
+        """ Constructor.
+
+        Args:
+            target (Position): The cell that the field leads to.
+
+        Returns:
+            None
+        """
+        self.target = target
+        # Indexed as [x, y], like the occupancy bitmap. None until the field is first needed.
+        self.distances = None
+        # Flat indices of the cells whose obstacles changed since the last refresh
+        self.changed_cells: Set[int] = set()
+
+
+    def refresh(self, occupancy: np.ndarray) -> None:
+        """ Brings the distances up to date with the occupancy bitmap, computing them if it is the first time.
+
+        Args:
+            occupancy (np.ndarray): Occupancy bitmap of the grid, indexed as [x, y]. 1 means that the cell is occupied by an obstacle.
+
+        Returns:
+            None
+        """
+        if self.distances is None:
+            self.compute(occupancy)
+        elif self.changed_cells:
+            self.repair(occupancy)
+        self.changed_cells.clear()
+
+
+    def compute(self, occupancy: np.ndarray) -> None:
+        """ Computes the distances from scratch, with a BFS from the target.
+
+        Args:
+            occupancy (np.ndarray): Occupancy bitmap of the grid, indexed as [x, y]. 1 means that the cell is occupied by an obstacle.
+
+        Returns:
+            None
+        """
+        width, height = occupancy.shape
+        self.distances = np.full((width, height), UNREACHABLE, dtype=np.int32)
+        # Flat views: cell (x, y) is at index x * height + y
+        distances = memoryview(self.distances.reshape(-1))
+        blocked = memoryview(occupancy.reshape(-1))
+        target_cell = self.target.x * height + self.target.y
+        if blocked[target_cell]:
+            return
+
+        distances[target_cell] = 0
+        queue = deque([target_cell])
+        while queue:
+            cell = queue.popleft()
+            next_distance = distances[cell] + 1
+            for neighbour in neighbour_cells(cell, width, height):
+                if distances[neighbour] == UNREACHABLE and not blocked[neighbour]:
+                    distances[neighbour] = next_distance
+                    queue.append(neighbour)
+
+
+    def repair(self, occupancy: np.ndarray) -> None:
+        """ Updates the distances after some obstacles changed, touching only the cells that are affected by the change.
+
+        Newly blocked cells invalidate every cell whose shortest paths all went through them, and those cells are then
+        reseeded from their still valid neighbours. Newly freed cells are seeded from their neighbours as well, and
+        the improvements are propagated outwards from all the seeds.
+
+        Args:
+            occupancy (np.ndarray): Occupancy bitmap of the grid, indexed as [x, y]. 1 means that the cell is occupied by an obstacle.
+
+        Returns:
+            None
+        """
+        width, height = occupancy.shape
+        distances = memoryview(self.distances.reshape(-1))
+        blocked = memoryview(occupancy.reshape(-1))
+        target_cell = self.target.x * height + self.target.y
+
+        # Cells whose distance may have increased, visited by increasing distance so that,
+        # when a cell is checked, all the invalidated cells one step closer to the target are already known
+        invalidated = set()
+        queue = []
+        for cell in self.changed_cells:
+            if blocked[cell] and distances[cell] != UNREACHABLE:
+                invalidated.add(cell)
+                heapq.heappush(queue, (distances[cell], cell))
+        while queue:
+            distance, cell = heapq.heappop(queue)
+            for neighbour in neighbour_cells(cell, width, height):
+                if distances[neighbour] != distance + 1 or neighbour in invalidated or blocked[neighbour]:
+                    continue
+                # The neighbour went through this cell, check if it has another way of getting one step closer
+                if not any(distances[parent] == distance and parent not in invalidated and not blocked[parent] for parent in neighbour_cells(neighbour, width, height)):
+                    invalidated.add(neighbour)
+                    heapq.heappush(queue, (distance + 1, neighbour))
+        for cell in invalidated:
+            distances[cell] = UNREACHABLE
+
+        # Seed the invalidated and the newly freed cells from their neighbours, and propagate the improvements
+        for cell in invalidated | self.changed_cells:
+            if blocked[cell]:
+                continue
+            if cell == target_cell:
+                distance = 0
+            else:
+                distance = min(distances[neighbour] for neighbour in neighbour_cells(cell, width, height)) + 1
+            if distance < distances[cell]:
+                distances[cell] = distance
+                heapq.heappush(queue, (distance, cell))
+        while queue:
+            distance, cell = heapq.heappop(queue)
+            if distance > distances[cell]:
+                continue
+            for neighbour in neighbour_cells(cell, width, height):
+                if not blocked[neighbour] and distances[neighbour] > distance + 1:
+                    distances[neighbour] = distance + 1
+                    heapq.heappush(queue, (distance + 1, neighbour))
+
+
+    def distance(self, pos: Position) -> int:
+        """ Length of the shortest path from a cell to the target.
+
+        Args:
+            pos (Position): The cell to measure from.
+
+        Returns:
+            int: The number of steps to the target, or UNREACHABLE.
+        """
+        return int(self.distances[pos.x, pos.y])
+
+
+    def next_position(self, pos: Position) -> Position:
+        """ The neighbour of a cell that is one step closer to the target.
+
+        Args:
+            pos (Position): Where the agent is at.
+
+        Returns:
+            Position: The next cell the agent should go to. It is the current position if the target is reached or unreachable.
+        """
+        width, height = self.distances.shape
+        distances = memoryview(self.distances.reshape(-1))
+        cell = pos.x * height + pos.y
+        distance = distances[cell]
+        if distance != 0 and distance != UNREACHABLE:
+            for neighbour in neighbour_cells(cell, width, height):
+                if distances[neighbour] == distance - 1:
+                    return Position(neighbour // height, neighbour % height)
+        return Position(pos.x, pos.y)
+
+
+class FlowFieldCache:
+    """ Flow fields towards the package points, shared by all the agents during the whole run.
+
+    Every agent heads for one of the few package points, so a single distance map per package point
+    serves all of them. Each field is computed the first time it is needed, and repaired lazily after the obstacles change.
+    """
+    def __init__(self, grid) -> None:
+        """ Constructor.
+
+        Args:
+            grid (EnvironmentGrid): The grid of the environment.
+
+        Returns:
+            None
+        """
+        self.grid = grid
+        self.fields: Dict[tuple, FlowField] = {}
+        # Cache of another environment with the same package points to copy the fields from, see share_with
+        self.shared = None
+
+
+    def add_target(self, target: Position) -> None:
+        """ Registers a cell that agents will head for, usually a package point.
+
+        Args:
+            target (Position): The cell.
+
+        Returns:
+            None
+        """
+        if target.to_tuple() not in self.fields:
+            self.fields[target.to_tuple()] = FlowField(target)
+
+
+    def get(self, target: Position) -> Union[FlowField, None]:
+        """ The up to date flow field towards a target.
+
+        Args:
+            target (Position): The cell that the field leads to.
+
+        Returns:
+            Union[FlowField, None]: The field, or None if the target has not been registered.
+        """
+        field = self.fields.get(target.to_tuple())
+        if field is not None:
+            if field.distances is None and self.shared is not None:
+                self._copy_shared(target.to_tuple(), field)
+            field.refresh(self.grid.occupancy)
+        return field
+
+
+    def update(self, changed_cells: List[Position]) -> None:
+        """ Records the cells whose obstacles changed, so that the fields are repaired the next time they are needed.
+
+        Args:
+            changed_cells (List[Position]): The cells whose obstacles changed in the last iteration.
+
+        Returns:
+            None
+        """
+        if not changed_cells:
+            return
+        height = self.grid.height
+        flat_cells = [cell.x * height + cell.y for cell in changed_cells]
+        for field in self.fields.values():
+            if field.distances is not None:
+                field.changed_cells.update(flat_cells)
+
+
+    def share_with(self, other: 'FlowFieldCache') -> None:
+        """ Reuses the fields of the cache of another environment with the same package points (e.g. a replica of the same layout with another seed),
+        instead of computing them again.
+
+        The first time a field is needed, it is copied from the other cache (which computes it if needed), as long as the obstacles
+        of both grids are the same at that moment. The distances are copied, as each environment repairs its own fields when its obstacles change.
+
+        Args:
+            other (FlowFieldCache): The cache to copy the fields from.
+
+        Returns:
+            None
+        """
+        self.shared = other
+
+
+    def _copy_shared(self, key: tuple, field: FlowField) -> None:
+        """ Copies a field that has never been computed from the shared cache, if the obstacles of both grids are the same.
+
+        Args:
+            key (tuple): The target of the field.
+            field (FlowField): The field.
+
+        Returns:
+            None
+        """
+        source = self.shared.fields.get(key)
+        if source is None or not np.array_equal(self.grid.occupancy, self.shared.grid.occupancy):
+            return
+        source.refresh(self.shared.grid.occupancy)
+        field.distances = source.distances.copy()
+        field.changed_cells.clear()
+
+
+    def __getstate__(self) -> dict:
+        # The shared cache belongs to another environment, which is not saved with this one
+        state = self.__dict__.copy()
+        state['shared'] = None
+        return state
@@ -0,0 +1,290 @@
+import heapq
+from collections import deque
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.agents.path_algorithms.path_algorithm import PathAlgorithm
+
+from src.utils.position import Position
+
+# Side of the square clusters the grid is split into
+CLUSTER_SIZE = 10
+# Entrances narrower than this get a single transition in their middle, wider ones get one at each end
+MAX_ENTRANCE_WIDTH = 6
+
+
+class ClusterHierarchy:
+    """ Abstract graph of the grid for hierarchical pathfinding (HPA*).
+
+    The grid is split into square clusters. Where two neighbouring clusters share free cells along their border (an entrance),
+    the cells on both sides of it become nodes of the abstract graph, linked with cost 1. Nodes of the same cluster are linked
+    with the length of the shortest path between them inside the cluster.
+
+    Everything is computed lazily, the first time a search needs it, and it reads the occupancy bitmap of the grid in place.
+    When obstacles change, only the clusters containing the changed cells (and their neighbours, for cells on a border) are discarded.
+    """
+    def __init__(self, occupancy: np.ndarray, cluster_size: int=CLUSTER_SIZE) -> None:
+        """ Constructor.
+
+        Args:
+            occupancy (np.ndarray): Occupancy bitmap of the grid, indexed as [x, y]. 1 means that the cell is occupied by an obstacle.
+            cluster_size (int, optional): Side of the clusters. Defaults to CLUSTER_SIZE.
+
+        Returns:
+            None
+        """
+        self.occupancy = occupancy
+        self.width, self.height = occupancy.shape
+        self.cluster_size = cluster_size
+        # Transitions (pairs of flat cells) of each border, keyed by (cluster, axis): the border between cluster (cx, cy)
+        # and (cx + 1, cy) has axis 'x', and the one between (cx, cy) and (cx, cy + 1) has axis 'y'
+        self.borders: Dict[Tuple[Tuple[int, int], str], List[Tuple[int, int]]] = {}
+        # Nodes of each cluster, mapped to the nodes of the neighbouring clusters they are linked to
+        self.links: Dict[Tuple[int, int], Dict[int, List[int]]] = {}
+        # Distances between the nodes of each cluster, through the cluster
+        self.intra_edges: Dict[Tuple[int, int], Dict[int, Dict[int, int]]] = {}
+
+
+    def update(self, changed_cells: List[Position]) -> None:
+        """ Discards the clusters and borders affected by the cells whose obstacles changed.
+
+        Args:
+            changed_cells (List[Position]): The cells whose obstacles changed in the last iteration.
+
+        Returns:
+            None
+        """
+        size = self.cluster_size
+        for cell in changed_cells:
+            cluster = (cell.x // size, cell.y // size)
+            self.discard_cluster(cluster)
+            if cell.x % size == 0 and cluster[0] > 0:
+                self.discard_border((cluster[0] - 1, cluster[1]), 'x')
+            if cell.x % size == size - 1:
+                self.discard_border(cluster, 'x')
+            if cell.y % size == 0 and cluster[1] > 0:
+                self.discard_border((cluster[0], cluster[1] - 1), 'y')
+            if cell.y % size == size - 1:
+                self.discard_border(cluster, 'y')
+
+
+    def discard_cluster(self, cluster: Tuple[int, int]) -> None:
+        """ Forgets the nodes and the intra edges of a cluster, so that they are computed again when needed."""
+        self.links.pop(cluster, None)
+        self.intra_edges.pop(cluster, None)
+
+
+    def discard_border(self, cluster: Tuple[int, int], axis: str) -> None:
+        """ Forgets the transitions of a border, and the clusters on both sides of it."""
+        self.borders.pop((cluster, axis), None)
+        self.discard_cluster(cluster)
+        self.discard_cluster((cluster[0] + 1, cluster[1]) if axis == 'x' else (cluster[0], cluster[1] + 1))
+
+
+    def find_path(self, start: Position, end: Position) -> List[Position]:
+        """ First segment of the path between two cells: the cells from the start to the first node of the abstract path.
+
+        The agent follows the segment, and a new search is done from its end, so only the part of the path that is
+        about to be walked is refined.
+
+        Args:
+            start (Position): Where the agent is at.
+            end (Position): Where the agent wants to go.
+
+        Returns:
+            List[Position]: The cells of the first segment, both ends included. Empty if end cannot be reached.
+        """
+        height = self.height
+        # Flat, zero-copy view of the bitmap: cell (x, y) is at index x * height + y
+        blocked = memoryview(self.occupancy).cast('B')
+        start_cell = start.x * height + start.y
+        end_cell = end.x * height + end.y
+        if blocked[end_cell] or start_cell == end_cell:
+            return []
+
+        # Temporarily connect the start and the end to the nodes of their clusters
+        start_cluster = self.cluster_of(start_cell)
+        end_cluster = self.cluster_of(end_cell)
+        start_distances, start_parents = self.search_cluster(start_cell, start_cluster, blocked)
+        start_edges = {node: start_distances[node] for node in self.get_links(start_cluster, blocked) if node in start_distances and node != start_cell}
+        if end_cluster == start_cluster and end_cell in start_distances:
+            start_edges[end_cell] = start_distances[end_cell]
+        end_distances, _ = self.search_cluster(end_cell, end_cluster, blocked)
+        end_edges = {node: end_distances[node] for node in self.get_links(end_cluster, blocked) if node in end_distances and node != end_cell}
+
+        # A* on the abstract graph
+        distances = {start_cell: 0}
+        parents = {start_cell: None}
+        queue = [(start.dist_to(end), 0, start_cell)]
+        while queue:
+            _, negative_distance, node = heapq.heappop(queue)
+            if node == end_cell:
+                break
+            distance = -negative_distance
+            if distance > distances[node]:
+                continue
+            if node == start_cell:
+                neighbours = list(start_edges.items())
+            else:
+                cluster = self.cluster_of(node)
+                neighbours = list(self.get_intra_edges(cluster, blocked).get(node, {}).items())
+                if node in end_edges:
+                    neighbours.append((end_cell, end_edges[node]))
+            neighbours += [(partner, 1) for partner in self.get_links(self.cluster_of(node), blocked).get(node, [])]
+            for neighbour, cost in neighbours:
+                if neighbour not in distances or distance + cost < distances[neighbour]:
+                    distances[neighbour] = distance + cost
+                    parents[neighbour] = node
+                    estimate = distance + cost + abs(neighbour // height - end.x) + abs(neighbour % height - end.y)
+                    heapq.heappush(queue, (estimate, -(distance + cost), neighbour))
+        else:
+            # The queue got empty without reaching the end
+            return []
+
+        # Refine only the first abstract segment
+        first_node = end_cell
+        while parents[first_node] != start_cell:
+            first_node = parents[first_node]
+        if first_node not in start_parents:
+            # Transition to the neighbouring cluster
+            return [Position(start.x, start.y), Position(first_node // height, first_node % height)]
+        path = []
+        cell = first_node
+        while cell is not None:
+            path.append(Position(cell // height, cell % height))
+            cell = start_parents[cell]
+        path.reverse()
+        return path
+
+
+    def cluster_of(self, cell: int) -> Tuple[int, int]:
+        """ Cluster that a flat cell belongs to."""
+        return (cell // self.height // self.cluster_size, cell % self.height // self.cluster_size)
+
+
+    def get_border(self, cluster: Tuple[int, int], axis: str, blocked) -> List[Tuple[int, int]]:
+        """ Transitions of the border between a cluster and the next one along the axis, as pairs of flat cells (this side, other side)."""
+        key = (cluster, axis)
+        if key not in self.borders:
+            size, height = self.cluster_size, self.height
+            if axis == 'x':
+                x = (cluster[0] + 1) * size
+                pairs = [((x - 1) * height + y, x * height + y) for y in range(cluster[1] * size, min((cluster[1] + 1) * size, height))]
+            else:
+                y = (cluster[1] + 1) * size
+                pairs = [(x * height + y - 1, x * height + y) for x in range(cluster[0] * size, min((cluster[0] + 1) * size, self.width))]
+            # Split the border into entrances, runs of pairs with both cells free
+            transitions = []
+            run = []
+            for pair in pairs + [None]:
+                if pair is not None and not blocked[pair[0]] and not blocked[pair[1]]:
+                    run.append(pair)
+                    continue
+                if len(run) >= MAX_ENTRANCE_WIDTH:
+                    transitions += [run[0], run[-1]]
+                elif run:
+                    transitions.append(run[len(run) // 2])
+                run = []
+            self.borders[key] = transitions
+        return self.borders[key]
+
+
+    def get_links(self, cluster: Tuple[int, int], blocked) -> Dict[int, List[int]]:
+        """ Nodes of a cluster, mapped to the nodes of the neighbouring clusters they are linked to."""
+        if cluster not in self.links:
+            cx, cy = cluster
+            n_clusters_x = (self.width + self.cluster_size - 1) // self.cluster_size
+            n_clusters_y = (self.height + self.cluster_size - 1) // self.cluster_size
+            links = {}
+            if cx + 1 < n_clusters_x:
+                for inside, outside in self.get_border(cluster, 'x', blocked):
+                    links.setdefault(inside, []).append(outside)
+            if cy + 1 < n_clusters_y:
+                for inside, outside in self.get_border(cluster, 'y', blocked):
+                    links.setdefault(inside, []).append(outside)
+            if cx > 0:
+                for outside, inside in self.get_border((cx - 1, cy), 'x', blocked):
+                    links.setdefault(inside, []).append(outside)
+            if cy > 0:
+                for outside, inside in self.get_border((cx, cy - 1), 'y', blocked):
+                    links.setdefault(inside, []).append(outside)
+            self.links[cluster] = links
+        return self.links[cluster]
+
+
+    def get_intra_edges(self, cluster: Tuple[int, int], blocked) -> Dict[int, Dict[int, int]]:
+        """ Distances between the nodes of a cluster, through the cluster."""
+        if cluster not in self.intra_edges:
+            nodes = self.get_links(cluster, blocked)
+            edges = {}
+            for node in nodes:
+                distances, _ = self.search_cluster(node, cluster, blocked)
+                edges[node] = {other: distances[other] for other in nodes if other != node and other in distances}
+            self.intra_edges[cluster] = edges
+        return self.intra_edges[cluster]
+
+
+    def search_cluster(self, source: int, cluster: Tuple[int, int], blocked) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """ BFS from a cell without leaving its cluster.
+
+        Returns:
+            Tuple[Dict[int, int], Dict[int, int]]: Distance and parent of every cell reached.
+        """
+        height, size = self.height, self.cluster_size
+        min_x, min_y = cluster[0] * size, cluster[1] * size
+        max_x, max_y = min(min_x + size, self.width), min(min_y + size, height)
+        distances = {source: 0}
+        parents = {source: None}
+        queue = deque([source])
+        while queue:
+            cell = queue.popleft()
+            x, y = divmod(cell, height)
+            for nx, ny in ((x + 1, y), (x, y + 1), (x - 1, y), (x, y - 1)):
+                if min_x <= nx < max_x and min_y <= ny < max_y:
+                    neighbour = nx * height + ny
+                    if neighbour not in distances and not blocked[neighbour]:
+                        distances[neighbour] = distances[cell] + 1
+                        parents[neighbour] = cell
+                        queue.append(neighbour)
+        return distances, parents
+
+
+class HierarchicalPathfinding(PathAlgorithm):
+
+    def get_next_position(self, pos: Position, dest: Position, grid_height: int, grid_width: int, matrix) -> Position:
+        """ Next cell of the path to the destination.
+
+        Args:
+            pos (Position): Where the agent is at.
+            dest (Position): Where the agent wants to go.
+            grid_height (int): Height of the grid.
+            grid_width (int): Width of the grid.
+            matrix (np.ndarray): Occupancy bitmap of the grid (see convert_grid_to_matrix), indexed as [x, y].
+
+        Returns:
+            Position: The next cell the agent should go to.
+        """
+        path = self.find_path(pos, dest, matrix)
+
+        if len(path) > 1:
+            new_position = path[1]
+        else:
+            new_position = Position(pos.x, pos.y)
+
+        return new_position
+
+
+    def find_path(self, start: Position, end: Position, occupancy) -> List[Position]:
+        """ First segment of the hierarchical path between two cells (see ClusterHierarchy.find_path).
+        Called on its own, the hierarchy is built for this search only: the routing engine keeps one for the whole run instead.
+
+        Args:
+            start (Position): Where the agent is at.
+            end (Position): Where the agent wants to go.
+            occupancy (np.ndarray): Occupancy bitmap of the grid, indexed as [x, y]. 1 means that the cell is occupied by an obstacle.
+
+        Returns:
+            List[Position]: The cells of the first segment, both ends included. Empty if end cannot be reached.
+        """
+        return ClusterHierarchy(occupancy).find_path(start, end)
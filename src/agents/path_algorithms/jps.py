@@ -0,0 +1,130 @@
+import heapq
+from typing import List, Tuple, Union
+
+from src.agents.path_algorithms.path_algorithm import PathAlgorithm
+
+from src.utils.position import Position
+
+# Directions explored from the start, when there is no parent to prune them
+DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+
+class JumpPointSearch(PathAlgorithm):
+
+    def get_next_position(self, pos: Position, dest: Position, grid_height: int, grid_width: int, matrix) -> Position:
+        """ Next cell of the shortest path to the destination.
+
+        Args:
+            pos (Position): Where the agent is at.
+            dest (Position): Where the agent wants to go.
+            grid_height (int): Height of the grid.
+            grid_width (int): Width of the grid.
+            matrix (np.ndarray): Occupancy bitmap of the grid (see convert_grid_to_matrix), indexed as [x, y].
+
+        Returns:
+            Position: The next cell the agent should go to.
+        """
+        path = self.find_path(pos, dest, matrix)
+
+        if len(path) > 1:
+            new_position = path[1]
+        else:
+            new_position = Position(pos.x, pos.y)
+
+        return new_position
+
+
+    def find_path(self, start: Position, end: Position, occupancy) -> List[Position]:
+        """ Shortest 4-connected path between two cells, with Jump Point Search.
+
+        Instead of pushing every neighbour to the open list like A*, the search runs along straight lines and only stops
+        at the cells where the optimal path may turn (jump points), so open areas of the grid are crossed without expanding them.
+        When moving vertically, each cell also looks for jump points on its row, which makes the search complete
+        on 4-connected grids.
+
+        Args:
+            start (Position): Where the agent is at.
+            end (Position): Where the agent wants to go.
+            occupancy (np.ndarray): Occupancy bitmap of the grid, indexed as [x, y]. 1 means that the cell is occupied by an obstacle.
+
+        Returns:
+            List[Position]: The cells from start to end, both included. Empty if end cannot be reached.
+        """
+        width, height = occupancy.shape
+        # Flat, zero-copy view of the bitmap: cell (x, y) is at index x * height + y
+        blocked = memoryview(occupancy).cast('B')
+        if blocked[end.x * height + end.y]:
+            return []
+        goal = end.to_tuple()
+
+        def walkable(x: int, y: int) -> bool:
+            return 0 <= x < width and 0 <= y < height and not blocked[x * height + y]
+
+        def jump(x: int, y: int, dx: int, dy: int) -> Union[Tuple[int, int], None]:
+            # Walk from (x, y) in the direction (dx, dy) until a jump point is found or the way is blocked
+            while walkable(x, y):
+                if (x, y) == goal:
+                    return (x, y)
+                if dx != 0:
+                    # Forced neighbours: a cell beside the line that could not be reached through the previous cell
+                    if (walkable(x, y - 1) and not walkable(x - dx, y - 1)) or (walkable(x, y + 1) and not walkable(x - dx, y + 1)):
+                        return (x, y)
+                else:
+                    if (walkable(x - 1, y) and not walkable(x - 1, y - dy)) or (walkable(x + 1, y) and not walkable(x + 1, y - dy)):
+                        return (x, y)
+                    if jump(x + 1, y, 1, 0) is not None or jump(x - 1, y, -1, 0) is not None:
+                        return (x, y)
+                x += dx
+                y += dy
+            return None
+
+        node = start.to_tuple()
+        distances = {node: 0}
+        parents = {node: None}
+        # Ties in the estimate are broken in favour of the nodes furthest from the start, which are closer to the end
+        queue = [(start.dist_to(end), 0, node)]
+        while queue:
+            _, negative_distance, node = heapq.heappop(queue)
+            if node == goal:
+                break
+            distance = -negative_distance
+            if distance > distances[node]:
+                continue
+            x, y = node
+            parent = parents[node]
+            if parent is None:
+                directions = DIRECTIONS
+            else:
+                # Prune the directions that are covered from the parent: keep going straight, or turn
+                dx = (x > parent[0]) - (x < parent[0])
+                dy = (y > parent[1]) - (y < parent[1])
+                directions = [(0, -1), (0, 1), (dx, 0)] if dx != 0 else [(-1, 0), (1, 0), (0, dy)]
+            for dx, dy in directions:
+                jump_point = jump(x + dx, y + dy, dx, dy)
+                if jump_point is None:
+                    continue
+                jump_distance = distance + abs(jump_point[0] - x) + abs(jump_point[1] - y)
+                if jump_point not in distances or jump_distance < distances[jump_point]:
+                    distances[jump_point] = jump_distance
+                    parents[jump_point] = node
+                    estimate = jump_distance + abs(jump_point[0] - goal[0]) + abs(jump_point[1] - goal[1])
+                    heapq.heappush(queue, (estimate, -jump_distance, jump_point))
+        else:
+            # The queue got empty without reaching the end
+            return []
+
+        # Consecutive jump points are always on the same row or column, fill the cells in between
+        path = [Position(goal[0], goal[1])]
+        node = goal
+        while parents[node] is not None:
+            parent = parents[node]
+            dx = (parent[0] > node[0]) - (parent[0] < node[0])
+            dy = (parent[1] > node[1]) - (parent[1] < node[1])
+            x, y = node
+            while (x, y) != parent:
+                x += dx
+                y += dy
+                path.append(Position(x, y))
+            node = parent
+        path.reverse()
+        return path
@@ -4,6 +4,30 @@ from src.utils.position import Position
 from src.environment.obstacle import Obstacle
 
 
+def neighbour_cells(cell: int, width: int, height: int) -> List[int]:
+    """ 4-connected neighbours of a cell inside the grid, using flat indices (cell (x, y) is x * height + y, as in the occupancy bitmap).
+
+    Args:
+        cell (int): Flat index of the cell.
+        width (int): Width of the grid.
+        height (int): Height of the grid.
+
+    Returns:
+        List[int]: Flat indices of the neighbours, in the order (1,0), (0,1), (-1,0), (0,-1).
+    """
+    y = cell % height
+    neighbours = []
+    if cell + height < width * height:
+        neighbours.append(cell + height)
+    if y + 1 < height:
+        neighbours.append(cell + 1)
+    if cell >= height:
+        neighbours.append(cell - height)
+    if y > 0:
+        neighbours.append(cell - 1)
+    return neighbours
+
+
 class PathAlgorithm():
     def get_next_position(self):
         pass
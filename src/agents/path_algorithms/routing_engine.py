@@ -0,0 +1,150 @@
+from typing import Dict, List, Union
+
+from src.agents.path_algorithms.dijkstra import Dijkstra
+from src.agents.path_algorithms.dstar_lite import DStarLite
+from src.agents.path_algorithms.flow_field import FlowFieldCache
+from src.agents.path_algorithms.hpa import ClusterHierarchy, HierarchicalPathfinding
+from src.agents.path_algorithms.path_algorithm import PathAlgorithm
+from src.utils.position import Position
+
+# The cell itself and its 4-connected neighbours
+NEIGHBOURHOOD = [(0, 0), (1, 0), (0, 1), (-1, 0), (0, -1)]
+
+
+class Route:
+    """ Path computed for an agent, followed step by step until it is no longer valid."""
+    def __init__(self, destination: Position, path: List[Position]) -> None:
+        """ Constructor.
+
+        Args:
+            destination (Position): Where the agent wants to go.
+            path (List[Position]): The cells from the agent position to the destination, both included.
+
+        Returns:
+            None
+        """
+        self.destination = destination
+        self.path = [cell.to_tuple() for cell in path]
+        self.cells = set(self.path)
+        self.cursor = 0
+
+
+    def next_cell(self, pos: Position) -> Union[tuple, None]:
+        """ The cell the agent has to go to next, if it is still following the route.
+
+        Args:
+            pos (Position): Where the agent is at.
+
+        Returns:
+            Union[tuple, None]: The next cell of the route, or None if the agent is not on the route anymore or it has already reached its end.
+        """
+        cell = pos.to_tuple()
+        if self.cursor + 1 < len(self.path) and self.path[self.cursor + 1] == cell:
+            # The agent moved as planned since the last call
+            self.cursor += 1
+        if self.path[self.cursor] != cell or self.cursor + 1 >= len(self.path):
+            return None
+        return self.path[self.cursor + 1]
+
+
+class RoutingEngine:
+    """ Pathfinding service owned by the Environment and shared by all the agents during the whole run.
+
+    It searches directly on the occupancy bitmap of the grid, which the obstacles keep up to date,
+    and keeps the route computed for each agent. A route is followed step by step, and it is only recomputed when the agent
+    changes its destination, leaves the route, or an obstacle appears on or next to it.
+    With Dijkstra, destinations with a flow field (the package points) need no search at all: the next cell is read from the field.
+    Incremental planners (D* Lite) keep their own search tree instead of a route, and are told which cells changed so they can repair it.
+    Hierarchical searches (HPA*) share a single cluster hierarchy, and their routes only reach the end of the first abstract segment,
+    so a new search is done from there.
+    """
+    def __init__(self, grid) -> None:
+        """ Constructor.
+
+        Args:
+            grid (EnvironmentGrid): The grid of the environment.
+
+        Returns:
+            None
+        """
+        self.grid = grid
+        self.algorithm = Dijkstra()
+        self.routes: Dict[str, Route] = {}
+        self.flow_fields = FlowFieldCache(grid)
+        self.incremental_planners: Dict[str, DStarLite] = {}
+        self.hierarchy = ClusterHierarchy(grid.occupancy)
+        self.n_searches = 0
+        # Nodes expanded by the incremental planners in the current iteration, reset by the Environment at the beginning of each step
+        self.n_expanded_nodes = 0
+
+
+    def get_next_position(self, agent_id: str, pos: Position, destination: Position, algorithm: PathAlgorithm=None) -> Position:
+        """ The next cell an agent should go to in order to reach its destination.
+
+        Args:
+            agent_id (str): ID of the agent asking for the route.
+            pos (Position): Where the agent is at.
+            destination (Position): Where the agent wants to go.
+            algorithm (PathAlgorithm, optional): The search used by the agent (Dijkstra, AStar, JumpPointSearch, DStarLite or HierarchicalPathfinding). Defaults to Dijkstra.
+
+        Returns:
+            Position: The next cell the agent should go to. It is the current position if the destination is reached or unreachable.
+        """
+        if algorithm is None:
+            algorithm = self.algorithm
+        if isinstance(algorithm, Dijkstra):
+            # The flow field gives the same shortest paths as a Dijkstra search, without searching
+            field = self.flow_fields.get(destination)
+            if field is not None:
+                return field.next_position(pos)
+        elif isinstance(algorithm, DStarLite):
+            self.incremental_planners[agent_id] = algorithm
+            next_position = algorithm.get_next_position(pos, destination, self.grid.height, self.grid.width, self.grid.occupancy)
+            self.n_expanded_nodes += algorithm.n_expanded_nodes
+            return next_position
+
+        route = self.routes.get(agent_id)
+        next_cell = route.next_cell(pos) if route is not None and route.destination == destination else None
+        if next_cell is None:
+            self.routes.pop(agent_id, None)
+            if pos == destination:
+                return Position(pos.x, pos.y)
+            if isinstance(algorithm, HierarchicalPathfinding):
+                path = self.hierarchy.find_path(pos, destination)
+            else:
+                path = algorithm.find_path(pos, destination, self.grid.occupancy)
+            self.n_searches += 1
+            if len(path) < 2:
+                # No path to the destination by now, stay in place
+                return Position(pos.x, pos.y)
+            route = Route(destination, path)
+            self.routes[agent_id] = route
+            next_cell = route.next_cell(pos)
+
+        return Position(next_cell[0], next_cell[1])
+
+
+    def update(self, changed_cells: List[Position]) -> None:
+        """ Drops the routes that go through or next to a cell that became blocked, marks the flow fields and the incremental planners for repair,
+        and discards the affected clusters of the hierarchy.
+
+        Args:
+            changed_cells (List[Position]): The cells whose obstacles changed in the last iteration.
+
+        Returns:
+            None
+        """
+        self.flow_fields.update(changed_cells)
+        for planner in self.incremental_planners.values():
+            planner.update(changed_cells, self.grid.height)
+        self.hierarchy.update(changed_cells)
+
+        blocked_cells = set()
+        for cell in changed_cells:
+            if self.grid.occupancy[cell.x, cell.y]:
+                blocked_cells.update((cell.x + dx, cell.y + dy) for dx, dy in NEIGHBOURHOOD)
+
+        if blocked_cells:
+            for agent_id, route in list(self.routes.items()):
+                if not route.cells.isdisjoint(blocked_cells):
+                    del self.routes[agent_id]
@@ -1,4 +1,9 @@
-from typing import List
+from collections.abc import Mapping
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from src.environment.entity_index import ENTITY_AGENT, ENTITY_PACKAGE, ENTITY_PACKAGE_POINT, ENTITY_TYPES, get_entity_type
 from src.environment.obstacle import Obstacle
 from src.environment.package import Package
 from src.environment.package_point import PackagePoint
@@ -7,22 +12,174 @@ from src.environment.package_point import PackagePoint
 from src.utils.position import Position
 from src.environment.obstacle import Obstacle
 
+# How the perception is computed
+# - 'dict': the contents of every visible cell are copied into a dict, as the agents have always done.
+# - 'array': a PerceptionView of the visible square of the grid, backed by the arrays of the grid (occupancy bitmap and entity index).
+PERCEPTION_MODE_DICT = 'dict'
+PERCEPTION_MODE_ARRAY = 'array'
+# Up to this number of visible cells, the visible entities are found by going through the cells, instead of with the entity index
+PERCEPTION_SCAN_MAX_CELLS = 25
+
+
+class PerceptionView(Mapping):
+    """ What an agent perceives in the 'array' mode: the square of the grid around it, clipped to the borders.
+
+    It is read-only and can be used as the dict of the 'dict' mode (the contents of each visible cell, keyed by its (x, y) tuple,
+    iterated in the same order), but it does not copy anything when it is created: the contents of a cell are read from the grid when accessed.
+    It also gives typed views of the visible square, sliced from the arrays the grid keeps up to date:
+    the obstacle mask, and the entities of each type with their positions and IDs.
+    Like them, it reflects the state of the grid at the moment it is read, so it must not be kept after the grid changes.
+    """
+    def __init__(self, grid, x_start: int, x_end: int, y_start: int, y_end: int) -> None:
+        """ Constructor.
+
+        Args:
+            grid (EnvironmentGrid): The grid.
+            x_start (int): First visible column.
+            x_end (int): Last visible column, not included.
+            y_start (int): First visible row.
+            y_end (int): Last visible row, not included.
+
+        Returns:
+            None
+        """
+        self.grid = grid
+        self.x_start, self.x_end = x_start, x_end
+        self.y_start, self.y_end = y_start, y_end
+        self.start = np.array([x_start, y_start])
+        self.end = np.array([x_end, y_end])
+        # Visible entities of each type and their positions, computed the first time they are asked for
+        self._entities = {}
+        self._positions = {}
+
+
+    def __contains__(self, pos) -> bool:
+        x, y = pos
+        return self.x_start <= x < self.x_end and self.y_start <= y < self.y_end
+
+
+    def __getitem__(self, pos) -> list:
+        if pos not in self:
+            raise KeyError(pos)
+        x, y = pos
+        return list(self.grid._grid[x][y])
+
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        for x in range(self.x_start, self.x_end):
+            for y in range(self.y_start, self.y_end):
+                yield (x, y)
+
+
+    def __len__(self) -> int:
+        return (self.x_end - self.x_start) * (self.y_end - self.y_start)
+
+
+    @property
+    def obstacle_mask(self) -> np.ndarray:
+        """ The occupancy bitmap of the visible square (1 where there is an obstacle), indexed as [x - x_start, y - y_start]. It is a view of the bitmap of the grid."""
+        return self.grid.occupancy[self.x_start:self.x_end, self.y_start:self.y_end]
+
+
+    def entities(self, entity_type: str) -> Tuple[List[object], np.ndarray]:
+        """ The visible entities of a type, sorted by cell as the cells are iterated.
+
+        Args:
+            entity_type (str): One of the types of the entity index, e.g. ENTITY_PACKAGE.
+
+        Returns:
+            Tuple[List[object], np.ndarray]: The entities, and their positions as an array of rows (x, y) in the same order.
+        """
+        entities = self.visible(entity_type)
+        positions = self._positions.get(entity_type)
+        if positions is None:
+            positions = np.array([tuple(entity.pos) for entity in entities], dtype=np.int32).reshape(-1, 2)
+            self._positions[entity_type] = positions
+        return entities, positions
+
+
+    def visible(self, entity_type: str) -> List[object]:
+        """ The visible entities of a type, sorted by cell as the cells are iterated, without their positions (see entities).
+
+        Args:
+            entity_type (str): One of the types of the entity index, e.g. ENTITY_PACKAGE.
+
+        Returns:
+            List[object]: The entities.
+        """
+        if entity_type not in self._entities:
+            if len(self) <= PERCEPTION_SCAN_MAX_CELLS:
+                self._scan_cells()
+            else:
+                all_entities, positions = self.grid.entities.of_type(entity_type)
+                rows = np.flatnonzero(((positions >= self.start) & (positions < self.end)).all(axis=1))
+                if len(rows) > 1:
+                    # Stable sort by column, then row
+                    rows = rows[np.lexsort((positions[rows, 1], positions[rows, 0]))]
+                self._entities[entity_type] = [all_entities[row] for row in rows]
+                self._positions[entity_type] = positions[rows]
+        return self._entities[entity_type]
+
+
+    def _scan_cells(self) -> None:
+        """ Finds the visible entities of every type by going through the visible cells, which is faster than masking the positions of all the entities when the square is small."""
+        visible_entities = {entity_type: [] for entity_type in ENTITY_TYPES}
+        grid_cells = self.grid._grid
+        for x in range(self.x_start, self.x_end):
+            column = grid_cells[x]
+            for y in range(self.y_start, self.y_end):
+                for entity in column[y]:
+                    entity_type = get_entity_type(entity)
+                    if entity_type is not None:
+                        visible_entities[entity_type].append(entity)
+        self._entities.update(visible_entities)
+
+
+    def ids(self, entity_type: str) -> np.ndarray:
+        return np.array([entity.id for entity in self.visible(entity_type)], dtype=object)
+
+
+    @property
+    def package_ids(self) -> np.ndarray:
+        return self.ids(ENTITY_PACKAGE)
+
+
+    @property
+    def package_point_ids(self) -> np.ndarray:
+        return self.ids(ENTITY_PACKAGE_POINT)
+
+
+    @property
+    def agent_ids(self) -> np.ndarray:
+        return self.ids(ENTITY_AGENT)
+
+
 class Perception:
     """ What the agent can perceive from the environment."""
-    def __init__(self, n_cells_around:int) -> None:
+    def __init__(self, n_cells_around:int, mode:str=PERCEPTION_MODE_DICT, cache:bool=True) -> None:
         """ Constructor.
 
         Args:
             n_cells_around (int): The number of cells around the agent that it can perceive forming a square.
-        
+            mode (str, optional): How the perception is computed, PERCEPTION_MODE_DICT or PERCEPTION_MODE_ARRAY (see PerceptionView).
+                Both perceive the same. Defaults to PERCEPTION_MODE_DICT.
+            cache (bool, optional): Whether to reuse the last perception while the agent stays in the same position and nothing changes around it
+                (see EnvironmentGrid.region_version), e.g. when it perceives again in the same step. Defaults to True.
+
         Returns:
             None
-        """        
+        """
+        if mode not in [PERCEPTION_MODE_DICT, PERCEPTION_MODE_ARRAY]:
+            raise ValueError(f"Not a valid perception mode: {mode}")
         self.n_cells_around = n_cells_around
+        self.mode = mode
+        self.cache = cache
         self.visible_packages = []
         self.visible_obstacles = []
         self.visible_package_points = []
-    
+        # Last perception: the grid, the key it was computed for (position, radius and version of the visible square), and what was perceived
+        self._cached = None
+
 
     def percept(self, agent_position: Position, grid) -> dict:
         """ The agent perceives the environment.
@@ -33,7 +190,46 @@ class Perception:
 
         Returns:
             List[List]: The subgrid the agent can perceive.
-        """        
+        """
+        key = None
+        if self.cache and not grid.torus and hasattr(grid, 'region_versions'):
+            x, y = agent_position
+            x_start, x_end, y_start, y_end = self.visible_square(agent_position, grid)
+            key = (x, y, self.n_cells_around, grid.region_version(x_start, x_end, y_start, y_end))
+            if self._cached is not None and self._cached[0] is grid and self._cached[1] == key:
+                visible_cells_entities, self.visible_packages, self.visible_package_points, self.visible_obstacles = self._cached[2]
+                return visible_cells_entities
+
+        if self.mode == PERCEPTION_MODE_ARRAY:
+            visible_cells_entities = self.percept_array(agent_position, grid)
+        else:
+            visible_cells_entities = self.percept_dict(agent_position, grid)
+        if key is not None:
+            self._cached = (grid, key, (visible_cells_entities, self.visible_packages, self.visible_package_points, self.visible_obstacles))
+        return visible_cells_entities
+
+
+    def visible_square(self, agent_position: Position, grid) -> Tuple[int, int, int, int]:
+        """ The square of the grid the agent can perceive, clipped to the borders.
+
+        Returns:
+            Tuple[int, int, int, int]: The first and last (not included) column, and the first and last (not included) row.
+        """
+        x, y = agent_position
+        return max(x - self.n_cells_around, 0), min(x + self.n_cells_around + 1, grid.width), \
+               max(y - self.n_cells_around, 0), min(y + self.n_cells_around + 1, grid.height)
+
+
+    def percept_dict(self, agent_position: Position, grid) -> dict:
+        """ The agent perceives the environment, in the 'dict' mode.
+
+        Args:
+            agent_position (Position): The position of the agent in the environment.
+            grid (MultiGrid): The grid of the environment.
+
+        Returns:
+            dict: The contents of each visible cell, keyed by its (x, y) tuple.
+        """
         visible_cells_positions = grid.get_neighborhood(agent_position, moore=True, include_center=True, radius=self.n_cells_around)
         self.visible_packages = []
         self.visible_obstacles = []
@@ -48,5 +244,25 @@ class Perception:
                     self.visible_packages.append(entity)
                 elif isinstance(entity, Obstacle):
                     self.visible_obstacles.append(entity)
-        
+
         return visible_cells_entities
+
+
+    def percept_array(self, agent_position: Position, grid) -> PerceptionView:
+        """ The agent perceives the environment, in the 'array' mode.
+
+        Args:
+            agent_position (Position): The position of the agent in the environment.
+            grid (EnvironmentGrid): The grid of the environment. It must not be a torus.
+
+        Returns:
+            PerceptionView: The square of the grid the agent can perceive.
+        """
+        if grid.torus:
+            raise Exception("The array perception does not support grids that wrap around their edges")
+        view = PerceptionView(grid, *self.visible_square(agent_position, grid))
+        self.visible_packages = view.visible(ENTITY_PACKAGE)
+        self.visible_package_points = view.visible(ENTITY_PACKAGE_POINT)
+        # The obstacles place ObstacleCells in the grid, never themselves, so there are none to see, as in the 'dict' mode (see PerceptionView.obstacle_mask)
+        self.visible_obstacles = []
+        return view
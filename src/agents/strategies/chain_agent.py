@@ -1,3 +1,4 @@
+import logging
 from typing import List, Union
 from src.agents.agent import Agent
 from src.agents.perception import Perception
@@ -7,6 +8,8 @@ from src.environment.package_point import PACKAGE_POINT_END, PACKAGE_POINT_INTER
 from src.utils.position import Position
 from src.utils.grid2matrix import convert_grid_to_matrix
 
+logger = logging.getLogger(__name__)
+
 
 class ChainAgent(Agent):
     def __init__(self, id: str, position: Position, package: List[Package], perception: Perception, goal_package_point_type: str, algorithm_name: str, origin_package_point_type: str = None) -> None:
@@ -69,9 +72,9 @@ class ChainAgent(Agent):
                     n_picked_packages = 0
                     for package in package_order:
                         n_picked_packages += self.pick_package(package, grid)
-                    print(f'Agent with ID {self.id} picked {n_picked_packages} packages.')
+                    logger.debug('Agent with ID %s picked %d packages.', self.id, n_picked_packages)
                 else:
-                    print(f"Agent with ID {self.id} is at package point, but there are no packages, resting...")
+                    logger.debug("Agent with ID %s is at package point, but there are no packages, resting...", self.id)
             else:
                 # Search for path to origin
                 next_pos = self.get_next_position(grid, self.origin)
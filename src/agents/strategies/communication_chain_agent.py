@@ -1,3 +1,4 @@
+import logging
 from typing import Optional
 from src.agents.strategies.chain_agent import ChainAgent
 from src.agents.perception import Perception
@@ -7,6 +8,8 @@ from src.agents.agent import Agent
 from src.environment.communication.Task import Task
 from src.environment.communication.communication_layer import MSG_DELIVERY_NOTIFY, MSG_PICKUP_RESPONSE, CommunicationLayer, Message
 
+logger = logging.getLogger(__name__)
+
 
 
 class CommunicationChainAgent(ChainAgent):
@@ -15,7 +18,7 @@ class CommunicationChainAgent(ChainAgent):
         self.communication_mechanism = communication_mechanism
 
     def receive_message(self, message: Message):
-        print(f"Agent {self.id} received message: {message}")
+        logger.debug("Agent %s received message: %s", self.id, message)
         # if message.type == MSG_PICKUP_RESPONSE and message.value["response"] == "yes":
         #     print(f"Package accepted the pickup request. Assigning task...")
             # TODO: Implement task assignment logic
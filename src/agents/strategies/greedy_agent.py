@@ -1,11 +1,10 @@
 import random
 from typing import Union, List
-from src.agents.agent import Agent
+from src.agents.agent import SEARCH_ALGORITHMS, Agent
 from src.agents.perception import Perception
 from src.environment.package import Package
 from src.utils.position import Position
 from src.environment.package_point import PackagePoint
-from src.utils.grid2matrix import convert_grid_to_matrix
 
 
 
@@ -149,8 +148,8 @@ class GreedyAgent(Agent):
 
 
     def get_next_position(self, grid, perception, destination: Position, destination_type: str) -> Position:
-        if self.algorithm_name == 'dijkstra':
-            chosen_new_position = self.algorithm.get_next_position(self.pos, destination, grid.height, grid.width, convert_grid_to_matrix(grid))
+        if self.algorithm_name in SEARCH_ALGORITHMS:
+            chosen_new_position = grid.router.get_next_position(self.id, self.pos, destination, self.algorithm)
         elif self.algorithm_name == 'pheromones':
             chosen_new_position = self.algorithm.get_next_position(self.pos, self.previous_point, self.previous_point_type, destination, 
                                                                    destination_type, perception, grid, False, True)
@@ -47,10 +47,13 @@ class RoamingAgent(Agent):
             next_pos = self.get_next_position(grid, self.packages[0].destination)
             self.move(next_pos, current_perception, grid)
             
+    def is_available(self) -> bool:
+        return self.package_task is None and len(self.packages) == 0
+            
     def receive_message(self, message: Message) -> Message:
         if message.type == MSG_PICKUP_REQUEST:
             # TODO: probably need more complex strategy here
-            if self.package_task is not None or len(self.packages) != 0:
+            if not self.is_available():
                 return Message(MSG_PICKUP_RESPONSE, self.id, message.sender_id, {"response": "no"})
             else:
                 new_task = Task(TaskType.PICKUP, message.value["package_id"], message.value["pos"])
@@ -1,3 +1,4 @@
+import logging
 import random
 
 from typing import List
@@ -9,6 +10,8 @@ from src.environment.package_point import PackagePoint
 from src.utils.position import Position
 from src.constants.utility_functions import UTILITY_FUNCTIONS, UTILITY_FUNCTIONS_WITH_ONLY_ONE_ACTION, UTILITY_FUNCTIONS_WITH_ALL_POSSIBLE_ACTIONS
 
+logger = logging.getLogger(__name__)
+
 
 class Waiter(Agent):
     def __init__(self, id: str, position: Position, package: List[Package], perception: Perception, movement_algorithm: str, 
@@ -84,12 +87,12 @@ class Waiter(Agent):
 
 
     def perform_action(self, best_action: tuple, grid) -> None:
-        print(best_action)
+        logger.debug('%s', best_action)
         if len(best_action) == 3 and best_action[0] != 'deliver':
             best_action = (best_action[1], best_action[2])
         elif len(best_action) == 4:
             best_action = (best_action[1], best_action[2], best_action[3])
-        print('best action', best_action)
+        logger.debug('best action %s', best_action)
         # Perform the best action
         if best_action[0] == 'pick':
             super().pick_package(best_action[1], grid)
@@ -1,3 +1,4 @@
+import logging
 from collections import defaultdict
 from copy import deepcopy
 import itertools
@@ -6,6 +7,7 @@ from queue import Queue
 import random
 
 from typing import List
+from src.agents.path_algorithms.flow_field import UNREACHABLE
 from src.agents.tips_functions import linear_decreasing_time_tips
 from src.environment.communication.communication_layer import MSG_BID_ACCEPT, MSG_BID_REJECT, MSG_DELIVERY_ANNOUNCE, MSG_PLACE_BID, CommunicationLayer, Message
 from src.agents.agent import Agent
@@ -16,6 +18,8 @@ from src.environment.package_point import PackagePoint
 from src.utils.position import Position
 from src.constants.utility_functions import UTILITY_FUNCTIONS, UTILITY_FUNCTIONS_WITH_ONLY_ONE_ACTION, UTILITY_FUNCTIONS_WITH_ALL_POSSIBLE_ACTIONS
 
+logger = logging.getLogger(__name__)
+
 
 class WaiterCNP(Agent):
     def __init__(self, id: str, position: Position, package: List[Package], perception: Perception, movement_algorithm: str, 
@@ -32,9 +36,12 @@ class WaiterCNP(Agent):
         self.tips_function = tips_function
         self.starting_package_point_pos = starting_package_point_pos
         self.bidded_pickups = [] 
+        # Distances between package points of the environment, taken from the grid every step, as bids are placed outside of the steps
+        self.distance_table = None
         
     
     def step(self, grid) -> None:
+        self.distance_table = grid.distance_table
         if len(self.scheduled_actions_queue) > 0:
             # while self.is_action_completed(self.scheduled_actions_queue[0]):
             #     self.scheduled_actions_queue.pop(0)
@@ -199,7 +206,7 @@ class WaiterCNP(Agent):
                 return Message(MSG_PLACE_BID, self.id, message.sender_id, {"package": message.value["package"], "response": "no"})
             
         elif message.type == MSG_BID_ACCEPT:
-            print(f"Agent {self.id} got bid accept message")
+            logger.debug("Agent %s got bid accept message", self.id)
             # possible_actions_plan = deepcopy(self.scheduled_actions_queue)
 
             schedule, _ = self.get_optimal_schedule(message.value["package"])
@@ -243,7 +250,7 @@ class WaiterCNP(Agent):
                 new_schedule.insert(deliver_index, ("deliver", new_package_to_deliver.destination_pp, new_package_to_deliver))
             else:
                 # deliver after delivering the package with nearest destination
-                nearest_package_delivery = min(scheduled_packages, key=lambda x: x.destination.dist_to(new_package_to_deliver.destination))
+                nearest_package_delivery = min(scheduled_packages, key=lambda x: self.get_distance(x.destination, new_package_to_deliver.destination))
                 for i, action in enumerate(new_schedule):
                     if i > pick_index and action[0] == "deliver" and action[2].id == nearest_package_delivery.id:
                         deliver_index = i
@@ -302,11 +309,12 @@ class WaiterCNP(Agent):
             if current_speed == 0:
                 return 0
                     
-            if action[0] == "go-start":
-                current_time += floor(current_pos.dist_to(action[1]) / current_speed)
-                current_pos = action[1]
-            elif action[0] == "go-deliver":
-                current_time += floor(current_pos.dist_to(action[1]) / current_speed)
+            if action[0] == "go-start" or action[0] == "go-deliver":
+                distance = self.get_distance(current_pos, action[1])
+                if distance == UNREACHABLE:
+                    # The schedule cannot be carried out, so it is worth nothing
+                    return 0
+                current_time += floor(distance / current_speed)
                 current_pos = action[1]
             elif action[0] == "pick":
                 current_speed -= 1
@@ -314,4 +322,13 @@ class WaiterCNP(Agent):
                 tips += linear_decreasing_time_tips(action[2], current_time)
                 current_speed += 1
         
-        return tips
\ No newline at end of file
+        return tips
+
+
+    def get_distance(self, source: Position, target: Position) -> int:
+        """ Shortest path distance between two cells, one of them being a package point (see DistanceTable.distance).
+        Before the first step, the distance table is not known yet and the Manhattan distance is used instead.
+        """
+        if self.distance_table is None:
+            return source.dist_to(target)
+        return self.distance_table.distance(source, target)
@@ -8,6 +8,7 @@ Possible actions:
 - go-random
 """
 
+from src.agents.path_algorithms.flow_field import UNREACHABLE
 from src.agents.tips_functions import linear_decreasing_time_tips
 
 
@@ -93,11 +94,19 @@ def refined_greedy(possible_actions:list, grid, self):
             if same_destination_packages:
                 return [(10, 'pick', same_destination_packages[0])] + [(0, action[0], action[1]) for action in possible_actions]
             else:
-                closest_to_starting_package_point = min([(package_action, self.starting_package_point_pos.dist_to(package_action[1].pos)) for package_action in possible_actions_packages_to_pick], key=lambda x: x[1])[0]
+                closest_to_starting_package_point = min([(package_action, grid.distance_table.distance(self.starting_package_point_pos, package_action[1].pos)) for package_action in possible_actions_packages_to_pick], key=lambda x: x[1])[0]
                 return [(10, 'pick', closest_to_starting_package_point[1])] + [(0, action[0], action[1]) for action in possible_actions]
     else:
         if len(self.packages) > 0:
-            return [(-self.pos.dist_to(self.packages[i].destination), action[0], action[1]) if action[0] == 'go-deliver' else (-1000, action[0], action[1]) for i, action in enumerate(possible_actions)]
+            actions_values = []
+            for i, action in enumerate(possible_actions):
+                if action[0] == 'go-deliver':
+                    distance = grid.distance_table.distance(self.pos, self.packages[i].destination)
+                    # An unreachable destination is worth less than any other action, instead of negating the UNREACHABLE sentinel
+                    actions_values.append((-float('inf') if distance == UNREACHABLE else -distance, action[0], action[1]))
+                else:
+                    actions_values.append((-1000, action[0], action[1]))
+            return actions_values
         else:
             actions_values = []
             for action in possible_actions:
@@ -1,3 +1,4 @@
+import time
 from typing import List
 from enum import Enum
 from typing import Dict
@@ -17,6 +18,9 @@ MSG_PLACE_BID = "place_bid"
 MSG_BID_ACCEPT = "bid_accept"
 MSG_BID_REJECT = "bid_reject"
 
+# Destination of the messages sent to many agents at once with CommunicationLayer.broadcast
+BROADCAST_DESTINATION_ID = "all"
+
 class Message:
     def __init__(self, type: str, sender_id: str, destination_id: str, value: Dict) -> None:
         self.sender_id = sender_id
@@ -44,21 +48,110 @@ class CommunicationLayer:
     def init(cls, agents=[], broker=None):
         cls._instance = cls.__new__(cls)
         cls.agents = agents
+        # Registry to deliver each message directly to its destination agent (see get_agent)
+        cls.agents_by_id = {}
+        for agent in agents:
+            cls.agents_by_id.setdefault(agent.id, agent)
         cls.broker = broker
+        # Set with StepProfiler.attach to time the delivery of the messages, by type
+        cls.profiler = None
+
+    @classmethod
+    def get_state(cls) -> Dict:
+        """Registry of the communication layer, to be saved with the environment in a checkpoint.
+
+        Returns:
+            Dict: The agents and the broker registered, and the profiler attached
+        """
+        return {'agents': cls.agents, 'agents_by_id': cls.agents_by_id, 'broker': cls.broker, 'profiler': cls.profiler}
+
+    @classmethod
+    def set_state(cls, state: Dict):
+        """Restores the registry saved with get_state, without rebuilding it, so that it keeps referencing the same agents as the restored environment.
+
+        Args:
+            state (Dict): The registry returned by get_state
+        """
+        cls._instance = cls.__new__(cls)
+        cls.agents = state['agents']
+        cls.agents_by_id = state['agents_by_id']
+        cls.broker = state['broker']
+        cls.profiler = state.get('profiler')
 
     @classmethod
     def send_to_broker(cls, message: Message):
         Save.save_to_csv_messages(message, "Message to broker:")
+        if cls.profiler is None:
+            cls.broker.receive_message(message)
+            return
+        start = time.perf_counter()
         cls.broker.receive_message(message)
+        cls.profiler.record_message(message.type, time.perf_counter() - start)
+
+    @classmethod
+    def get_agent(cls, agent_id):
+        """The first registered agent with the given id, as the linear search through the agents used to find.
+        Agents appended to the registered list after init are found too: they are searched for the first time they are addressed.
+
+        Args:
+            agent_id (str): The id of the agent
+
+        Returns:
+            Agent: The agent, or None if no agent has that id
+        """
+        agent = cls.agents_by_id.get(agent_id)
+        if agent is None:
+            agent = next((agent for agent in cls.agents if agent.id == agent_id), None)
+            if agent is not None:
+                cls.agents_by_id[agent_id] = agent
+        return agent
 
     @classmethod
     def send_to_agent(cls, agent_id, message: Message):
-        for agent in cls.agents:
-            if agent.id == agent_id:
-                Save.save_to_csv_messages(message, "Message to agent:")
-                return agent.receive_message(message)
-        else:
+        agent = cls.get_agent(agent_id)
+        if agent is None:
             raise RuntimeError(f"No destination agent with id {message.destination_id} found")
+        Save.save_to_csv_messages(message, "Message to agent:")
+        if cls.profiler is None:
+            return agent.receive_message(message)
+        start = time.perf_counter()
+        response = agent.receive_message(message)
+        cls.profiler.record_message(message.type, time.perf_counter() - start)
+        return response
+
+    @classmethod
+    def broadcast(cls, message: Message, agent_ids: List[str]=None) -> Dict[str, Message]:
+        """Deliver the same message to many agents. It is logged once, with the number of recipients.
+        Every agent receives the same Message object, value included, so the receivers must not modify it.
+        Each id is delivered to as send_to_agent would (see get_agent).
+
+        Args:
+            message (Message): The message, usually with BROADCAST_DESTINATION_ID as destination
+            agent_ids (List[str], optional): The agents to deliver it to. Defaults to all of them, in the order they were registered.
+
+        Raises:
+            RuntimeError: If no agent has one of the ids
+
+        Returns:
+            Dict[str, Message]: The response of each agent (None if it did not respond), by agent id
+        """
+        if agent_ids is None and len(cls.agents_by_id) == len(cls.agents):
+            # Every registered agent has its own id, and all of them are in the registry
+            agents = cls.agents
+        else:
+            agents = []
+            for agent_id in (cls.get_all_agent_ids() if agent_ids is None else agent_ids):
+                agent = cls.get_agent(agent_id)
+                if agent is None:
+                    raise RuntimeError(f"No destination agent with id {agent_id} found")
+                agents.append(agent)
+        Save.save_to_csv_messages(message, "Broadcast to agents:", len(agents))
+        if cls.profiler is None:
+            return {agent.id: agent.receive_message(message) for agent in agents}
+        start = time.perf_counter()
+        responses = {agent.id: agent.receive_message(message) for agent in agents}
+        cls.profiler.record_message(message.type, time.perf_counter() - start, len(agents))
+        return responses
 
     def get_all_agent_ids(cls):
         return cls.agents
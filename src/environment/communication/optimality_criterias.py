@@ -1,6 +1,13 @@
 import inspect
+from typing import Dict
 
+import numpy as np
+
+from src.agents.path_algorithms.flow_field import UNREACHABLE
 from src.environment.communication.communication_layer import MSG_PICKUP_REQUEST, CommunicationLayer, Message
+from src.environment.density_map import DENSITY_WEIGHTING_UNIFORM
+from src.environment.entity_index import ENTITY_AGENT
+from src.utils.assignment import linear_sum_assignment
 from src.utils.position import Position
 
 
@@ -20,43 +27,29 @@ def naive(initiating_agent_id:str, target_package_id:str, target_package_pos:Pos
 
 
 def closer_to_package(grid, initiating_agent_id:str, target_package_id:str, target_package_pos:Position):
-    agents_distances = []
-    for i in range(len(grid._grid)):
-        for j in range(len(grid._grid[0])):
-            cell = grid._grid[i][j]
-            for elem in cell:
-                if 'agent' in elem.__class__.__name__.lower() and elem.id != initiating_agent_id:
-                    agents_distances.append((elem.id, elem.pos.dist_to(target_package_pos)))
-    
-    agents_distances.sort(key=lambda x: x[1])
-
-    for agent_id, _ in agents_distances:
-        if agent_id != initiating_agent_id:
-            message = Message(MSG_PICKUP_REQUEST, "broker", agent_id, {
+    # Agents are asked by increasing path distance to the package, and only found as far as needed until one accepts
+    path_distance = lambda pos: grid.distance_table.distance(pos, target_package_pos)
+    for agent, _ in grid.entities.nearest_agents(target_package_pos, path_distance):
+        if agent.id != initiating_agent_id:
+            message = Message(MSG_PICKUP_REQUEST, "broker", agent.id, {
                 "pos": target_package_pos, 
                 "package_id": target_package_id,
             }
             )
-            response = CommunicationLayer.send_to_agent(agent_id, message)
+            response = CommunicationLayer.send_to_agent(agent.id, message)
             if response is not None and response.value["response"] == "yes":
-                return agent_id
+                return agent.id
 
 
-def loneliest(grid, initiating_agent_id:str, target_package_id:str, target_package_pos:Position, n_cells_around:int=4):
+def loneliest(grid, initiating_agent_id:str, target_package_id:str, target_package_pos:Position, n_cells_around:int=4, weighting:str=DENSITY_WEIGHTING_UNIFORM):
     agents_loneliness = []
-    for i in range(len(grid._grid)):
-        for j in range(len(grid._grid[0])):
-            cell = grid._grid[i][j]
-            for elem in cell:
-                if 'agent' in elem.__class__.__name__.lower() and elem.id != initiating_agent_id:
-                    curr_id = elem.id
-                    agents_around = 0
-                    for sub_i in range(max(0, i - n_cells_around), min(len(grid._grid), i + n_cells_around + 1)):
-                        for sub_j in range(max(0, j - n_cells_around), min(len(grid._grid[0]), j + n_cells_around + 1)):
-                            for sub_elem in grid._grid[sub_i][sub_j]:
-                                if 'agent' in sub_elem.__class__.__name__.lower() and sub_elem.id != curr_id:
-                                    agents_around += 1
-                    agents_loneliness.append((curr_id, agents_around))
+    agents, positions = grid.entities.of_type(ENTITY_AGENT)
+    if agents:
+        # Other agents in the square of n_cells_around cells around each agent, from the density map, which follows the agents as they move
+        agents_around = grid.density_map.density(positions, n_cells_around, weighting)
+        for agent, n_agents_around in zip(agents, agents_around):
+            if agent.id != initiating_agent_id:
+                agents_loneliness.append((agent.id, n_agents_around))
 
     agents_loneliness.sort(key=lambda x: x[1])
                     
@@ -70,3 +63,38 @@ def loneliest(grid, initiating_agent_id:str, target_package_id:str, target_packa
             response = CommunicationLayer.send_to_agent(agent_id, message)
             if response is not None and response.value["response"] == "yes":
                 return agent_id
+
+
+def batched(grid, waiting_packages_pos:Dict[str, Position]) -> Dict[str, str]:
+    """ Assigns all the waiting packages at once, to the agents that are free right now.
+
+    The assignment minimizes the total path distance from the agents to the packages (Hungarian algorithm),
+    and only the chosen agent of each package receives a pickup request.
+
+    Args:
+        grid (EnvironmentGrid): The grid of the environment.
+        waiting_packages_pos (Dict[str, Position]): Position of each waiting package, by package ID.
+
+    Returns:
+        Dict[str, str]: ID of the agent that accepted each package, for the packages that got one.
+    """
+    available_agents = [agent for agent in grid.entities.of_type(ENTITY_AGENT)[0] if agent.is_available()]
+    if not available_agents or not waiting_packages_pos:
+        return {}
+    packages_ids = list(waiting_packages_pos)
+    costs = np.array([[grid.distance_table.distance(agent.pos, waiting_packages_pos[package_id]) for agent in available_agents] for package_id in packages_ids])
+
+    accepted = {}
+    for row, column in zip(*linear_sum_assignment(costs)):
+        if costs[row, column] == UNREACHABLE:
+            continue
+        agent_id = available_agents[column].id
+        message = Message(MSG_PICKUP_REQUEST, "broker", agent_id, {
+            "pos": waiting_packages_pos[packages_ids[row]], 
+            "package_id": packages_ids[row],
+        }
+        )
+        response = CommunicationLayer.send_to_agent(agent_id, message)
+        if response is not None and response.value["response"] == "yes":
+            accepted[packages_ids[row]] = agent_id
+    return accepted
@@ -1,23 +1,34 @@
+import logging
 from typing import List
 from src.environment.communication.communication_layer import MSG_DELIVERY_ACCEPTED, MSG_DELIVERY_NOTIFY, MSG_PICKUP_REQUEST, CommunicationLayer, Message
 from src.utils.position import Position
-from src.environment.communication.optimality_criterias import naive, closer_to_package, loneliest
+from src.environment.communication.optimality_criterias import batched, naive, closer_to_package, loneliest
+
+logger = logging.getLogger(__name__)
 
 
 class Recruiter:
-    def __init__(self, recruiter_id, optimality_criteria:str='naive'):
+    def __init__(self, recruiter_id, optimality_criteria:str='naive', optimality_criteria_kwargs:dict=None):
         self.id = recruiter_id
         self.optimality_criteria = optimality_criteria
+        # Extra parameters of the 'loneliest' criteria, e.g. {'n_cells_around': 6, 'weighting': 'linear'}. The other criteria take none.
+        self.optimality_criteria_kwargs = optimality_criteria_kwargs or {}
         self.waiting_packages_id_pos = {}
+        # With the optimality criteria 'batched': agent that initiated the request of each waiting package, and the grid of the environment
+        self.waiting_packages_id_sender = {}
+        self.grid = None
         
     def step(self):
+        if self.optimality_criteria == 'batched':
+            self.assign_waiting_packages()
+            return
         for package_id, package_pos in self.waiting_packages_id_pos.copy().items():
             found_agent = self.find_delivery_agent(package_id, package_pos)
             if found_agent:
                 del self.waiting_packages_id_pos[package_id]
     
     def send_message(self,  message: Message):
-        print("Recruiter: Sending message to an agent", message.destination_id)
+        logger.debug("Recruiter: Sending message to an agent %s", message.destination_id)
         CommunicationLayer.send_to_agent(message.destination_id, message)
 
     def send_pickup_request(self, agent_id, package_id, intermediate_point):
@@ -31,8 +42,13 @@ class Recruiter:
             message (Message): The message to pass to the recruiter
         """
         
-        print(f"Recruiter received message: {message}")
-        if message.type == MSG_DELIVERY_NOTIFY:
+        logger.debug("Recruiter received message: %s", message)
+        if message.type == MSG_DELIVERY_NOTIFY and self.optimality_criteria == 'batched':
+            # The package waits to be assigned together with the rest in the next step
+            self.grid = message.value['grid']
+            self.waiting_packages_id_pos[message.value["package_id"]] = message.value["pos"]
+            self.waiting_packages_id_sender[message.value["package_id"]] = message.sender_id
+        elif message.type == MSG_DELIVERY_NOTIFY:
             self.find_delivery_agent(message.value["package_id"], message.value["pos"], sender_id=message.sender_id, new=True)            
 
 
@@ -49,15 +65,15 @@ class Recruiter:
         elif self.optimality_criteria == 'closer_to_package':
             agent_id = closer_to_package(grid, sender_id, package_id, package_pos)
         elif self.optimality_criteria == 'loneliest':
-            agent_id = loneliest(grid, sender_id, package_id, package_pos)
+            agent_id = loneliest(grid, sender_id, package_id, package_pos, **self.optimality_criteria_kwargs)
 
         if agent_id is None:
-            print(f"No agent found to pick up package {package_id}, will repeat in the next step with optimality criteria {self.optimality_criteria}.")
+            logger.debug("No agent found to pick up package %s, will repeat in the next step with optimality criteria %s.", package_id, self.optimality_criteria)
             if new:
                 self.waiting_packages_id_pos[package_id] =  package_pos
             return False
         else:
-            print(f"Agent {agent_id} accepted the pickup request according to optimality criteria {self.optimality_criteria}. Assigning task...")
+            logger.debug("Agent %s accepted the pickup request according to optimality criteria %s. Assigning task...", agent_id, self.optimality_criteria)
             # Send message back to the agent that initiated the request
             message = Message(MSG_DELIVERY_ACCEPTED, agent_id, sender_id, 
                 {
@@ -66,3 +82,22 @@ class Recruiter:
                 }
             )
             CommunicationLayer.send_to_agent(sender_id, message)
+
+
+    def assign_waiting_packages(self):
+        """Assign all the waiting packages at once to the free agents (optimality criteria 'batched'),
+        and tell the agents that initiated the requests which packages were accepted.
+        """
+        if self.grid is None:
+            return
+        for package_id, agent_id in batched(self.grid, self.waiting_packages_id_pos).items():
+            package_pos = self.waiting_packages_id_pos.pop(package_id)
+            sender_id = self.waiting_packages_id_sender.pop(package_id)
+            logger.debug("Agent %s accepted the pickup request according to optimality criteria %s. Assigning task...", agent_id, self.optimality_criteria)
+            message = Message(MSG_DELIVERY_ACCEPTED, agent_id, sender_id, 
+                {
+                    "pos": package_pos, 
+                    "package_id": package_id
+                }
+            )
+            CommunicationLayer.send_to_agent(sender_id, message)
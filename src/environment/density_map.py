@@ -0,0 +1,126 @@
+import numpy as np
+
+# How much the agents around count, depending on how far they are
+DENSITY_WEIGHTING_UNIFORM = 'uniform'  # Every agent in the square counts 1
+DENSITY_WEIGHTING_LINEAR = 'linear'  # Agents count less the further they are, down to 1 / (radius + 1) at the edge of the square
+DENSITY_WEIGHTINGS = [DENSITY_WEIGHTING_UNIFORM, DENSITY_WEIGHTING_LINEAR]
+
+
+class DensityMap:
+    """ Number of agents in each cell of the grid, with its summed-area table.
+
+    The raster is kept up to date by the grid every time an agent is placed, moved or removed, so it always matches the current positions,
+    even in the middle of the step of the agents. The table is only recomputed when the raster changed since the last query,
+    and then the number of agents in any square of the grid is found with 4 lookups, no matter how big the square is or how many entities there are in it.
+    """
+    def __init__(self, width: int, height: int) -> None:
+        """ Constructor.
+
+        Args:
+            width (int): Width of the grid.
+            height (int): Height of the grid.
+
+        Returns:
+            None
+        """
+        self.width = width
+        self.height = height
+        # raster[x, y] is the number of agents in the cell (x, y)
+        self.raster = np.zeros((width, height), dtype=np.int32)
+        # summed_area[x, y] is the number of agents in the cells [0, x) x [0, y)
+        self.summed_area = np.zeros((width + 1, height + 1), dtype=np.int64)
+        # Whether the raster changed since the summed-area table was computed
+        self.outdated = False
+
+
+    def add(self, pos) -> None:
+        """ Counts an agent placed in a cell.
+
+        Args:
+            pos (Position): The cell.
+
+        Returns:
+            None
+        """
+        x, y = pos
+        self.raster[x, y] += 1
+        self.outdated = True
+
+
+    def remove(self, pos) -> None:
+        """ Stops counting an agent that left a cell.
+
+        Args:
+            pos (Position): The cell.
+
+        Returns:
+            None
+        """
+        x, y = pos
+        self.raster[x, y] -= 1
+        self.outdated = True
+
+
+    def rebuild(self, positions: np.ndarray) -> None:
+        """ Recomputes the raster from scratch, and its summed-area table.
+
+        Args:
+            positions (np.ndarray): Positions of the agents, as rows (x, y).
+
+        Returns:
+            None
+        """
+        self.raster[:] = 0
+        np.add.at(self.raster, (positions[:, 0], positions[:, 1]), 1)
+        self.update_summed_area()
+
+
+    def update_summed_area(self) -> None:
+        """ Recomputes the summed-area table from the raster."""
+        self.summed_area[1:, 1:] = self.raster.cumsum(axis=0).cumsum(axis=1)
+        self.outdated = False
+
+
+    def count(self, positions: np.ndarray, radius: int) -> np.ndarray:
+        """ Number of agents in the square of the given radius around each position (clipped to the grid).
+
+        Args:
+            positions (np.ndarray): Centers of the squares, as rows (x, y).
+            radius (int): Number of cells around the center, in every direction.
+
+        Returns:
+            np.ndarray: The number of agents in each square, including the ones in the center.
+        """
+        if self.outdated:
+            self.update_summed_area()
+        min_x = np.clip(positions[:, 0] - radius, 0, self.width)
+        max_x = np.clip(positions[:, 0] + radius + 1, 0, self.width)
+        min_y = np.clip(positions[:, 1] - radius, 0, self.height)
+        max_y = np.clip(positions[:, 1] + radius + 1, 0, self.height)
+        summed_area = self.summed_area
+        return summed_area[max_x, max_y] - summed_area[min_x, max_y] - summed_area[max_x, min_y] + summed_area[min_x, min_y]
+
+
+    def density(self, positions: np.ndarray, radius: int, weighting: str=DENSITY_WEIGHTING_UNIFORM) -> np.ndarray:
+        """ Weighted number of agents around each position, excluding one agent in the center (the one asking).
+        The positions must be the current positions of agents in the grid, so that each of them is counted in its own square.
+
+        Args:
+            positions (np.ndarray): Positions of the agents to measure, as rows (x, y).
+            radius (int): Number of cells around the agent, in every direction.
+            weighting (str, optional): How to weigh the agents depending on their distance. One of DENSITY_WEIGHTINGS. Defaults to DENSITY_WEIGHTING_UNIFORM.
+
+        Raises:
+            ValueError: If the weighting is not known.
+
+        Returns:
+            np.ndarray: The weighted number of other agents around each position.
+        """
+        if weighting == DENSITY_WEIGHTING_UNIFORM:
+            return self.count(positions, radius) - 1
+        elif weighting == DENSITY_WEIGHTING_LINEAR:
+            # Each ring of cells at distance k counts (radius + 1 - k) / (radius + 1), which adds up to the mean of the squares of radius 0 to radius
+            squares = sum(self.count(positions, k) for k in range(radius + 1))
+            return squares / (radius + 1) - 1
+        else:
+            raise ValueError(f"Unknown weighting: {weighting}")
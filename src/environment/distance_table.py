@@ -0,0 +1,114 @@
+from typing import Dict
+
+import numpy as np
+
+from src.agents.path_algorithms.flow_field import FlowFieldCache
+from src.utils.position import Position
+
+
+class DistanceTable:
+    """ Shortest path distances between the package points, taking the obstacles into account.
+
+    It is built from the flow fields of the package points (one BFS per point), so it is kept up to date
+    with the same incremental repairs, and queried in O(1) by the utility functions, the bidding of the agents and the broker.
+    """
+    def __init__(self, flow_fields: FlowFieldCache) -> None:
+        """ Constructor.
+
+        Args:
+            flow_fields (FlowFieldCache): The flow fields of the routing engine of the environment.
+
+        Returns:
+            None
+        """
+        self.flow_fields = flow_fields
+        # Row and column of each package point in the table
+        self.indices: Dict[tuple, int] = {}
+        # table[i, j] is the distance from package point i to package point j, or UNREACHABLE
+        self.table = np.zeros((0, 0), dtype=np.int32)
+        self.outdated = True
+
+
+    def add_point(self, pos: Position) -> None:
+        """ Registers a package point.
+
+        Args:
+            pos (Position): Where the package point is.
+
+        Returns:
+            None
+        """
+        if pos.to_tuple() not in self.indices:
+            self.indices[pos.to_tuple()] = len(self.indices)
+            self.flow_fields.add_target(pos)
+            self.outdated = True
+
+
+    def update(self, changed_cells: list) -> None:
+        """ Marks the table as outdated if some obstacles changed. It is recomputed the next time it is queried.
+
+        Args:
+            changed_cells (List[Position]): The cells whose obstacles changed in the last iteration.
+
+        Returns:
+            None
+        """
+        if changed_cells:
+            self.outdated = True
+
+
+    def refresh(self) -> None:
+        """ Recomputes the table from the flow fields, if it is outdated.
+
+        Returns:
+            None
+        """
+        if not self.outdated:
+            return
+        points = sorted(self.indices, key=self.indices.get)
+        xs = np.array([point[0] for point in points], dtype=np.intp)
+        ys = np.array([point[1] for point in points], dtype=np.intp)
+        self.table = np.empty((len(points), len(points)), dtype=np.int32)
+        for j, point in enumerate(points):
+            field = self.flow_fields.get(Position(point[0], point[1]))
+            self.table[:, j] = field.distances[xs, ys]
+        self.outdated = False
+
+
+    def distance(self, source: Position, target: Position) -> int:
+        """ Length of the shortest path between two cells, where at least one of them should be a package point.
+
+        Between package points it is read from the table, otherwise from the flow field of the package point.
+        If neither of them is a package point, the Manhattan distance is returned, as there is nothing precomputed for them.
+
+        Args:
+            source (Position): Where the path starts.
+            target (Position): Where the path ends.
+
+        Returns:
+            int: The number of steps between both cells, or UNREACHABLE if there is no path.
+        """
+        source_index = self.indices.get(source.to_tuple())
+        target_index = self.indices.get(target.to_tuple())
+        if source_index is not None and target_index is not None:
+            self.refresh()
+            return int(self.table[source_index, target_index])
+        if target_index is not None:
+            return self.flow_fields.get(target).distance(source)
+        if source_index is not None:
+            # Moves are reversible, so the distance is symmetric
+            return self.flow_fields.get(source).distance(target)
+        return source.dist_to(target)
+
+
+    def share_with(self, other: 'DistanceTable') -> None:
+        """ Reuses the distances of the table of another environment with the same package points (e.g. a replica of the same layout with another seed),
+        instead of computing them again (see FlowFieldCache.share_with).
+
+        Args:
+            other (DistanceTable): The table to copy the distances from.
+
+        Returns:
+            None
+        """
+        self.flow_fields.share_with(other.flow_fields)
@@ -0,0 +1,178 @@
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+from mesa import Agent as MesaAgent
+
+from src.environment.obstacle import ObstacleCell
+from src.environment.package import Package
+from src.environment.package_point import PackagePoint
+from src.environment.spatial_hash import SpatialHash
+from src.utils.position import Position
+
+# Types of entities that are indexed. Any other entity placed in the grid (e.g. pheromones) is ignored.
+ENTITY_AGENT = 'agent'
+ENTITY_PACKAGE = 'package'
+ENTITY_PACKAGE_POINT = 'package_point'
+ENTITY_OBSTACLE_CELL = 'obstacle_cell'
+ENTITY_TYPES = [ENTITY_AGENT, ENTITY_PACKAGE, ENTITY_PACKAGE_POINT, ENTITY_OBSTACLE_CELL]
+
+
+def get_entity_type(entity) -> Union[str, None]:
+    """ Type of an entity in the index.
+
+    Args:
+        entity (object): An entity placed in the grid.
+
+    Returns:
+        Union[str, None]: One of ENTITY_TYPES, or None if the entity is not indexed.
+    """
+    # All the agents of the project (and only them) extend the Agent of mesa
+    if isinstance(entity, MesaAgent):
+        return ENTITY_AGENT
+    elif isinstance(entity, Package):
+        return ENTITY_PACKAGE
+    elif isinstance(entity, PackagePoint):
+        return ENTITY_PACKAGE_POINT
+    elif isinstance(entity, ObstacleCell):
+        return ENTITY_OBSTACLE_CELL
+    return None
+
+
+class EntityIndex:
+    """ Entities placed in the grid, grouped by type, kept up to date by the grid itself.
+
+    For each type, the entities and their positions are stored densely (position i of the array belongs to entity i of the list),
+    so finding all the agents costs O(agents) instead of a scan of every cell of the grid, and the positions can be used in vectorized code.
+    Entities are also found by their ID, except the obstacle cells, which share the ID of their obstacle.
+    The agents are also bucketed in a spatial hash, to find the nearest ones to a cell without going through all of them.
+    """
+    def __init__(self) -> None:
+        """ Constructor.
+
+        Returns:
+            None
+        """
+        self.by_id: Dict[str, object] = {}
+        self.entities: Dict[str, List[object]] = {entity_type: [] for entity_type in ENTITY_TYPES}
+        # Positions as rows (x, y). The arrays grow by doubling, only the first len(entities[entity_type]) rows are valid.
+        self._positions: Dict[str, np.ndarray] = {entity_type: np.zeros((8, 2), dtype=np.int32) for entity_type in ENTITY_TYPES}
+        # Row of each entity in its type, keyed by the entity itself (by identity), as IDs are not always unique
+        self._rows: Dict[object, int] = {}
+        self.agent_hash = SpatialHash()
+
+
+    def add(self, entity, pos) -> None:
+        """ Registers an entity placed in the grid, or updates its position if it was already registered.
+
+        Args:
+            entity (object): The entity.
+            pos (Position): Where it has been placed.
+
+        Returns:
+            None
+        """
+        entity_type = get_entity_type(entity)
+        if entity_type is None:
+            return
+        if entity in self._rows:
+            self.move(entity, pos)
+            return
+        entities = self.entities[entity_type]
+        positions = self._positions[entity_type]
+        if len(entities) == len(positions):
+            positions = np.concatenate([positions, np.zeros_like(positions)])
+            self._positions[entity_type] = positions
+        x, y = pos
+        positions[len(entities)] = (x, y)
+        self._rows[entity] = len(entities)
+        entities.append(entity)
+        if entity_type != ENTITY_OBSTACLE_CELL:
+            self.by_id[entity.id] = entity
+        if entity_type == ENTITY_AGENT:
+            self.agent_hash.add(entity, pos)
+
+
+    def move(self, entity, pos) -> None:
+        """ Updates the position of a registered entity.
+
+        Args:
+            entity (object): The entity.
+            pos (Position): Where it has moved to.
+
+        Returns:
+            None
+        """
+        row = self._rows.get(entity)
+        if row is not None:
+            x, y = pos
+            entity_type = get_entity_type(entity)
+            self._positions[entity_type][row] = (x, y)
+            if entity_type == ENTITY_AGENT:
+                self.agent_hash.add(entity, pos)
+
+
+    def remove(self, entity) -> None:
+        """ Unregisters an entity removed from the grid. The last entity of its type takes its row, so that the arrays stay dense.
+
+        Args:
+            entity (object): The entity.
+
+        Returns:
+            None
+        """
+        row = self._rows.pop(entity, None)
+        if row is None:
+            return
+        entity_type = get_entity_type(entity)
+        entities = self.entities[entity_type]
+        positions = self._positions[entity_type]
+        last = len(entities) - 1
+        if row != last:
+            entities[row] = entities[last]
+            positions[row] = positions[last]
+            self._rows[entities[row]] = row
+        entities.pop()
+        if entity_type == ENTITY_AGENT:
+            self.agent_hash.remove(entity)
+        if entity_type != ENTITY_OBSTACLE_CELL and self.by_id.get(entity.id) is entity:
+            del self.by_id[entity.id]
+
+
+    def get(self, entity_id: str) -> Union[object, None]:
+        """ The entity with the given ID, if it is in the grid.
+
+        Args:
+            entity_id (str): The ID.
+
+        Returns:
+            Union[object, None]: The entity, or None.
+        """
+        return self.by_id.get(entity_id)
+
+
+    def of_type(self, entity_type: str) -> Tuple[List[object], np.ndarray]:
+        """ All the entities of a type in the grid, with their positions.
+
+        Args:
+            entity_type (str): One of ENTITY_TYPES.
+
+        Returns:
+            Tuple[List[object], np.ndarray]: The entities, and their positions as an array of rows (x, y) in the same order.
+                The array is a view that is only valid until the next change in the grid.
+        """
+        entities = self.entities[entity_type]
+        return entities, self._positions[entity_type][:len(entities)]
+
+
+    def nearest_agents(self, pos: Position, distance: Callable[[Position], int]=None) -> Iterator[Tuple[object, int]]:
+        """ The agents by increasing distance to a cell, computed lazily (see SpatialHash.nearest).
+
+        Args:
+            pos (Position): The cell to measure from.
+            distance (Callable[[Position], int], optional): Distance from the cell to the position of an agent, never lower than the Manhattan distance.
+                Defaults to the Manhattan distance.
+
+        Yields:
+            Iterator[Tuple[object, int]]: Each agent, with its distance.
+        """
+        return self.agent_hash.nearest(pos, distance)
@@ -3,7 +3,6 @@ import math
 from typing import List, Union
 
 from mesa import Model
-from mesa.space import MultiGrid
 from src.agents.strategies.waiter_cnp import WaiterCNP
 from src.environment.kitchen import KitchenInitiator
 from src.agents.strategies.waiter import Waiter
@@ -16,11 +15,17 @@ from src.agents.strategies.roaming_agent import RoamingAgent
 from src.agents.strategies.waiter import Waiter
 
 from src.environment.package import Package
+from src.environment.package_store import PackageStore
 from src.environment.package_point import PACKAGE_POINT_END, PackagePoint, PACKAGE_POINT_INTERMEDIATE, PACKAGE_POINT_START
 from src.constants.environment import MAX_PERC_PACKAGE_POINTS
 from src.utils.position import Position
 from src.utils.automatic_environment import ENV_PP_RANDOM_SQUARES, ENV_PP_UNIFORM_SQUARES, distribute_package_points_random_squares, distribute_package_points_uniform_squares
 from src.environment.obstacle import Obstacle, ObstacleCell
+from src.environment.obstacle_scheduler import ObstacleScheduler
+from src.environment.density_map import DensityMap
+from src.environment.distance_table import DistanceTable
+from src.environment.grid import EnvironmentGrid
+from src.agents.path_algorithms.routing_engine import RoutingEngine
 from src.visualization.save import Save
 
 
@@ -37,8 +42,10 @@ class Environment(Model):
                  pp_distribution_strategy:str=ENV_PP_UNIFORM_SQUARES,
                  agents_distribution_strategy:str='strategic',
                  broker_optimality_criteria:str='naive',
+                 broker_optimality_criteria_kwargs:dict=None,
                  communication_mechanism:str='broker',
-                 initiator: KitchenInitiator=None
+                 initiator: KitchenInitiator=None,
+                 shared_distance_table: DistanceTable=None
                  ) -> None:
 
         """ Constructor.
@@ -57,6 +64,10 @@ class Environment(Model):
                 - 'strategic': Agents are distributed in the intermediate package points in a strategic way, so that the agents are equally distributed among the intermediate package points,
                     and the agents are placed in the intermediate package points that are closer to the starting package point.
                 - 'random': Agents are distributed in the intermediate package points in a random way.
+            broker_optimality_criteria (str, optional): Criteria of the broker (or recruiter) to choose the agent that delivers a package. Defaults to 'naive'.
+            broker_optimality_criteria_kwargs (dict, optional): Extra parameters of 'loneliest', its radius and weighting. The other criteria take none. Defaults to None (no extra parameters).
+            shared_distance_table (DistanceTable, optional): Distance table of another environment with the same package points and obstacles (a replica with another seed),
+                whose distances are copied instead of computed again, as long as the obstacles of both environments are the same. Defaults to None.
 
         Returns:
             None
@@ -69,7 +80,20 @@ class Environment(Model):
         self.grid_height = grid_height
         self.grid_width = grid_width
         # Create self.grid with grid_height rows and grid_width columns
-        self.grid = MultiGrid(width=self.grid_width, height=self.grid_height, torus=False)
+        self.grid = EnvironmentGrid(width=self.grid_width, height=self.grid_height, torus=False)
+        # Routing engine shared by all the agents for the whole run, reachable from the grid
+        self.router = RoutingEngine(self.grid)
+        self.grid.router = self.router
+        self.distance_table = DistanceTable(self.router.flow_fields)
+        self.grid.distance_table = self.distance_table
+        # Agents per cell, updated by the grid as the agents are placed and move
+        self.density_map = DensityMap(self.grid_width, self.grid_height)
+        self.grid.density_map = self.density_map
+        # State of the packages in the grid, and record of their deliveries
+        self.package_store = PackageStore()
+        self.grid.package_store = self.package_store
+        # Set with StepProfiler.attach to time the phases of every step
+        self.profiler = None
 
         # Package points
         self.initiator = initiator
@@ -87,9 +111,12 @@ class Environment(Model):
         # Communication
         self.communication_mechanism = communication_mechanism
         self.broker_optimality_criteria = broker_optimality_criteria
+        self.broker_optimality_criteria_kwargs = broker_optimality_criteria_kwargs or {}
 
         self.current_iteration = 0
-        self.init_grid()
+        # Appearance and disappearance of the obstacles, stepped instead of every obstacle
+        self.obstacle_scheduler = ObstacleScheduler(self.obstacles, self.current_iteration)
+        self.init_grid(shared_distance_table)
         self.init_communication_layer()
         #Save.save_agent_init_state(self.agents_l)
 
@@ -100,42 +127,80 @@ class Environment(Model):
         Returns:
             None 
         """        
-        for i, agent in enumerate(self.agents_l):
-            agent.step(self.grid)
-            if len(agent.packages) > 0:
-                for package in agent.packages:
-                    # Wherever the agent goes, the package goes too.
-                    package.step(agent.pos, self.grid)
-                    
-        for package in self.starting_package_point.packages:    
-            if package.pos is None:
-                del package
-                continue
-            if not package.picked: # Only packages that weren't called in the previous loop
-                package.step(package.pos, self.grid)
-        
-        for obstacle in self.obstacles:
-            obstacle.step(self.current_iteration, self.grid)
-            
+        self.router.n_expanded_nodes = 0
+        self.package_store.current_iteration = self.current_iteration
+        if self.profiler is None:
+            for _, phase in self.step_phases():
+                phase()
+        else:
+            self.profiler.step(self)
+
+        self.current_iteration += 1
+
+
+    def step_phases(self) -> List[tuple]:
+        """ The phases of a step, in the order they run. A StepProfiler times each of them separately.
+
+        Returns:
+            List[tuple]: The name and the method of each phase.
+        """
+        return [
+            ('agents', self.step_agents),
+            ('packages', self.step_packages),
+            ('obstacles', self.step_obstacles),
+            ('package_spawn', self.step_package_spawn),
+            ('initiator', self.step_initiator),
+        ]
+
+
+    def step_agents(self) -> None:
+        for agent in self.agents_l:
+            self.step_agent(agent)
+
+
+    def step_agent(self, agent) -> None:
+        agent.step(self.grid)
+        if len(agent.packages) > 0:
+            for package in agent.packages:
+                # Wherever the agent goes, the package goes too.
+                package.step(agent.pos, self.grid)
+
+
+    def step_packages(self) -> None:
+        # Only packages that weren't aged in the previous loop, i.e. the ones not carried
+        self.package_store.age()
+
+
+    def step_obstacles(self) -> None:
+        # The cells that changed stay in obstacle_scheduler.changed_cells until the next step
+        changed_cells = self.obstacle_scheduler.step(self.current_iteration, self.grid)
+        self.router.update(changed_cells)
+        self.distance_table.update(changed_cells)
+
+
+    def step_package_spawn(self) -> None:
         self.starting_package_point.step(self.current_iteration, self.grid, self.intermediate_package_points_list, self.ending_package_points_list)
 
+
+    def step_initiator(self) -> None:
         if self.initiator:
             self.initiator.step()
-
-        self.current_iteration += 1
             
     def init_communication_layer(self) -> None:
         if self.communication_mechanism == "broker":
-            self.broker = Broker("broker", self.broker_optimality_criteria)
+            self.broker = Broker("broker", self.broker_optimality_criteria, self.broker_optimality_criteria_kwargs)
         elif self.communication_mechanism == "recruiter":
-            self.broker = Recruiter("recruiter", self.broker_optimality_criteria)
+            self.broker = Recruiter("recruiter", self.broker_optimality_criteria, self.broker_optimality_criteria_kwargs)
         else:
             raise ValueError(f"Not a valid communication mechanism: {self.communication_mechanism}")
         CommunicationLayer.init(self.agents_l, self.broker)
 
-    def init_grid(self) -> None:
+    def init_grid(self, shared_distance_table: DistanceTable=None) -> None:
         """ Initializes the grid with the static entities (Package Points, Obstacles and Packages).
         Called only once, at the beginning of the experiment.
+
+        Args:
+            shared_distance_table (DistanceTable, optional): Distance table to copy the distances from, see the constructor. Defaults to None.
         """        
         # Place static objects for the first time: package points
         # Starting package point
@@ -160,6 +225,12 @@ class Environment(Model):
                 self.grid.place_agent(pp, pp.pos)
                 self.ending_package_points_list.append(pp)
 
+        # Every agent heads for one of the package points, so each of them gets a flow field and a row in the distance table
+        for pp in [self.starting_package_point] + self.intermediate_package_points_list + self.ending_package_points_list:
+            self.distance_table.add_point(pp.pos)
+        if shared_distance_table is not None:
+            self.distance_table.share_with(shared_distance_table)
+
         # Spawn initial packages
         self.starting_package_point.step(self.current_iteration, self.grid, self.intermediate_package_points_list, self.ending_package_points_list)
 
@@ -189,8 +260,7 @@ class Environment(Model):
         self.agents_l = agents_updated
 
         # Place dynamic objects for the first time
-        for obstacle in self.obstacles:
-            obstacle.step(self.current_iteration, self.grid)
+        self.step_obstacles()
 
         self.current_iteration += 1
 
@@ -200,24 +270,16 @@ class Environment(Model):
 
         Args:
             mode (str, optional): How to create the matrix, depending on the purpose. Defaults to 'dijkstra'.
+                - 'dijkstra': The occupancy bitmap of the grid (1 if the cell is occupied by an obstacle, 0 otherwise), indexed as [x, y].
+                    It is a view, not a copy, so it must not be modified.
+                - 'visualization': A matrix of strings with a letter for each entity in the cell.
 
         Returns:
             List[List]: The grid as a matrix.
         """        
         matrix_grid = []
         if mode == 'dijkstra':
-            for i in range(self.grid_height):
-                column = []
-                for j in range(self.grid_width):
-                    if self.grid._grid[i][j]:
-                        # check if there is some instance of ObstacleCell in the cell
-                        if any(isinstance(entity, ObstacleCell) for entity in self.grid._grid[i][j]):
-                            column.append(0)
-                        else:
-                            column.append(1)
-                    else:
-                        column.append(1)
-                matrix_grid.append(column)
+            matrix_grid = self.grid.occupancy
         elif mode == 'visualization':
             for i in range(self.grid_height):
                 column = []
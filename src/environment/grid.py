@@ -0,0 +1,89 @@
+import numpy as np
+from mesa.space import MultiGrid
+
+from src.environment.entity_index import ENTITY_AGENT, EntityIndex, get_entity_type
+
+# Side of the square regions of the grid whose changes are counted together, see EnvironmentGrid.region_version
+GRID_REGION_SIZE = 8
+
+
+class EnvironmentGrid(MultiGrid):
+    """ Grid of the environment.
+
+    Besides storing the entities, it gives access to the structures that the Environment keeps for the whole run,
+    so that every entity that only receives the grid (agents, obstacles, the broker...) can use them.
+    """
+    def __init__(self, width: int, height: int, torus: bool=False) -> None:
+        """ Constructor.
+
+        Args:
+            width (int): Width of the grid (number of columns).
+            height (int): Height of the grid (number of rows).
+            torus (bool, optional): Whether the grid wraps around its edges. Defaults to False.
+
+        Returns:
+            None
+        """
+        super().__init__(width=width, height=height, torus=torus)
+        # Occupancy bitmap, indexed as [x, y] like the grid itself: 1 if the cell is occupied by an obstacle, 0 otherwise.
+        # It is updated in place by the obstacles when they appear or disappear, and read as a view by every consumer.
+        self.occupancy = np.zeros((width, height), dtype=np.uint8)
+        # Entities by type and ID, updated every time an entity is placed, moved or removed
+        self.entities = EntityIndex()
+        # Number of changes (entities placed, moved or removed) in each region of GRID_REGION_SIZE x GRID_REGION_SIZE cells
+        self.region_versions = np.zeros((-(-width // GRID_REGION_SIZE), -(-height // GRID_REGION_SIZE)), dtype=np.int64)
+        # Set by the Environment that owns the grid
+        self.router = None
+        self.distance_table = None
+        self.density_map = None
+        self.package_store = None
+
+
+    def place_agent(self, agent, pos) -> None:
+        super().place_agent(agent, pos)
+        self.entities.add(agent, pos)
+        if self.density_map is not None and get_entity_type(agent) == ENTITY_AGENT:
+            self.density_map.add(pos)
+        self._changed(pos)
+
+
+    def move_agent(self, agent, pos) -> None:
+        pos = self.torus_adj(pos)
+        self._changed(agent.pos)
+        if self.density_map is not None and get_entity_type(agent) == ENTITY_AGENT:
+            self.density_map.remove(agent.pos)
+            self.density_map.add(pos)
+        # Skip the overridden remove_agent and place_agent, the entity keeps its row in the index
+        super().remove_agent(agent)
+        super().place_agent(agent, pos)
+        self.entities.move(agent, pos)
+        self._changed(pos)
+
+
+    def remove_agent(self, agent) -> None:
+        self._changed(agent.pos)
+        if self.density_map is not None and get_entity_type(agent) == ENTITY_AGENT:
+            self.density_map.remove(agent.pos)
+        super().remove_agent(agent)
+        self.entities.remove(agent)
+
+
+    def _changed(self, pos) -> None:
+        x, y = pos
+        self.region_versions[x // GRID_REGION_SIZE, y // GRID_REGION_SIZE] += 1
+
+
+    def region_version(self, x_start: int, x_end: int, y_start: int, y_end: int) -> int:
+        """ Version of a rectangle of the grid, that changes every time an entity is placed, moved or removed in it (or near it, in the same region).
+
+        Args:
+            x_start (int): First column.
+            x_end (int): Last column, not included.
+            y_start (int): First row.
+            y_end (int): Last row, not included.
+
+        Returns:
+            int: The version. It only grows, so comparing it with a previous version tells whether the rectangle may have changed.
+        """
+        return int(self.region_versions[x_start // GRID_REGION_SIZE:(x_end - 1) // GRID_REGION_SIZE + 1,
+                                        y_start // GRID_REGION_SIZE:(y_end - 1) // GRID_REGION_SIZE + 1].sum())
@@ -1,5 +1,8 @@
+import logging
 from collections import defaultdict
-from src.environment.communication.communication_layer import MSG_BID_ACCEPT, MSG_BID_REJECT, MSG_DELIVERY_ANNOUNCE, MSG_PLACE_BID, CommunicationLayer, Message
+from src.environment.communication.communication_layer import BROADCAST_DESTINATION_ID, MSG_BID_ACCEPT, MSG_BID_REJECT, MSG_DELIVERY_ANNOUNCE, MSG_PLACE_BID, CommunicationLayer, Message
+
+logger = logging.getLogger(__name__)
 
 class KitchenInitiator:
     def __init__(self, broker_id) -> None:
@@ -25,17 +28,16 @@ class KitchenInitiator:
         self.packages[package.id] = package
 
     def announce_order(self, package):
-        print(f"KitchenInitiator: Announcing order {package}")
-        agent_ids = CommunicationLayer.get_all_agent_ids() 
-        for agent_id in agent_ids:
-            message = Message(MSG_DELIVERY_ANNOUNCE, self.id, agent_id, {"package": package})
-            response = CommunicationLayer.send_to_agent(agent_id, message)
+        logger.debug("KitchenInitiator: Announcing order %s", package)
+        message = Message(MSG_DELIVERY_ANNOUNCE, self.id, BROADCAST_DESTINATION_ID, {"package": package})
+        responses = CommunicationLayer.broadcast(message)
+        for agent_id, response in responses.items():
             if response.type == MSG_PLACE_BID:
                 if response.value["response"] == "yes":
                     self.current_bids[package.id][agent_id] = response.value["bid"]
-                    print(f"Agent {agent_id} accepted the bid with bid {response.value['bid']}.")
+                    logger.debug("Agent %s accepted the bid with bid %s.", agent_id, response.value['bid'])
                 else:
-                    print(f"Agent {agent_id} rejected the bid.")
+                    logger.debug("Agent %s rejected the bid.", agent_id)
     
     def send_bid_response(self, package):
         best_agent = self.choose_agent(package)
@@ -43,22 +45,19 @@ class KitchenInitiator:
             message = Message(MSG_BID_ACCEPT, self.id, best_agent, {"package": package})
             CommunicationLayer.send_to_agent(best_agent, message)
             
-            agent_ids = CommunicationLayer.get_all_agent_ids() 
-            for agent_id in agent_ids:
-                if agent_id != best_agent:
-                    message = Message(MSG_BID_REJECT, self.id, agent_id, {"package": package})
-                    CommunicationLayer.send_to_agent(agent_id, message)
+            message = Message(MSG_BID_REJECT, self.id, BROADCAST_DESTINATION_ID, {"package": package})
+            CommunicationLayer.broadcast(message, [agent_id for agent_id in CommunicationLayer.get_all_agent_ids() if agent_id != best_agent])
             return True
         else:
-            print(f"No agents accepted the order {package}.")
+            logger.debug("No agents accepted the order %s.", package)
             return False
             
     def choose_agent(self, package):
         for package_id, package_bids in self.current_bids.items():
             if len(package_bids) > 0:
                 best_agent = max(package_bids, key=lambda k: package_bids[k])
-                print(f"Best agent for order {package} is {best_agent} with bid {package_bids[best_agent]}.")
+                logger.debug("Best agent for order %s is %s with bid %s.", package, best_agent, package_bids[best_agent])
                 return best_agent
             else:
-                print(f"No agents accepted the order {package}.")
+                logger.debug("No agents accepted the order %s.", package)
                 return None
\ No newline at end of file
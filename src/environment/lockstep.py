@@ -0,0 +1,158 @@
+import os
+import random
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from src.environment.communication.communication_layer import CommunicationLayer
+from src.utils.automatic_environment import ENV_PP_MANUAL
+from src.visualization.save import Save
+
+# Metrics recorded for every replica after every step, by name
+LOCKSTEP_METRICS = {
+    'collected_tips': lambda environment: sum(getattr(agent, 'collected_tips', 0) for agent in environment.agents_l),
+    'table_served': lambda environment: sum(getattr(agent, 'table_served', 0) for agent in environment.agents_l),
+    'n_carried_packages': lambda environment: sum(len(agent.packages) for agent in environment.agents_l),
+    'n_generated_packages': lambda environment: len(environment.starting_package_point.packages),
+    'n_expanded_nodes': lambda environment: environment.router.n_expanded_nodes,
+}
+
+
+class LockstepRunner:
+    """ Runs several replicas of the same environment (same layout, different seeds) in lockstep, in a single process.
+
+    The replicas share what does not change between them: the package points of the first replica are placed in all of them,
+    and its shortest path distances are copied instead of computed again by each replica.
+    Optionally, they also share the obstacle schedule of the first replica, as if the obstacles of every replica were generated with the same seed.
+    The global state of the simulation (the communication layer, the random number generators and the log directory)
+    is swapped before stepping each replica, so they do not interfere with each other.
+    """
+    def __init__(self, build_environment: Callable[[dict], object], seeds: List[int], log_dirs: List[str]=None, step_broker: bool=False, metrics: Dict[str, Callable]=LOCKSTEP_METRICS, share_obstacles: bool=False) -> None:
+        """ Constructor. Builds all the replicas.
+
+        Args:
+            build_environment (Callable[[dict], Environment]): Creates a new environment, with new agents, package points and obstacles,
+                passing the given keyword arguments to the constructor of the Environment, overriding its own. They are empty for the first replica.
+                For the rest, they fix the layout to the one of the first replica and share its distances (and its obstacles, with share_obstacles).
+                It is called once per replica, after seeding the random number generators with the seed of the replica.
+            seeds (List[int]): Seed of each replica.
+            log_dirs (List[str], optional): Log directory of each replica. Defaults to a subdirectory per seed in the current log directory.
+            step_broker (bool, optional): Whether to also step the broker of each replica after the environment (for the batched broker criteria). Defaults to False.
+            metrics (Dict[str, Callable], optional): Metrics to record after every step, computed from each environment. Defaults to LOCKSTEP_METRICS.
+            share_obstacles (bool, optional): Whether every replica gets a copy of the obstacles of the first one (same positions, sizes, starting iterations and durations),
+                instead of the ones it builds with its own seed. An obstacle that cannot appear in its position still looks for another one with the random numbers of its replica.
+                Defaults to False.
+
+        Returns:
+            None
+        """
+        if log_dirs is None:
+            log_dirs = [f'{Save.log_dir}/seed{seed}' for seed in seeds]
+        if len(log_dirs) != len(seeds):
+            raise ValueError(f"There are {len(seeds)} seeds, but {len(log_dirs)} log directories")
+        self.seeds = seeds
+        self.log_dirs = log_dirs
+        self.step_broker = step_broker
+        self.metrics = metrics
+        self.closed = False
+        self.environments = []
+        # Global state of each replica while it is not being stepped
+        self.states = []
+
+        previous_log_dir = Save.log_dir
+        replica_kwargs = {}
+        for seed, log_dir in zip(seeds, log_dirs):
+            os.makedirs(log_dir, exist_ok=True)
+            Save.log_dir = log_dir
+            random.seed(seed)
+            np.random.seed(seed)
+            environment = build_environment(replica_kwargs)
+            self.environments.append(environment)
+            self.states.append(self._get_state())
+            if not replica_kwargs:
+                first = environment
+                replica_kwargs = {
+                    'intermediate_package_points': [pp.pos for pp in first.intermediate_package_points_list],
+                    'ending_package_points': [pp.pos for pp in first.ending_package_points_list],
+                    'pp_distribution_strategy': ENV_PP_MANUAL,
+                    'shared_distance_table': first.distance_table,
+                }
+            if share_obstacles:
+                # A new copy for each replica, as the obstacles change when they are stepped
+                replica_kwargs['obstacles'] = [obstacle.copy_schedule() for obstacle in first.obstacles]
+        Save.log_dir = previous_log_dir
+
+
+    def _get_state(self) -> dict:
+        return {
+            'communication_layer': CommunicationLayer.get_state(),
+            'random_state': random.getstate(),
+            'numpy_random_state': np.random.get_state(),
+            'log_dir': Save.log_dir,
+        }
+
+
+    def _set_state(self, state: dict) -> None:
+        CommunicationLayer.set_state(state['communication_layer'])
+        random.setstate(state['random_state'])
+        np.random.set_state(state['numpy_random_state'])
+        Save.log_dir = state['log_dir']
+
+
+    def step(self) -> Dict[str, np.ndarray]:
+        """ Steps every replica once.
+
+        Raises:
+            Exception: If the runner has been closed.
+
+        Returns:
+            Dict[str, np.ndarray]: The value of each metric after the step, with one element per replica.
+        """
+        if self.closed:
+            raise Exception("The lockstep runner has been closed, its replicas cannot be stepped anymore")
+        previous_log_dir = Save.log_dir
+        values = {name: np.empty(len(self.environments)) for name in self.metrics}
+        for i, environment in enumerate(self.environments):
+            self._set_state(self.states[i])
+            environment.step()
+            if self.step_broker:
+                environment.broker.step()
+            self.states[i] = self._get_state()
+            for name, metric in self.metrics.items():
+                values[name][i] = metric(environment)
+        Save.log_dir = previous_log_dir
+        return values
+
+
+    def run(self, n_steps: int, close: bool=True) -> Dict[str, np.ndarray]:
+        """ Steps every replica the given number of times.
+
+        Args:
+            n_steps (int): Number of steps.
+            close (bool, optional): Whether to close the logs of the replicas afterwards (see close). Defaults to True.
+
+        Returns:
+            Dict[str, np.ndarray]: The value of each metric after each step, with shape (n_steps, number of replicas).
+        """
+        values = {name: np.empty((n_steps, len(self.environments))) for name in self.metrics}
+        for n_step in range(n_steps):
+            step_values = self.step()
+            for name in self.metrics:
+                values[name][n_step] = step_values[name]
+        if close:
+            self.close()
+        return values
+
+
+    def close(self) -> None:
+        """ Writes what the replicas logged and is still buffered, and closes their logs (see Save.close), without closing the logs of other runs of the process.
+        Call it when the replicas are not going to be stepped anymore. Closing it again does nothing.
+
+        Returns:
+            None
+        """
+        if self.closed:
+            return
+        for log_dir in self.log_dirs:
+            Save.close(log_dir)
+        self.closed = True
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 import random
 
 from src.utils.position import Position
@@ -30,28 +30,42 @@ class Obstacle:
         self.width = width
         self.height = height
         self.iterations_left = duration
+        self.duration = duration
+        # The position may change when it appears, see _appear
+        self.initial_position = (position.x, position.y)
         self.starting_iteration = starting_iteration
         self.pos_determination = position_determination
         self.cells_with_obstacle = []
 
 
-    def step(self, current_iteration: int, grid) -> None:
+    def step(self, current_iteration: int, grid) -> List[Position]:
         """ The obstacle iterations left are updated.
 
         Args:
             current_iteration (int): The current iteration of the experiment.
         
         Returns:
-            None
+            List[Position]: The cells where the obstacle appeared or disappeared in this iteration.
         """        
+        changed_cells = []
         if self.iterations_left == 0 and not self.pos is None:
             # The object has to disappear from the grid. It has already stayed in the environment for the required iterations.
             #grid.remove_agent(self)
-            self._disappear(grid)
+            changed_cells = self._disappear(grid)
         elif current_iteration == self.starting_iteration:
             # The object has to appear in the grid now, it is the starting iteration.
-            self._appear(grid)
+            changed_cells = self._appear(grid)
         self.iterations_left -= 1
+        return changed_cells
+
+
+    def copy_schedule(self):
+        """ A new obstacle with the same schedule (initial position, size, starting iteration and duration), as it was before being stepped.
+
+        Returns:
+            Obstacle: The copy.
+        """
+        return Obstacle(self.id, Position(*self.initial_position), self.width, self.height, self.starting_iteration, self.duration, self.pos_determination)
 
 
     def _is_position_valid(self, grid: list, x: int, y: int) -> bool:
@@ -79,6 +93,11 @@ class Obstacle:
         return [ObstacleCell(id=self.id, pos=Position(self.pos.x + j, self.pos.y + i)) for i in range(self.width) for j in range(self.height)]
 
 
+    def _footprint(self) -> Tuple[slice, slice]:
+        """ The region covered by the obstacle in the occupancy bitmap of the grid, indexed as [x, y]."""
+        return slice(self.pos.x, self.pos.x + self.height), slice(self.pos.y, self.pos.y + self.width)
+
+
     def _appear(self, grid: list) -> List[Position]:
         """ Determines the position of the obstacle in the environment.
 
@@ -89,7 +108,7 @@ class Obstacle:
             Exception: If no valid position exists for the obstacle in the environment.
 
         Returns:
-            Position: The position of the obstacle in the environment.
+            List[Position]: The cells occupied by the obstacle in the environment.
         """        
         if not self._is_position_valid(grid, self.pos.x, self.pos.y):
             if self.pos_determination == 'random':
@@ -126,21 +145,30 @@ class Obstacle:
         
         for cell in self.cells_with_obstacle:
             grid.place_agent(cell, cell.pos)
+        if self.cells_with_obstacle:
+            grid.occupancy[self._footprint()] = 1
+
+        return [cell.pos for cell in self.cells_with_obstacle]
 
 
-    def _disappear(self, grid):
+    def _disappear(self, grid) -> List[Position]:
         """ Removes the obstacle from the environment.
 
         Args:
             grid (list): The current state of the environment.
 
         Returns:
-            None
+            List[Position]: The cells released by the obstacle.
         """        
         
-        for cell in self.cells_with_obstacle:
-            obstacle_cell = [obs for obs in grid._grid[cell.pos.x][cell.pos.y] if isinstance(obs, ObstacleCell)][0]
+        released_cells = [cell.pos for cell in self.cells_with_obstacle]
+        for cell in released_cells:
+            obstacle_cell = [obs for obs in grid._grid[cell.x][cell.y] if isinstance(obs, ObstacleCell)][0]
             grid.remove_agent(obstacle_cell)
+        if released_cells:
+            grid.occupancy[self._footprint()] = 0
+
+        return released_cells
 
 
 class ObstacleCell:
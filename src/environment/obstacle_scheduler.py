@@ -0,0 +1,90 @@
+import heapq
+from typing import List
+
+from src.environment.obstacle import Obstacle
+from src.utils.position import Position
+
+# Events of an obstacle. Both act at most once.
+OBSTACLE_EVENT_APPEAR = 'appear'
+OBSTACLE_EVENT_DISAPPEAR = 'disappear'
+
+
+class ObstacleScheduler:
+    """ Makes the obstacles appear and disappear at the right iterations, without stepping every obstacle every iteration.
+
+    The iteration of the next event of each obstacle is known when it is scheduled, so the events are kept in a heap,
+    and a step only pops the events of the current iteration: its cost depends on the number of events, not on the number of obstacles.
+    The events are the ones Obstacle.step would act on, in the same order (the obstacles of an iteration act in the order they were scheduled),
+    so the obstacles end up in the same cells as if they were stepped:
+    - An obstacle disappears duration iterations after it is scheduled, no matter when it appeared (its iterations_left count from the start).
+    - It appears at its starting_iteration, unless it disappears in the same iteration (then it never appears) or the iteration has already passed.
+    The iterations_left of an obstacle is only brought up to date when one of its events fires.
+    """
+    def __init__(self, obstacles: List[Obstacle]=None, current_iteration: int=0) -> None:
+        """ Constructor.
+
+        Args:
+            obstacles (List[Obstacle], optional): The obstacles to schedule, in the order they act. Defaults to None (no obstacles yet, see add).
+            current_iteration (int, optional): First iteration that will be stepped. Defaults to 0.
+
+        Returns:
+            None
+        """
+        # Events as (iteration, order of the obstacle, event type, obstacle, iterations_left of the obstacle after the event)
+        self.events = []
+        self.n_scheduled = 0
+        # Cells where an obstacle appeared or disappeared in the last step, for the consumers that have to invalidate what they cached about them
+        self.changed_cells: List[Position] = []
+        for obstacle in obstacles or []:
+            self.add(obstacle, current_iteration)
+
+
+    def add(self, obstacle: Obstacle, current_iteration: int) -> None:
+        """ Schedules the events of an obstacle, as if it were stepped from current_iteration onwards.
+
+        Args:
+            obstacle (Obstacle): The obstacle.
+            current_iteration (int): Next iteration that will be stepped.
+
+        Returns:
+            None
+        """
+        order = self.n_scheduled
+        self.n_scheduled += 1
+        # Obstacle.step decreases iterations_left every iteration, and the obstacle disappears when it gets to 0
+        disappearing_iteration = current_iteration + obstacle.iterations_left if obstacle.iterations_left >= 0 else None
+        events = []
+        if disappearing_iteration is not None:
+            events.append((disappearing_iteration, OBSTACLE_EVENT_DISAPPEAR))
+        if obstacle.starting_iteration >= current_iteration and obstacle.starting_iteration != disappearing_iteration:
+            events.append((obstacle.starting_iteration, OBSTACLE_EVENT_APPEAR))
+        for iteration, event_type in events:
+            iterations_left = obstacle.iterations_left - (iteration - current_iteration) - 1
+            heapq.heappush(self.events, (iteration, order, event_type, obstacle, iterations_left))
+
+
+    def step(self, current_iteration: int, grid) -> List[Position]:
+        """ Fires the events of the iteration.
+
+        Args:
+            current_iteration (int): The current iteration of the experiment.
+            grid (EnvironmentGrid): The grid of the environment.
+
+        Returns:
+            List[Position]: The cells where an obstacle appeared or disappeared in this iteration (also kept in changed_cells).
+        """
+        changed_cells = []
+        while self.events and self.events[0][0] <= current_iteration:
+            _, _, event_type, obstacle, iterations_left = heapq.heappop(self.events)
+            if event_type == OBSTACLE_EVENT_DISAPPEAR:
+                if obstacle.pos is not None:
+                    changed_cells += obstacle._disappear(grid)
+            else:
+                changed_cells += obstacle._appear(grid)
+            obstacle.iterations_left = iterations_left
+        self.changed_cells = changed_cells
+        return changed_cells
+
+
+    def __len__(self) -> int:
+        return len(self.events)
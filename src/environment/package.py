@@ -1,3 +1,6 @@
+from copy import deepcopy
+
+from src.environment.package_store import PACKAGE_CARRIED, PACKAGE_WAITING
 from src.utils.position import Position
 
 class Package:
@@ -19,11 +22,83 @@ class Package:
         self.destination = destination
         self.destination_pp = destination_pp
         self.max_iterations_to_deliver = max_iterations_to_deliver
-        self.iterations = 0
-        self.is_delayed = False
-        self.picked = False
         self.intermediate_point_pos = intermediate_point
-    
+        # Set by the PackageStore while the package is in it, its state is then kept in its row (see the properties below)
+        self.store = None
+        self.row = None
+        self._iterations = 0
+        self._picked = False
+        self._carrier_id = None
+
+
+    @property
+    def iterations(self) -> int:
+        """ Number of iterations the package has been waiting to be delivered."""
+        if self.store is None:
+            return self._iterations
+        return int(self.store.iterations[self.row])
+
+
+    @iterations.setter
+    def iterations(self, iterations: int) -> None:
+        if self.store is None:
+            self._iterations = iterations
+        else:
+            self.store.iterations[self.row] = iterations
+
+
+    @property
+    def is_delayed(self) -> bool:
+        return self.iterations >= self.max_iterations_to_deliver
+
+
+    @property
+    def picked(self) -> bool:
+        """ Whether an agent is carrying the package."""
+        if self.store is None:
+            return self._picked
+        return bool(self.store.states[self.row] == PACKAGE_CARRIED)
+
+
+    @picked.setter
+    def picked(self, picked: bool) -> None:
+        if not picked:
+            self.carrier_id = None
+        if self.store is None:
+            self._picked = picked
+        else:
+            self.store.states[self.row] = PACKAGE_CARRIED if picked else PACKAGE_WAITING
+
+
+    @property
+    def carrier_id(self) -> str:
+        """ ID of the agent carrying the package, None if it is not carried."""
+        if self.store is None:
+            return self._carrier_id
+        return self.store.carriers[self.row]
+
+
+    @carrier_id.setter
+    def carrier_id(self, carrier_id: str) -> None:
+        if self.store is None:
+            self._carrier_id = carrier_id
+        else:
+            self.store.carriers[self.row] = carrier_id
+
+
+    def __deepcopy__(self, memo: dict) -> 'Package':
+        """ Copy of the package with its current state, independent of the original one (e.g. in the schedules planned by WaiterCNP).
+        The copy is not backed by the store, so the store and the rest of the packages in it are not copied.
+        """
+        copy = Package.__new__(Package)
+        memo[id(self)] = copy
+        for name, value in self.__dict__.items():
+            if name not in ['store', 'row']:
+                setattr(copy, name, deepcopy(value, memo))
+        copy.store, copy.row = None, None
+        copy._iterations, copy._picked, copy._carrier_id = self.iterations, self.picked, self.carrier_id
+        return copy
+
 
     def step(self, new_position: Position, grid) -> None:
         """ The package position and internal state are updated.
@@ -36,9 +111,8 @@ class Package:
         """        
         # grid.move_agent(self, new_position)
         self.iterations += 1
-        if self.iterations >= self.max_iterations_to_deliver:
-            self.is_delayed = True
-        
+
+
     def __str__(self) -> str:
         line = f"Package {self.id} at {self.pos} to {self.destination}"
         if self.intermediate_point_pos != None:
@@ -1,3 +1,4 @@
+import logging
 from typing import List, Union
 import random
 from src.environment.kitchen import KitchenInitiator
@@ -6,6 +7,8 @@ from src.utils.position import Position
 from src.environment.package import Package
 from src.visualization.save import Save
 
+logger = logging.getLogger(__name__)
+
 PACKAGE_POINT_START = 'pp-start'
 PACKAGE_POINT_INTERMEDIATE = 'pp-intermediate'
 PACKAGE_POINT_END = 'pp-end'
@@ -50,14 +53,16 @@ class PackagePoint:
             package = Package(f'p_it{current_iteration}_{i}', self.pos, destination.pos, max_iterations_to_deliver, destination_pp=destination)
             if self.assign_intermediate:
                 # find intermediate point, that is the nearest to the destination
-                intermediate_point = min(intermediate_package_points, key=lambda pp: pp.pos.dist_to(destination.pos))
+                intermediate_point = min(intermediate_package_points, key=lambda pp: grid.distance_table.distance(pp.pos, destination.pos))
                 package.intermediate_point_pos = intermediate_point.pos
                 
             grid.place_agent(package, package.pos)
+            if grid.package_store is not None:
+                grid.package_store.add(package, current_iteration)
             self.packages.append(package)
             
             if self.announcer:
                 self.announcer.add_package(package)
                 
-            print(f'Generated package with id {package.id} at position {package.pos.x}, {package.pos.y}')
+            logger.debug('Generated package with id %s at position %d, %d', package.id, package.pos.x, package.pos.y)
             Save.save_to_csv_package(package, False)
@@ -0,0 +1,160 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# State of a package in the store
+PACKAGE_WAITING = 0  # In a package point (the starting one or an intermediate one), waiting to be picked
+PACKAGE_CARRIED = 1  # Carried by an agent
+PACKAGE_DELIVERED = 2  # Delivered to its ending package point, only in the archive
+PACKAGE_STATES = [PACKAGE_WAITING, PACKAGE_CARRIED, PACKAGE_DELIVERED]
+# Number of rows the columns start with, they grow by doubling
+PACKAGE_STORE_INITIAL_CAPACITY = 64
+
+
+class PackageStore:
+    """ State of the packages of an environment, as columns of arrays: one row per package in the grid.
+
+    The rows are dense (row i of every column belongs to package i of packages), so aging every waiting package is a single vectorized operation,
+    instead of a Python loop over the Package objects.
+    Every delivery to an ending package point is also recorded in the archive, with the state of the package at that moment.
+    The Package objects read and write their state (iterations, picked, carrier) through their row while they are in the store.
+    """
+    def __init__(self) -> None:
+        """ Constructor.
+
+        Returns:
+            None
+        """
+        self.packages: List[object] = []
+        capacity = PACKAGE_STORE_INITIAL_CAPACITY
+        # Only the first len(packages) rows of every column are valid
+        self.ids = np.empty(capacity, dtype=object)
+        self.positions = np.zeros((capacity, 2), dtype=np.int32)
+        self.destinations = np.zeros(capacity, dtype=np.int32)  # Index in destination_positions
+        self.spawn_iterations = np.zeros(capacity, dtype=np.int64)
+        self.deadlines = np.zeros(capacity, dtype=np.int64)  # Iteration from which the package is delayed, if it keeps aging every step
+        self.iterations = np.zeros(capacity, dtype=np.int64)  # Number of times the package has aged
+        self.max_iterations = np.zeros(capacity, dtype=np.int64)
+        self.states = np.zeros(capacity, dtype=np.int8)
+        self.carriers = np.empty(capacity, dtype=object)  # ID of the agent carrying the package, None if it is not carried
+        # Positions of the destinations, indexed by the destinations column
+        self.destination_positions: List[Tuple[int, int]] = []
+        self._destination_indices: Dict[Tuple[int, int], int] = {}
+        # Deliveries, one dict per delivery with the values of the columns of the package when it was delivered
+        self.archive: List[dict] = []
+        # Set by the Environment at the start of every step, to know when the packages are delivered
+        self.current_iteration = 0
+
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+
+    def add(self, package, current_iteration: int) -> None:
+        """ Adds a new package, waiting in the package point it has been generated in.
+
+        Args:
+            package (Package): The package. Its state is moved to the store.
+            current_iteration (int): Iteration in which it has been generated.
+
+        Returns:
+            None
+        """
+        row = len(self.packages)
+        if row == len(self.ids):
+            self._grow()
+        destination = tuple(package.destination)
+        if destination not in self._destination_indices:
+            self._destination_indices[destination] = len(self.destination_positions)
+            self.destination_positions.append(destination)
+        self.ids[row] = package.id
+        self.positions[row] = tuple(package.pos)
+        self.destinations[row] = self._destination_indices[destination]
+        self.spawn_iterations[row] = current_iteration
+        self.deadlines[row] = current_iteration + package.max_iterations_to_deliver - package.iterations
+        self.iterations[row] = package.iterations
+        self.max_iterations[row] = package.max_iterations_to_deliver
+        self.states[row] = PACKAGE_CARRIED if package.picked else PACKAGE_WAITING
+        self.carriers[row] = package.carrier_id
+        self.packages.append(package)
+        package.store, package.row = self, row
+
+
+    def _grow(self) -> None:
+        for column in ['ids', 'positions', 'destinations', 'spawn_iterations', 'deadlines', 'iterations', 'max_iterations', 'states', 'carriers']:
+            values = getattr(self, column)
+            grown = np.empty((2 * len(values),) + values.shape[1:], dtype=values.dtype)
+            grown[:len(values)] = values
+            setattr(self, column, grown)
+
+
+    def age(self) -> None:
+        """ Ages every package that is waiting in a package point by one iteration.
+        The carried packages are aged by the Environment with their carrier (see Package.step), as they move with it.
+
+        Returns:
+            None
+        """
+        n = len(self.packages)
+        self.iterations[:n][self.states[:n] == PACKAGE_WAITING] += 1
+
+
+    def record_delivery(self, package) -> None:
+        """ Adds a delivered package to the archive, with the values of its columns when it was delivered.
+        Call it before the package is released by its carrier, so that the carrier is recorded.
+
+        The package is not removed from the grid when it is delivered (see Agent.deliver_package), so its row stays in the store,
+        and it is aged and can be picked again as any other waiting package.
+
+        Args:
+            package (Package): A package in the store.
+
+        Returns:
+            None
+        """
+        row = package.row
+        iterations = int(self.iterations[row])
+        self.archive.append({
+            'id': self.ids[row],
+            'x': int(self.positions[row, 0]),
+            'y': int(self.positions[row, 1]),
+            'destination': self.destination_positions[self.destinations[row]],
+            'spawn_iteration': int(self.spawn_iterations[row]),
+            'deadline': int(self.deadlines[row]),
+            'delivery_iteration': self.current_iteration,
+            'iterations': iterations,
+            'is_delayed': bool(iterations >= self.max_iterations[row]),
+            'state': PACKAGE_DELIVERED,
+            'carrier_id': self.carriers[row],
+        })
+
+
+    def live(self) -> pd.DataFrame:
+        """ The packages in the grid.
+
+        Returns:
+            pd.DataFrame: One row per package, with its columns.
+        """
+        n = len(self.packages)
+        return pd.DataFrame({
+            'id': self.ids[:n],
+            'x': self.positions[:n, 0],
+            'y': self.positions[:n, 1],
+            'destination': [self.destination_positions[destination] for destination in self.destinations[:n]],
+            'spawn_iteration': self.spawn_iterations[:n],
+            'deadline': self.deadlines[:n],
+            'iterations': self.iterations[:n],
+            'is_delayed': self.iterations[:n] >= self.max_iterations[:n],
+            'state': self.states[:n],
+            'carrier_id': self.carriers[:n],
+        })
+
+
+    def archived(self) -> pd.DataFrame:
+        """ The deliveries so far.
+
+        Returns:
+            pd.DataFrame: One row per delivery, in the order they happened, with the columns of the package when it was delivered.
+        """
+        return pd.DataFrame(self.archive, columns=['id', 'x', 'y', 'destination', 'spawn_iteration', 'deadline', 'delivery_iteration', 'iterations', 'is_delayed', 'state', 'carrier_id'])
@@ -0,0 +1,107 @@
+import heapq
+import itertools
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from src.utils.position import Position
+
+# Side of the square buckets the grid is split into
+BUCKET_SIZE = 8
+
+
+class SpatialHash:
+    """ Positions of a set of entities (the agents) bucketed in squares of the grid, for nearest neighbour queries.
+
+    It is kept up to date by the grid, every time one of the entities is placed, moved or removed.
+    """
+    def __init__(self, bucket_size: int=BUCKET_SIZE) -> None:
+        """ Constructor.
+
+        Args:
+            bucket_size (int, optional): Side of the buckets. Defaults to BUCKET_SIZE.
+
+        Returns:
+            None
+        """
+        self.bucket_size = bucket_size
+        self.buckets: Dict[Tuple[int, int], List[object]] = {}
+        # Bucket of each entity, keyed by the entity itself
+        self.bucket_of: Dict[object, Tuple[int, int]] = {}
+
+
+    def add(self, entity, pos) -> None:
+        """ Adds an entity, or moves it if it was already in the hash.
+
+        Args:
+            entity (object): The entity.
+            pos (Position): Where it is.
+
+        Returns:
+            None
+        """
+        x, y = pos
+        bucket = (x // self.bucket_size, y // self.bucket_size)
+        previous_bucket = self.bucket_of.get(entity)
+        if previous_bucket == bucket:
+            return
+        if previous_bucket is not None:
+            self.buckets[previous_bucket].remove(entity)
+        self.buckets.setdefault(bucket, []).append(entity)
+        self.bucket_of[entity] = bucket
+
+
+    def remove(self, entity) -> None:
+        """ Removes an entity, if it is in the hash.
+
+        Args:
+            entity (object): The entity.
+
+        Returns:
+            None
+        """
+        bucket = self.bucket_of.pop(entity, None)
+        if bucket is not None:
+            self.buckets[bucket].remove(entity)
+
+
+    def nearest(self, pos: Position, distance: Callable[[Position], int]=None) -> Iterator[Tuple[object, int]]:
+        """ The entities by increasing distance to a cell, computed lazily: the caller can stop as soon as it finds what it needs,
+        and only the buckets around the cell are visited.
+
+        Buckets are visited in rings around the cell. An entity is only returned once no entity in the rings that are still
+        unvisited can be closer, which is guaranteed as long as the distance is never lower than the Manhattan distance
+        (e.g. the length of the shortest path avoiding obstacles).
+
+        Args:
+            pos (Position): The cell to measure from.
+            distance (Callable[[Position], int], optional): Distance from the cell to the position of an entity. Defaults to the Manhattan distance.
+
+        Yields:
+            Iterator[Tuple[object, int]]: Each entity, with its distance.
+        """
+        if distance is None:
+            distance = pos.dist_to
+        size = self.bucket_size
+        center_x, center_y = pos.x // size, pos.y // size
+        n_left = len(self.bucket_of)
+        counter = itertools.count()
+        candidates = []
+        ring = 0
+        while n_left > 0 or candidates:
+            if n_left > 0:
+                if ring == 0:
+                    ring_buckets = [(center_x, center_y)]
+                else:
+                    ring_buckets = [(center_x + dx, center_y + side * ring) for side in (-1, 1) for dx in range(-ring, ring + 1)]
+                    ring_buckets += [(center_x + side * ring, center_y + dy) for side in (-1, 1) for dy in range(-ring + 1, ring)]
+                for bucket in ring_buckets:
+                    for entity in self.buckets.get(bucket, []):
+                        heapq.heappush(candidates, (distance(entity.pos), next(counter), entity))
+                        n_left -= 1
+                # Every entity in the unvisited rings is at least this far away
+                lower_bound = ring * size + 1 if n_left > 0 else float('inf')
+            else:
+                lower_bound = float('inf')
+            while candidates and candidates[0][0] < lower_bound:
+                entity_distance, _, entity = heapq.heappop(candidates)
+                yield entity, entity_distance
+            ring += 1
@@ -1,4 +1,5 @@
 from datetime import datetime
+import logging
 import os
 from src.agents.strategies.chain_agent import ChainAgent
 from src.agents.agent import Agent
@@ -11,6 +12,7 @@ from src.environment.environment import Environment
 from src.agents.strategies.greedy_agent import GreedyAgent
 import random
 from src.visualization.save import Save
+from src.utils.logger import set_verbosity
 
 # Define seed for reproducibility, this will be used for the whole program
 random.seed(1)
@@ -20,6 +22,9 @@ log_dir = f"logs/{timestamp}"
 os.makedirs(log_dir, exist_ok=True)
 Save.log_dir = log_dir
 
+# Verbosity of the run: logging.INFO shows the grid at every iteration, and logging.DEBUG also every event of the agents
+logger = set_verbosity(logging.WARNING)
+
 
 
 def generate_random_strategy_allocation(total_n_agents, n_strategies_to_test):
@@ -125,18 +130,16 @@ agents = agents_configurations[0]
 
 environment = Environment(grid_height, grid_width, agents, starting_package_point, n_intermediate_package_points, n_ending_package_points, obstacles)
 
-m = environment.grid_as_matrix(mode='visualization')
-for m_i in range(len(m)):
-    print(m[m_i])
+if logger.isEnabledFor(logging.INFO):
+    m = environment.grid_as_matrix(mode='visualization')
+    logger.info('Initial grid:\n%s', '\n'.join(str(row) for row in m))
 
 for agent in agents:
     Save.save_agent_data(agent, 0, "init_agent_data.csv")
 
 for iteration in range(1, total_iterations+1):
-    print(f'Iteration {iteration}')
+    logger.info('Iteration %d', iteration)
     environment.step()
-    m = environment.grid_as_matrix(mode='visualization')
-    for i in range(len(m)):
-        print(m[i])
-    print()
-    print()
+    if logger.isEnabledFor(logging.INFO):
+        m = environment.grid_as_matrix(mode='visualization')
+        logger.info('Grid:\n%s', '\n'.join(str(row) for row in m))
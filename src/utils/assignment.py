@@ -0,0 +1,67 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+def linear_sum_assignment(cost) -> Tuple[List[int], List[int]]:
+    """ Minimum cost assignment of rows to columns (Hungarian algorithm with potentials, O(n^2 m)).
+
+    Every row is assigned to a different column if there are at least as many columns as rows, and the other way around otherwise.
+
+    Args:
+        cost (np.ndarray): Cost of assigning each row to each column, with shape (n_rows, n_columns). All the costs must be finite.
+
+    Returns:
+        Tuple[List[int], List[int]]: The assigned rows, and the column assigned to each of them.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return [], []
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n_rows, n_columns = cost.shape
+
+    # Index 0 is a dummy column, rows and columns are numbered from 1
+    row_potentials = np.zeros(n_rows + 1)
+    column_potentials = np.zeros(n_columns + 1)
+    # Row assigned to each column (0 if none), and previous column in the augmenting path
+    assigned_rows = np.zeros(n_columns + 1, dtype=np.int64)
+    previous_columns = np.zeros(n_columns + 1, dtype=np.int64)
+    for row in range(1, n_rows + 1):
+        assigned_rows[0] = row
+        column = 0
+        min_reduced_costs = np.full(n_columns + 1, np.inf)
+        used = np.zeros(n_columns + 1, dtype=bool)
+        # Grow the alternating tree until a free column is reached
+        while True:
+            used[column] = True
+            current_row = assigned_rows[column]
+            reduced_costs = cost[current_row - 1] - row_potentials[current_row] - column_potentials[1:]
+            improved = ~used[1:] & (reduced_costs < min_reduced_costs[1:])
+            min_reduced_costs[1:][improved] = reduced_costs[improved]
+            previous_columns[1:][improved] = column
+            candidates = np.where(used[1:], np.inf, min_reduced_costs[1:])
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            row_potentials[assigned_rows[used]] += delta
+            column_potentials[used] -= delta
+            min_reduced_costs[~used] -= delta
+            column = next_column
+            if assigned_rows[column] == 0:
+                break
+        # Flip the augmenting path
+        while column != 0:
+            previous_column = previous_columns[column]
+            assigned_rows[column] = assigned_rows[previous_column]
+            column = previous_column
+
+    rows, columns = [], []
+    for column in range(1, n_columns + 1):
+        if assigned_rows[column] != 0:
+            rows.append(int(assigned_rows[column]) - 1)
+            columns.append(column - 1)
+    if transposed:
+        rows, columns = columns, rows
+    order = np.argsort(rows)
+    return [rows[i] for i in order], [columns[i] for i in order]
@@ -0,0 +1,123 @@
+import os
+import pickle
+import random
+import zlib
+
+import numpy as np
+
+from src.environment.communication.communication_layer import CommunicationLayer
+from src.visualization.save import Save
+
+# Increased whenever the contents of the checkpoints change, so that old checkpoints are not restored wrongly
+CHECKPOINT_VERSION = 3
+CHECKPOINT_COMPRESSION_LEVEL = 6
+CHECKPOINT_MAGIC = b'MASCKPT'
+
+
+def save_checkpoint(environment, filename: str) -> None:
+    """ Saves the whole state of a run: the environment (grid, agents, packages, package points, obstacles, initiator, broker
+    and the caches of the routing engine), the registry of the communication layer, and the state of the random number generators.
+
+    Everything is pickled together, so the objects shared between them (e.g. the agents in the environment and in the
+    communication layer) are still shared when restored. The file is compressed with zlib, and replaced atomically.
+    The messages logged so far are flushed first, so that the logs are complete up to the checkpoint.
+    With the parquet backend of Save, the rows logged so far are only in memory until the run ends, so they are saved in the checkpoint too.
+
+    Args:
+        environment (Environment): The environment of the run.
+        filename (str): Path of the checkpoint file.
+
+    Returns:
+        None
+    """
+    Save.flush_message_log()
+    state = {
+        'version': CHECKPOINT_VERSION,
+        'environment': environment,
+        'communication_layer': CommunicationLayer.get_state(),
+        'random_state': random.getstate(),
+        'numpy_random_state': np.random.get_state(),
+        'log_dir': Save.log_dir,
+        'save_backend': Save.backend,
+        'column_buffers': Save.column_buffers,
+    }
+    data = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), CHECKPOINT_COMPRESSION_LEVEL)
+    temporary_filename = f'{filename}.tmp'
+    with open(temporary_filename, 'wb') as f:
+        f.write(CHECKPOINT_MAGIC)
+        f.write(data)
+    os.replace(temporary_filename, filename)
+
+
+def load_checkpoint(filename: str, restore_log_dir: bool=True):
+    """ Restores a run saved with save_checkpoint, so that it continues exactly as it would have without interruption.
+
+    The communication layer, the random number generators and the backend of Save are restored too, as they are global.
+    The same checkpoint can be loaded many times, e.g. to try different what-if branches from the same state.
+
+    With the parquet backend, the rows that are still in memory are written first, and the rows logged before the checkpoint are restored with the log directory,
+    so that the Parquet files written when the resumed run ends contain the whole run, as the CSV files do.
+    If the log directory is not restored, the new one only gets the rows logged after the checkpoint, as with the csv backend.
+
+    Args:
+        filename (str): Path of the checkpoint file.
+        restore_log_dir (bool, optional): Whether to keep logging in the log directory of the checkpointed run, with the rows it logged before the checkpoint. Defaults to True.
+
+    Raises:
+        Exception: If the file is not a checkpoint, or it was saved by an incompatible version.
+
+    Returns:
+        Environment: The environment, ready to continue with step().
+    """
+    with open(filename, 'rb') as f:
+        magic = f.read(len(CHECKPOINT_MAGIC))
+        if magic != CHECKPOINT_MAGIC:
+            raise Exception(f'{filename} is not a checkpoint')
+        state = pickle.loads(zlib.decompress(f.read()))
+    if state['version'] != CHECKPOINT_VERSION:
+        raise Exception(f"Checkpoint {filename} has version {state['version']}, but version {CHECKPOINT_VERSION} is expected")
+    CommunicationLayer.set_state(state['communication_layer'])
+    random.setstate(state['random_state'])
+    np.random.set_state(state['numpy_random_state'])
+    if Save.backend != state['save_backend']:
+        Save.set_backend(state['save_backend'])
+    else:
+        Save.write_column_buffers()
+    if restore_log_dir:
+        Save.log_dir = state['log_dir']
+        Save.column_buffers = state['column_buffers']
+    return state['environment']
+
+
+class Checkpointer:
+    """ Saves a checkpoint of the run every given number of iterations of the environment.
+    """
+    def __init__(self, filename: str, interval: int) -> None:
+        """ Constructor.
+
+        Args:
+            filename (str): Path of the checkpoint file, overwritten by every checkpoint.
+            interval (int): Number of iterations between checkpoints.
+
+        Returns:
+            None
+        """
+        if interval <= 0:
+            raise ValueError(f"The checkpoint interval must be positive, got {interval}")
+        self.filename = filename
+        self.interval = interval
+
+
+    def step(self, environment) -> bool:
+        """ Saves a checkpoint if the environment is at a multiple of the interval. Call it after each step of the environment.
+
+        Args:
+            environment (Environment): The environment of the run.
+
+        Returns:
+            bool: Whether a checkpoint was saved.
+        """
+        if environment.current_iteration % self.interval != 0:
+            return False
+        save_checkpoint(environment, self.filename)
+        return True
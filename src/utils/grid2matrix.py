@@ -1,19 +1,14 @@
-from typing import List
-from mesa.space import MultiGrid
+import numpy as np
 
-from src.environment.obstacle import Obstacle
 
-def convert_grid_to_matrix(grid: MultiGrid) -> List[List]:
-    matrix_grid = []
-    
-    for i in range(grid.height):
-        column = []
-        for j in range(grid.width):
-            if grid[i][j]:
-                for entity in grid[i][j]:
-                    if isinstance(entity, Obstacle):
-                        column.append(0)
-                        break
-                else:
-                    column.append(1)
-        matrix_grid.append(column)
\ No newline at end of file
+def convert_grid_to_matrix(grid) -> np.ndarray:
+    """ Matrix of the grid for the path algorithms.
+
+    Args:
+        grid (EnvironmentGrid): The grid of the environment.
+
+    Returns:
+        np.ndarray: The occupancy bitmap of the grid, indexed as [x, y]. 1 means that the cell is occupied by an obstacle, 0 that it is free.
+            It is a view of the bitmap kept by the environment, not a copy, so it must not be modified.
+    """
+    return grid.occupancy
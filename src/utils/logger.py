@@ -0,0 +1,37 @@
+import logging
+import sys
+
+# Every module of the simulation logs to a child of this logger, with logging.getLogger(__name__)
+ROOT_LOGGER_NAME = 'src'
+# Only warnings and errors are shown by default, so the events of every step (debug level) are not even formatted
+DEFAULT_VERBOSITY = logging.WARNING
+LOG_FORMAT = '%(levelname)s %(name)s: %(message)s'
+
+
+def set_verbosity(level: int=DEFAULT_VERBOSITY, filename: str=None) -> logging.Logger:
+    """ Sets how much the simulation logs in this run, and where.
+
+    The messages are formatted lazily: the arguments of a message below the level are never turned into strings.
+
+    Args:
+        level (int, optional): Minimum level of the messages shown, e.g. logging.INFO to follow the iterations,
+            or logging.DEBUG to follow every event of the agents. Defaults to DEFAULT_VERBOSITY.
+        filename (str, optional): File to write the messages to, instead of the standard output. Defaults to None.
+
+    Returns:
+        logging.Logger: The root logger of the simulation.
+    """
+    logger = logging.getLogger(ROOT_LOGGER_NAME)
+    logger.setLevel(level)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    handler = logging.FileHandler(filename) if filename is not None else logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(handler)
+    # The messages are not shown twice if the program also configures the logging module
+    logger.propagate = False
+    return logger
+
+
+logging.getLogger(ROOT_LOGGER_NAME).setLevel(DEFAULT_VERBOSITY)
@@ -0,0 +1,167 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import pandas as pd
+
+from src.environment.communication.communication_layer import CommunicationLayer
+from src.visualization.save import Save
+
+PROFILE_PHASE = 'phase'
+PROFILE_AGENT = 'agent'
+PROFILE_MESSAGE = 'message'
+PROFILE_SUMMARY_FILENAME = 'profile_summary.csv'
+PROFILE_STEPS_FILENAME = 'profile_steps.csv'
+
+
+class StepProfiler:
+    """ Measures where the time of the steps of an environment goes: wall time and number of calls of each phase of the step
+    (see Environment.step_phases), of each agent class, and of the delivery of each message type through the CommunicationLayer.
+
+    It only runs while attached. A detached environment does not check anything but whether it has a profiler,
+    so the instrumentation costs nothing in the runs that are not profiled.
+    The time of a message is inclusive: it contains the time of the messages sent while handling it, which are also counted on their own.
+    """
+    def __init__(self) -> None:
+        """ Constructor.
+
+        Returns:
+            None
+        """
+        # Total time and number of calls, by category (PROFILE_PHASE, PROFILE_AGENT or PROFILE_MESSAGE) and name
+        self.times = {PROFILE_PHASE: defaultdict(float), PROFILE_AGENT: defaultdict(float), PROFILE_MESSAGE: defaultdict(float)}
+        self.calls = {PROFILE_PHASE: defaultdict(int), PROFILE_AGENT: defaultdict(int), PROFILE_MESSAGE: defaultdict(int)}
+        # Time of each phase and number of messages in every step, one dict per step
+        self.steps = []
+
+
+    def attach(self, environment) -> None:
+        """ Starts profiling the steps of an environment, and the messages of the communication layer.
+
+        Args:
+            environment (Environment): The environment, already created (creating it resets the communication layer).
+
+        Returns:
+            None
+        """
+        environment.profiler = self
+        CommunicationLayer.profiler = self
+
+
+    def detach(self, environment) -> None:
+        environment.profiler = None
+        CommunicationLayer.profiler = None
+
+
+    def record(self, category: str, name: str, elapsed_time: float, n_calls: int=1) -> None:
+        self.times[category][name] += elapsed_time
+        self.calls[category][name] += n_calls
+        if category == PROFILE_PHASE and self.steps:
+            current_step = self.steps[-1]
+            current_step[name] = current_step.get(name, 0) + elapsed_time
+
+
+    def record_message(self, message_type: str, elapsed_time: float, n_recipients: int=1) -> None:
+        """ Records the delivery of a message, called by the communication layer.
+
+        Args:
+            message_type (str): Type of the message.
+            elapsed_time (float): Time the recipients took to handle it, in seconds.
+            n_recipients (int, optional): Number of agents it was delivered to, more than one for broadcasts. Defaults to 1.
+
+        Returns:
+            None
+        """
+        self.record(PROFILE_MESSAGE, message_type, elapsed_time, n_recipients)
+        if self.steps:
+            self.steps[-1]['n_messages'] += n_recipients
+
+
+    @contextmanager
+    def phase(self, name: str):
+        """ Times code outside the environment as one more phase of the current step, e.g. the step of the broker in the experiments:
+
+            with profiler.phase('broker'):
+                environment.broker.step()
+
+        Args:
+            name (str): Name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(PROFILE_PHASE, name, time.perf_counter() - start)
+
+
+    def step(self, environment) -> None:
+        """ Runs the phases of a step of the environment, timing them. Called by Environment.step when the profiler is attached.
+
+        Args:
+            environment (Environment): The environment.
+
+        Returns:
+            None
+        """
+        self.steps.append({'iteration': environment.current_iteration, 'n_messages': 0})
+        for name, phase in environment.step_phases():
+            start = time.perf_counter()
+            if name == 'agents':
+                # The same as the phase, but timing each agent
+                for agent in environment.agents_l:
+                    agent_start = time.perf_counter()
+                    environment.step_agent(agent)
+                    self.record(PROFILE_AGENT, type(agent).__name__, time.perf_counter() - agent_start)
+            else:
+                phase()
+            self.record(PROFILE_PHASE, name, time.perf_counter() - start)
+
+
+    def summary(self) -> pd.DataFrame:
+        """ Totals of the whole run.
+
+        Returns:
+            pd.DataFrame: One row per phase, agent class and message type, with its number of calls, total and mean time (in seconds),
+                and its share of the time of all the phases.
+        """
+        total_time = sum(self.times[PROFILE_PHASE].values())
+        rows = []
+        for category in self.times:
+            for name, elapsed_time in self.times[category].items():
+                n_calls = self.calls[category][name]
+                rows.append({
+                    'category': category,
+                    'name': name,
+                    'calls': n_calls,
+                    'total_time': elapsed_time,
+                    'mean_time': elapsed_time / n_calls if n_calls else 0,
+                    'share': elapsed_time / total_time if total_time else 0,
+                })
+        return pd.DataFrame(rows, columns=['category', 'name', 'calls', 'total_time', 'mean_time', 'share'])
+
+
+    def time_series(self) -> pd.DataFrame:
+        """ Time of each phase in every step.
+
+        Returns:
+            pd.DataFrame: One row per step, with the iteration, the time of each phase (in seconds), the total time and the number of messages delivered.
+        """
+        time_series = pd.DataFrame(self.steps).fillna(0)
+        phases = [column for column in time_series.columns if column not in ['iteration', 'n_messages']]
+        time_series['total'] = time_series[phases].sum(axis=1)
+        return time_series
+
+
+    def save(self, log_dir: str=None) -> None:
+        """ Writes the summary and the time series as CSV files (PROFILE_SUMMARY_FILENAME and PROFILE_STEPS_FILENAME).
+
+        Args:
+            log_dir (str, optional): Directory of the files. Defaults to the log directory of the run.
+
+        Returns:
+            None
+        """
+        if log_dir is None:
+            log_dir = Save.log_dir
+        self.summary().to_csv(f'{log_dir}/{PROFILE_SUMMARY_FILENAME}', index=False)
+        self.time_series().to_csv(f'{log_dir}/{PROFILE_STEPS_FILENAME}', index=False)
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+from typing import List, Union
+
+# Source code of the simulation
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Packages of SOURCE_DIR that determine the results of a simulation. The visualization (plots and logs) and the entry scripts do not.
+SIMULATION_PACKAGES = ['agents', 'constants', 'environment', 'utils']
+
+
+def code_version(extra_files: List[str]=None) -> str:
+    """ Hash of the source code of the simulation, so that the cached results are not reused after the code changes.
+
+    Args:
+        extra_files (List[str], optional): Other files the results depend on, e.g. the experiment script. Defaults to None (no other files).
+
+    Returns:
+        str: The hash of the contents of all the Python files of the SIMULATION_PACKAGES and the extra files.
+    """
+    paths = sorted(os.path.join(folder, filename) for package in SIMULATION_PACKAGES for folder, _, filenames in os.walk(os.path.join(SOURCE_DIR, package))
+                   for filename in filenames if filename.endswith('.py'))
+    digest = hashlib.sha256()
+    for path in paths + list(extra_files or []):
+        digest.update(os.path.relpath(path, SOURCE_DIR).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def configuration_key(configuration: dict, seed: int, version: str) -> str:
+    """ Key of the result of a configuration, which only depends on its contents.
+
+    Args:
+        configuration (dict): The configuration. Its values are hashed by their JSON (or string) representation.
+        seed (int): Seed of the random number generators.
+        version (str): Version of the code, see code_version.
+
+    Returns:
+        str: The key.
+    """
+    contents = json.dumps({'configuration': configuration, 'seed': seed, 'code_version': version}, sort_keys=True, default=str)
+    return hashlib.sha256(contents.encode()).hexdigest()
+
+
+class ResultCache:
+    """ Results of the configurations of the sweeps that already finished, stored as one JSON file per configuration key.
+
+    Results are written as soon as each configuration finishes, so an interrupted sweep resumes from where it stopped,
+    and adding values to the parameter space only runs the new configurations.
+    """
+    def __init__(self, cache_dir: str) -> None:
+        """ Constructor.
+
+        Args:
+            cache_dir (str): Directory of the cached results. It is created if it does not exist.
+
+        Returns:
+            None
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+
+    def get(self, key: str) -> Union[dict, None]:
+        """ The cached result of a configuration.
+
+        Args:
+            key (str): Key of the configuration, see configuration_key.
+
+        Returns:
+            Union[dict, None]: The result, or None if it is not cached.
+        """
+        try:
+            with open(self.path(key)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+
+    def put(self, key: str, result: dict) -> None:
+        """ Caches the result of a configuration. The file is replaced atomically, so an interrupted write never leaves a corrupt entry.
+
+        Args:
+            key (str): Key of the configuration, see configuration_key.
+            result (dict): The result. Values that are not JSON serializable are stored as strings.
+
+        Returns:
+            None
+        """
+        temporary_path = f'{self.path(key)}.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(result, f, default=str)
+        os.replace(temporary_path, self.path(key))
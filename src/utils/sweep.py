@@ -0,0 +1,167 @@
+import hashlib
+import inspect
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from src.utils.logger import DEFAULT_VERBOSITY, set_verbosity
+from src.utils.result_cache import ResultCache, code_version, configuration_key
+from src.visualization.save import Save
+
+logger = logging.getLogger(__name__)
+
+
+def parameter_grid(parameter_space: Dict[str, list]) -> List[dict]:
+    """ All the configurations of a parameter space, as the cartesian product of the values of every parameter.
+
+    Args:
+        parameter_space (Dict[str, list]): The values to try for each parameter, e.g. {'grid_side': [10, 50], 'n_chain_agents': [2, 8]}.
+
+    Returns:
+        List[dict]: One configuration per combination of values. The last parameter changes the fastest, as in nested loops.
+    """
+    names = list(parameter_space)
+    return [dict(zip(names, values)) for values in itertools.product(*(parameter_space[name] for name in names))]
+
+
+def configuration_seed(seed: int, configuration: dict) -> int:
+    """ Seed of a configuration, derived from its contents, so that it does not change when other configurations are added to the sweep.
+
+    Args:
+        seed (int): Seed of the sweep.
+        configuration (dict): The configuration.
+
+    Returns:
+        int: The seed of the configuration.
+    """
+    contents = json.dumps({'configuration': configuration, 'seed': seed}, sort_keys=True, default=str)
+    return int(hashlib.sha256(contents.encode()).hexdigest()[:8], 16)
+
+
+def configuration_name(configuration: dict) -> str:
+    """ Default name of a configuration, made of its parameters and their values.
+
+    Args:
+        configuration (dict): The configuration.
+
+    Returns:
+        str: The name.
+    """
+    return '_'.join(f'{parameter}{value}' for parameter, value in configuration.items())
+
+
+def configuration_log_dir(base_log_dir: str, configuration: dict, name_function: Callable[[dict], str]=configuration_name) -> str:
+    """ Log directory of a configuration, named after it and the time it is submitted.
+
+    Args:
+        base_log_dir (str): Directory where the log directories of all the configurations are created.
+        configuration (dict): The configuration.
+        name_function (Callable[[dict], str], optional): Name of a configuration. Defaults to configuration_name.
+
+    Returns:
+        str: The path of the log directory.
+    """
+    return f'{base_log_dir}/{name_function(configuration)}-{datetime.now()}'
+
+
+def run_configuration(run_function: Callable[[dict], dict], configuration: dict, log_dir: str, seed: int, verbosity: int) -> dict:
+    """ Runs one configuration in a worker process, isolated from the others: its own log directory, seed and log file.
+
+    Args:
+        run_function (Callable[[dict], dict]): Runs the simulation of a configuration and returns its summary metrics.
+        configuration (dict): The configuration.
+        log_dir (str): Where the configuration saves its data.
+        seed (int): Seed of the random number generators.
+        verbosity (int): Logging level of the run, written to run.log in the log directory.
+
+    Returns:
+        dict: The configuration, its log directory and seed, the time it took, and the summary metrics returned by run_function.
+            If it failed, the traceback is in 'exception' (and in exception.log in the log directory) instead of the metrics.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    Save.log_dir = log_dir
+    set_verbosity(verbosity, filename=f'{log_dir}/run.log')
+    random.seed(seed)
+    np.random.seed(seed)
+    result = {**configuration, 'log_dir': log_dir, 'seed': seed}
+    start = time.time()
+    try:
+        result.update(run_function(configuration))
+    except Exception:
+        result['exception'] = traceback.format_exc()
+        with open(f'{log_dir}/exception.log', 'w') as f:
+            f.write(f'Exception with parameters: {configuration}\n')
+            f.write(result['exception'])
+    finally:
+        Save.close()
+    result['elapsed_time'] = time.time() - start
+    return result
+
+
+def run_sweep(run_function: Callable[[dict], dict], parameter_space: Dict[str, list], base_log_dir: str='logs', seed: int=1, n_workers: int=None, verbosity: int=DEFAULT_VERBOSITY, name_function: Callable[[dict], str]=configuration_name, cache_dir: str=None) -> List[dict]:
+    """ Runs every configuration of a parameter space in parallel, each one in a separate process.
+
+    The communication layer and Save keep their state at class level, so every configuration runs in a fresh process
+    (started with spawn, and not reused for other configurations when the Python version allows it).
+
+    Args:
+        run_function (Callable[[dict], dict]): Runs the simulation of a configuration and returns its summary metrics.
+            It must be defined at the top level of a module, so that the workers can import it.
+        parameter_space (Dict[str, list]): The values to try for each parameter.
+        base_log_dir (str, optional): Directory where the log directory of each configuration is created. Defaults to 'logs'.
+        seed (int, optional): Seed of the sweep. Each configuration is run with a seed derived from it and its contents (see configuration_seed). Defaults to 1.
+        n_workers (int, optional): Maximum number of configurations running at the same time. Defaults to the number of cores.
+        verbosity (int, optional): Logging level of the runs. Defaults to DEFAULT_VERBOSITY.
+        name_function (Callable[[dict], str], optional): Name of the log directory of a configuration. Defaults to configuration_name.
+        cache_dir (str, optional): Directory of the ResultCache. The configurations already completed with the same seed and code are not run again,
+            and the others are cached as soon as they finish. The configurations that fail are not cached, so they are run again by the next sweep,
+            as the failure may not be caused by the configuration (e.g. running out of memory or disk). Defaults to None (no cache).
+
+    Returns:
+        List[dict]: The result of each configuration (see run_configuration), in the order of parameter_grid.
+    """
+    configurations = parameter_grid(parameter_space)
+    seeds = [configuration_seed(seed, configuration) for configuration in configurations]
+    results = [None] * len(configurations)
+    cache, keys = None, []
+    if cache_dir is not None:
+        cache = ResultCache(cache_dir)
+        version = code_version([inspect.getsourcefile(run_function)])
+        keys = [configuration_key(configurations[i], seeds[i], version) for i in range(len(configurations))]
+        results = [cache.get(key) for key in keys]
+    # Failed results cached by earlier versions are run again too
+    pending = [i for i, result in enumerate(results) if result is None or 'exception' in result]
+    logger.info('Running %d configurations, %d already cached', len(pending), len(configurations) - len(pending))
+    if not pending:
+        return results
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    executor_kwargs = {'max_workers': min(n_workers, len(pending)), 'mp_context': multiprocessing.get_context('spawn')}
+    if sys.version_info >= (3, 11):
+        executor_kwargs['max_tasks_per_child'] = 1
+
+    with ProcessPoolExecutor(**executor_kwargs) as executor:
+        futures = {
+            executor.submit(run_configuration, run_function, configurations[i], configuration_log_dir(base_log_dir, configurations[i], name_function), seeds[i], verbosity): i
+            for i in pending
+        }
+        for n_finished, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            results[i] = future.result()
+            if 'exception' in results[i]:
+                logger.warning('Configuration %s failed, see %s/exception.log', configurations[i], results[i]['log_dir'])
+            elif cache is not None:
+                cache.put(keys[i], results[i])
+            logger.info('Finished %d/%d configurations', n_finished, len(pending))
+    return results
@@ -0,0 +1,85 @@
+from typing import Dict, List, Tuple
+
+# Types of the columns of the output tables
+COLUMN_STRING = 'string'
+COLUMN_INT = 'int'
+COLUMN_FLOAT = 'float'
+COLUMN_BOOL = 'bool'
+COLUMN_TYPES = [COLUMN_STRING, COLUMN_INT, COLUMN_FLOAT, COLUMN_BOOL]
+# Compression codec of the Parquet files
+PARQUET_COMPRESSION = 'zstd'
+
+
+def import_pyarrow():
+    """ Imports pyarrow, which is only needed to write Parquet files.
+
+    Raises:
+        Exception: If pyarrow is not installed.
+
+    Returns:
+        module: The pyarrow module.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise Exception("The parquet output backend needs pyarrow, install it with: pip install pyarrow")
+    return pyarrow
+
+
+class ColumnBuffer:
+    """ Rows of an output table collected in memory, one list per column, to be written at once as a Parquet file.
+    """
+    def __init__(self, schema: List[Tuple[str, str]]) -> None:
+        """ Constructor.
+
+        Args:
+            schema (List[Tuple[str, str]]): Name and type (one of COLUMN_TYPES) of each column, in order.
+
+        Raises:
+            Exception: If a type is not known.
+
+        Returns:
+            None
+        """
+        for name, column_type in schema:
+            if column_type not in COLUMN_TYPES:
+                raise Exception(f"Unknown type {column_type} of column {name}")
+        self.schema = schema
+        self.columns: Dict[str, list] = {name: [] for name, _ in schema}
+
+
+    def __len__(self) -> int:
+        return len(self.columns[self.schema[0][0]])
+
+
+    def append(self, row: list) -> None:
+        """ Adds a row.
+
+        Args:
+            row (list): One value per column, in the order of the schema. Missing values are None.
+
+        Returns:
+            None
+        """
+        for (name, column_type), value in zip(self.schema, row):
+            if value is not None and column_type == COLUMN_STRING and not isinstance(value, str):
+                value = str(value)
+            self.columns[name].append(value)
+
+
+    def write(self, filename: str) -> None:
+        """ Writes the rows as a compressed Parquet file, and empties the buffer.
+
+        Args:
+            filename (str): Path of the file. It is overwritten if it exists.
+
+        Returns:
+            None
+        """
+        pa = import_pyarrow()
+        types = {COLUMN_STRING: pa.string(), COLUMN_INT: pa.int64(), COLUMN_FLOAT: pa.float64(), COLUMN_BOOL: pa.bool_()}
+        table = pa.table({name: pa.array(self.columns[name], type=types[column_type]) for name, column_type in self.schema})
+        pa.parquet.write_table(table, filename, compression=PARQUET_COMPRESSION)
+        for values in self.columns.values():
+            values.clear()
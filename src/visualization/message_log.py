@@ -0,0 +1,171 @@
+import atexit
+import csv
+import os
+import threading
+from collections import deque
+from typing import List
+
+from src.utils.position import Position
+
+# Maximum number of rows waiting to be written. When the buffer is full, the senders wait for the writer thread.
+MESSAGE_LOG_CAPACITY = 65536
+# Number of rows that wake up the writer thread to write them in a single batch
+MESSAGE_LOG_BATCH_SIZE = 1024
+# Seconds after which the rows waiting are written, even if there are not enough for a batch
+MESSAGE_LOG_FLUSH_INTERVAL = 1.0
+# Keys of the message values that are not logged, as they reference the whole environment
+MESSAGE_LOG_SKIPPED_KEYS = ['grid']
+# Recipients is the number of agents the message was delivered to, more than one for broadcasts, which are logged once
+MESSAGE_LOG_HEADER = ["Type", "Sender ID", "Destination ID", "Value", "Comment", "Recipients"]
+
+
+def compact_value(value):
+    """ Compact, JSON serializable version of the value of a message, to be logged.
+
+    Entities (packages, agents, package points...) are replaced by their ID and positions by their coordinates,
+    instead of their full representation, and the references to the grid are dropped.
+
+    Args:
+        value (object): The value of a message, or any part of it.
+
+    Returns:
+        object: The compact version of the value.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, Position):
+        return [value.x, value.y]
+    if isinstance(value, dict):
+        return {str(key): compact_value(item) for key, item in value.items() if key not in MESSAGE_LOG_SKIPPED_KEYS}
+    if isinstance(value, (list, tuple, set)):
+        return [compact_value(item) for item in value]
+    if hasattr(value, 'id'):
+        return value.id
+    return str(value)
+
+
+class MessageLogWriter:
+    """ Appends the rows of the messages log to its CSV file from a background thread.
+
+    The senders only serialize the row and append it to an in-memory buffer. The writer thread keeps the file open
+    and writes the buffered rows in batches, so logging a message does not open, write and close the file every time.
+    """
+    def __init__(self, filename: str, capacity: int=MESSAGE_LOG_CAPACITY, batch_size: int=MESSAGE_LOG_BATCH_SIZE, flush_interval: float=MESSAGE_LOG_FLUSH_INTERVAL) -> None:
+        """ Constructor. Starts the writer thread.
+
+        Args:
+            filename (str): The CSV file to append the rows to. The header is written if it does not exist yet.
+            capacity (int, optional): Maximum number of rows in the buffer. Defaults to MESSAGE_LOG_CAPACITY.
+            batch_size (int, optional): Number of rows that triggers a write. Defaults to MESSAGE_LOG_BATCH_SIZE.
+            flush_interval (float, optional): Maximum seconds a row waits in the buffer. Defaults to MESSAGE_LOG_FLUSH_INTERVAL.
+
+        Returns:
+            None
+        """
+        self.filename = filename
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = deque()
+        self.condition = threading.Condition()
+        self.n_buffered = 0
+        self.n_written = 0
+        self.flush_requested = False
+        self.closed = False
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name=f"MessageLogWriter({filename})", daemon=True)
+        self.thread.start()
+        # Nothing is lost if the program ends without closing the writer
+        atexit.register(self.close)
+
+
+    def write(self, row: List) -> None:
+        """ Adds a row to the buffer. If the buffer is full, waits until the writer thread makes room.
+
+        Args:
+            row (List): The values of the row.
+
+        Raises:
+            Exception: If the writer has been closed, or the writer thread failed.
+
+        Returns:
+            None
+        """
+        with self.condition:
+            while len(self.buffer) >= self.capacity and self.error is None:
+                self.condition.notify_all()
+                self.condition.wait()
+            if self.closed or self.error is not None:
+                raise Exception(f"The messages log {self.filename} is not writable: {self.error or 'closed'}")
+            self.buffer.append(row)
+            self.n_buffered += 1
+            if len(self.buffer) >= self.batch_size:
+                self.condition.notify_all()
+
+
+    def flush(self) -> None:
+        """ Waits until all the rows buffered so far are written to the file.
+
+        Raises:
+            Exception: If the writer thread failed.
+
+        Returns:
+            None
+        """
+        with self.condition:
+            target = self.n_buffered
+            self.flush_requested = True
+            self.condition.notify_all()
+            self.condition.wait_for(lambda: self.n_written >= target or self.error is not None)
+            if self.error is not None:
+                raise Exception(f"The messages log {self.filename} could not be written: {self.error}")
+
+
+    def close(self) -> None:
+        """ Writes the rows left in the buffer, and stops the writer thread. Closing it again does nothing.
+
+        Returns:
+            None
+        """
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        atexit.unregister(self.close)
+
+
+    def _run(self) -> None:
+        """ Body of the writer thread.
+
+        Returns:
+            None
+        """
+        try:
+            file_exists = os.path.exists(self.filename)
+            with open(self.filename, mode="a", newline="") as file:
+                writer = csv.writer(file)
+                if not file_exists:
+                    writer.writerow(MESSAGE_LOG_HEADER)
+                while True:
+                    with self.condition:
+                        self.condition.wait_for(lambda: len(self.buffer) >= self.batch_size or self.flush_requested or self.closed, timeout=self.flush_interval)
+                        batch = list(self.buffer)
+                        self.buffer.clear()
+                        self.flush_requested = False
+                        closed = self.closed
+                        # Wake up the senders waiting for room in the buffer
+                        self.condition.notify_all()
+                    if batch:
+                        writer.writerows(batch)
+                        file.flush()
+                    with self.condition:
+                        self.n_written += len(batch)
+                        self.condition.notify_all()
+                    if closed and not batch:
+                        return
+        except Exception as e:
+            with self.condition:
+                self.error = e
+                self.condition.notify_all()
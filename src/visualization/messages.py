@@ -1,5 +1,5 @@
 import os
-from typing import Union
+from typing import List, Tuple, Union
 
 import pandas as pd
 import plotly.graph_objects as go
@@ -27,16 +27,47 @@ def general_styling(fig:go.Figure) -> go.Figure:
     return fig  
 
 
+def read_messages_logs(logs_path: str) -> Tuple[List[str], List[pd.DataFrame]]:
+    """ Loads the messages logs of all the runs under a directory, written either as CSV or as Parquet.
+
+    Args:
+        logs_path (str): Directory with the log directories of the runs.
+
+    Returns:
+        Tuple[List[str], List[pd.DataFrame]]: The path of each log file, and its messages.
+    """
+    csv_files = [f for f in search_files_recursively(logs_path, '.csv') if 'messages' in f]
+    parquet_files = [f for f in search_files_recursively(logs_path, '.parquet') if 'messages' in f]
+    dfs = [pd.read_csv(csv_file) for csv_file in csv_files] + [pd.read_parquet(parquet_file) for parquet_file in parquet_files]
+    return csv_files + parquet_files, dfs
+
+
+def count_messages(df: pd.DataFrame, message_type: str=None) -> int:
+    """ Number of messages delivered, as a broadcast is logged in a single row with its number of recipients.
+
+    Args:
+        df (pd.DataFrame): Messages of a run, or a part of them. Logs written before the Recipients column existed count one message per row.
+        message_type (str, optional): Only count the messages of this type. Defaults to None, all of them.
+
+    Returns:
+        int: The number of messages.
+    """
+    if message_type is not None:
+        df = df[df['Type'] == message_type]
+    if 'Recipients' not in df.columns:
+        return df.shape[0]
+    return int(df['Recipients'].fillna(1).sum())
+
+
 def number_of_messages_by_type(csvs_path: str, store_path:str) -> Union[int, pd.DataFrame]:
-    csv_files = [f for f in search_files_recursively(csvs_path, '.csv')  if 'messages' in f]
-    dfs = [pd.read_csv(csv_file) for csv_file in csv_files]
+    csv_files, dfs = read_messages_logs(csvs_path)
 
-    n_messages = {csv_files[i].split('/')[-2].split('-')[0]: df.shape[0] for i, df in enumerate(dfs)}
+    n_messages = {csv_files[i].split('/')[-2].split('-')[0]: count_messages(df) for i, df in enumerate(dfs)}
 
-    n_intermediate_pickup_requests = {csv_files[i].split('/')[-2].split('-')[0]: df[(df['Sender ID'].str.contains('ChainAgent')) & ((df['Destination ID'].str.contains('broker') | (df['Destination ID'].str.contains('recruiter'))))]['Type'].value_counts().get('delivery_notify', 0) for i, df in enumerate(dfs)}
-    n_ending_pickup_requests = {csv_files[i].split('/')[-2].split('-')[0]: df[(df['Sender ID'].str.contains('broker')) & ((df['Destination ID'].str.contains('broker') | (df['Destination ID'].str.contains('recruiter'))))]['Type'].value_counts().get('pickup_request', 0) for i, df in enumerate(dfs)}
+    n_intermediate_pickup_requests = {csv_files[i].split('/')[-2].split('-')[0]: count_messages(df[(df['Sender ID'].str.contains('ChainAgent')) & ((df['Destination ID'].str.contains('broker') | (df['Destination ID'].str.contains('recruiter'))))], 'delivery_notify') for i, df in enumerate(dfs)}
+    n_ending_pickup_requests = {csv_files[i].split('/')[-2].split('-')[0]: count_messages(df[(df['Sender ID'].str.contains('broker')) & ((df['Destination ID'].str.contains('broker') | (df['Destination ID'].str.contains('recruiter'))))], 'pickup_request') for i, df in enumerate(dfs)}
 
-    n_ending_acceptances = {csv_files[i].split('/')[-2].split('-')[0]: df['Type'].value_counts().get('delivery_accepted', 0) for i, df in enumerate(dfs)}
+    n_ending_acceptances = {csv_files[i].split('/')[-2].split('-')[0]: count_messages(df, 'delivery_accepted') for i, df in enumerate(dfs)}
 
     messages_data = [n_messages, n_intermediate_pickup_requests, n_ending_pickup_requests, n_ending_acceptances]
     messages_df = pd.DataFrame(messages_data).T.rename(columns={'index':'experiment', 0:'n_messages', 1:'n_intermediate_pickup_requests', 2:'n_ending_pickup_requests', 3:'n_ending_acceptances'})
@@ -55,10 +86,9 @@ def number_of_messages_by_type(csvs_path: str, store_path:str) -> Union[int, pd.
 
 
 def total_number_of_messages(csvs_path: str, store_path:str) -> Union[int, pd.DataFrame]:
-    csv_files = [f for f in search_files_recursively(csvs_path, '.csv')  if 'messages' in f]
-    dfs = [pd.read_csv(csv_file) for csv_file in csv_files]
+    csv_files, dfs = read_messages_logs(csvs_path)
 
-    n_messages = {csv_files[i].split('/')[-2].split('-')[0]: df.shape[0] for i, df in enumerate(dfs)}
+    n_messages = {csv_files[i].split('/')[-2].split('-')[0]: count_messages(df) for i, df in enumerate(dfs)}
 
     messages_data = [n_messages]
     messages_df = pd.DataFrame(messages_data).T.rename(columns={'index':'experiment', 0:'n_messages'})
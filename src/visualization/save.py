@@ -1,10 +1,87 @@
+import atexit
 import csv
+import json
 import matplotlib.pyplot as plt
 import pandas as pd
 import os
 
+from src.visualization.columnar import COLUMN_BOOL, COLUMN_INT, COLUMN_STRING, ColumnBuffer, import_pyarrow
+from src.visualization.message_log import MESSAGE_LOG_HEADER, MessageLogWriter, compact_value
+
+# How the agent, package and message rows are stored
+SAVE_BACKEND_CSV = 'csv'  # Appended to CSV files as they are logged
+SAVE_BACKEND_PARQUET = 'parquet'  # Collected in memory by column, and written as compressed Parquet files when the run ends (requires pyarrow)
+SAVE_BACKENDS = [SAVE_BACKEND_CSV, SAVE_BACKEND_PARQUET]
+
+AGENT_DATA_SCHEMA = [("iteration", COLUMN_INT), ("AgentID", COLUMN_STRING), ("Strategy", COLUMN_STRING), ("Pos X", COLUMN_INT), ("Pos Y", COLUMN_INT), ("algorithm", COLUMN_STRING)]
+PACKAGE_DATA_SCHEMA = [("PackageID", COLUMN_STRING), ("PackagePoint X", COLUMN_INT), ("PackagePoint Y", COLUMN_INT), ("Delayed", COLUMN_BOOL), ("Delivery Time", COLUMN_INT), ("End X", COLUMN_INT), ("End Y", COLUMN_INT)]
+# Maximum number of messages logs open at the same time. When there are more, the least recently used one is closed, and reopened if it is written again.
+SAVE_MAX_MESSAGE_LOGS = 16
+MESSAGES_SCHEMA = [(name, COLUMN_INT if name == "Recipients" else COLUMN_STRING) for name in MESSAGE_LOG_HEADER]
+
 class Save:
     log_dir = None
+    backend = SAVE_BACKEND_CSV
+    # Writer of the messages log of each log directory, by path of the log, from the least to the most recently used.
+    # Several runs can log at the same time in the same process (e.g. the replicas of a LockstepRunner).
+    message_logs = {}
+    # Rows of each output file (by path of the CSV file it replaces), with the parquet backend
+    column_buffers = {}
+
+    def set_backend(backend):
+        """ Selects how the rows are stored from now on. The rows collected with the previous backend are written first.
+
+        Args:
+            backend (str): One of SAVE_BACKENDS.
+
+        Raises:
+            Exception: If the backend is not known, or its dependencies are not installed.
+        """
+        if backend not in SAVE_BACKENDS:
+            raise Exception(f"Unknown save backend: {backend}")
+        if backend == SAVE_BACKEND_PARQUET:
+            import_pyarrow()
+        Save.close()
+        Save.backend = backend
+
+    def append_row(filename, schema, row):
+        """ Adds a row to the column buffers of an output file, with the parquet backend.
+
+        Args:
+            filename (str): Name of the CSV file the row would be appended to with the csv backend.
+            schema (List[Tuple[str, str]]): Columns of the file.
+            row (list): The row.
+        """
+        file_path = f"{Save.log_dir}/{filename}"
+        if file_path not in Save.column_buffers:
+            Save.column_buffers[file_path] = ColumnBuffer(schema)
+        Save.column_buffers[file_path].append(row)
+
+    def in_log_dir(file_path, log_dir):
+        """ Whether an output file belongs to a log directory, or to any of them if log_dir is None.
+        """
+        return log_dir is None or os.path.normpath(os.path.dirname(file_path)) == os.path.normpath(log_dir)
+
+    def write_column_buffers(log_dir=None):
+        """ Writes the rows collected with the parquet backend, one Parquet file per CSV file it replaces.
+
+        Args:
+            log_dir (str, optional): Only write the files of this log directory. Defaults to None, all of them.
+        """
+        for file_path, buffer in list(Save.column_buffers.items()):
+            if Save.in_log_dir(file_path, log_dir):
+                if len(buffer) > 0:
+                    buffer.write(f"{os.path.splitext(file_path)[0]}.parquet")
+                del Save.column_buffers[file_path]
+
+    def close(log_dir=None):
+        """ Writes everything that is still buffered. Call it when the run ends.
+
+        Args:
+            log_dir (str, optional): Only close the files of the run logging in this directory, when other runs of the process keep logging. Defaults to None, all of them.
+        """
+        Save.close_message_log(log_dir)
+        Save.write_column_buffers(log_dir)
     
     def save_agent_init_state(agents, filename):
         file_path = f"{Save.log_dir}/{filename}" 
@@ -26,65 +103,95 @@ class Save:
 
 
     def save_agent_data(agent, iteration_num=None, filename="agent_data.csv"):
+        if Save.backend == SAVE_BACKEND_PARQUET:
+            Save.append_row(filename, AGENT_DATA_SCHEMA, [iteration_num, agent.id, type(agent), agent.pos.x, agent.pos.y, agent.algorithm_name])
+            return
         file_path = f"{Save.log_dir}/{filename}"
         file_exists = os.path.exists(file_path)
         with open(file_path, mode="a", newline="") as file:
             writer = csv.writer(file)
             if not file_exists:
                 # Header
-                writer.writerow(["iteration", "AgentID", "Strategy", "Pos X", "Pos Y", "algorithm"])
+                writer.writerow([name for name, _ in AGENT_DATA_SCHEMA])
             # data
             writer.writerow([iteration_num, agent.id, type(agent), agent.pos.x, agent.pos.y, agent.algorithm_name])
             
 
     def save_to_csv_package(package, delivered=True):
         if delivered:
-            filename=f"{Save.log_dir}/delivery_data.csv"
+            filename="delivery_data.csv"
         else: 
-            filename=f"{Save.log_dir}/package_data.csv"
+            filename="package_data.csv"
+
+        # data
+        data = [
+            package.id, 
+                package.pos.x, 
+                package.pos.y, 
+                package.is_delayed, 
+        ]
+        if delivered:
+            data.append(package.iterations)
+        else:
+            data.append(None)
             
-        file_exists = os.path.exists(filename)
-        with open(filename, mode="a") as file:
+        if package.intermediate_point_pos:
+            data += [package.destination.x, package.destination.y]
+        else:
+            data += [None, None]
+
+        if Save.backend == SAVE_BACKEND_PARQUET:
+            Save.append_row(filename, PACKAGE_DATA_SCHEMA, data)
+            return
+
+        file_path = f"{Save.log_dir}/{filename}"
+        file_exists = os.path.exists(file_path)
+        with open(file_path, mode="a") as file:
             writer = csv.writer(file)
             if not file_exists:
                 # Header
-                writer.writerow(["PackageID", "PackagePoint X", "PackagePoint Y", "Delayed", "Delivery Time", "End X", "End Y"])
-            # data
-            data = [
-                package.id, 
-                    package.pos.x, 
-                    package.pos.y, 
-                    package.is_delayed, 
-            ]
-            if delivered:
-                data.append(package.iterations)
-            else:
-                data.append(None)
-                
-            if package.intermediate_point_pos:
-                data += [package.destination.x, package.destination.y]
-            else:
-                data += [None, None]
+                writer.writerow([name for name, _ in PACKAGE_DATA_SCHEMA])
             writer.writerow(data)
 
 
-    def save_to_csv_messages(message, comment):
+    def save_to_csv_messages(message, comment, n_recipients=1):
+        if Save.backend == SAVE_BACKEND_PARQUET:
+            Save.append_row("messages.csv", MESSAGES_SCHEMA, [message.type, message.sender_id, message.destination_id, json.dumps(compact_value(message.value), separators=(",", ":")), comment, n_recipients])
+            return
         filename = f"{Save.log_dir}/messages.csv"
-        file_exists = os.path.exists(filename)
-        with open(filename, mode="a") as file:
-            writer = csv.writer(file)
-            if not file_exists:
-                # Header
-                writer.writerow(["Type", "Sender ID", "Destination ID", "Value", "Comment"])
-            # data
-            data = [
-                message.type,
-                    message.sender_id,
-                    message.destination_id,
-                    message.value,
-                comment
-            ]
-            writer.writerow(data)
+        # Moved to the end, as the most recently used
+        message_log = Save.message_logs.pop(filename, None)
+        if message_log is None:
+            if len(Save.message_logs) >= SAVE_MAX_MESSAGE_LOGS:
+                Save.message_logs.pop(next(iter(Save.message_logs))).close()
+            message_log = MessageLogWriter(filename)
+        Save.message_logs[filename] = message_log
+        # data, written in batches by the writer thread
+        data = [
+            message.type,
+                message.sender_id,
+                message.destination_id,
+                json.dumps(compact_value(message.value), separators=(",", ":")),
+            comment,
+            n_recipients
+        ]
+        message_log.write(data)
+
+    def flush_message_log():
+        """ Waits until all the messages logged so far are written to messages.csv.
+        """
+        for message_log in Save.message_logs.values():
+            message_log.flush()
+
+    def close_message_log(log_dir=None):
+        """ Writes the messages left in the buffer to messages.csv and stops its writer thread. Call it when the run ends.
+
+        Args:
+            log_dir (str, optional): Only close the log of this log directory. Defaults to None, all of them.
+        """
+        for filename in list(Save.message_logs):
+            if Save.in_log_dir(filename, log_dir):
+                Save.message_logs.pop(filename).close()
 
     def visualize_data():
         df = pd.read_csv("delivery_data.csv")
@@ -102,4 +209,7 @@ class Save:
 
         # Show the plot
         plt.show()
-     
\ No newline at end of file
+
+
+# Nothing buffered is lost if the program ends without closing the run
+atexit.register(Save.close)
@@ -55,24 +55,16 @@ def grid_as_matrix(grid, mode:str='dijkstra') -> List[List]:
 
     Args:
         mode (str, optional): How to create the matrix, depending on the purpose. Defaults to 'dijkstra'.
+            - 'dijkstra': The occupancy bitmap of the grid (1 if the cell is occupied by an obstacle, 0 otherwise), indexed as [x, y].
+                It is a view, not a copy, so it must not be modified.
+            - 'visualization': A matrix of strings with a letter for each entity in the cell.
 
     Returns:
         List[List]: The grid as a matrix.
     """        
     matrix_grid = []
     if mode == 'dijkstra':
-        for i in range(grid.height):
-            column = []
-            for j in range(grid.width):
-                if grid._grid[i][j]:
-                    # check if there is some instance of ObstacleCell in the cell
-                    if any(isinstance(entity, ObstacleCell) for entity in grid._grid[i][j]):
-                        column.append(0)
-                    else:
-                        column.append(1)
-                else:
-                    column.append(1)
-            matrix_grid.append(column)
+        matrix_grid = grid.occupancy
     elif mode == 'visualization':
         for i in range(grid.height):
             column = []
@@ -0,0 +1,60 @@
+import itertools
+import random
+
+import numpy as np
+
+from src.agents.path_algorithms.flow_field import UNREACHABLE
+from src.utils.assignment import linear_sum_assignment
+
+# Checks linear_sum_assignment against all the possible assignments of small random cost matrices.
+# Run it from the root of the repository with: python -m test.assignment_test
+N_MATRICES = 300
+MAX_SIDE = 6
+UNREACHABLE_PROBABILITY = 0.3
+
+
+def brute_force_cost(cost: np.ndarray) -> float:
+    """ Minimum total cost of assigning min(n_rows, n_columns) pairs, trying every assignment."""
+    if cost.shape[0] > cost.shape[1]:
+        cost = cost.T
+    n_rows, n_columns = cost.shape
+    return min(sum(cost[row, column] for row, column in zip(range(n_rows), columns)) for columns in itertools.permutations(range(n_columns), n_rows))
+
+
+def check(cost: np.ndarray) -> None:
+    rows, columns = linear_sum_assignment(cost)
+    assert len(rows) == len(columns) == min(cost.shape), f"{len(rows)} pairs assigned for a {cost.shape} matrix"
+    assert len(set(rows)) == len(rows) and len(set(columns)) == len(columns), "a row or a column is assigned twice"
+    assert rows == sorted(rows), "the rows are not sorted"
+    total_cost = sum(cost[row, column] for row, column in zip(rows, columns))
+    expected_cost = brute_force_cost(cost)
+    assert total_cost == expected_cost, f"cost {total_cost} instead of {expected_cost} for\n{cost}"
+
+
+random.seed(0)
+np.random.seed(0)
+
+print("TEST 1")
+# Empty matrices
+for shape in [(0, 0), (0, 3), (3, 0)]:
+    assert linear_sum_assignment(np.zeros(shape)) == ([], [])
+
+print("TEST 2")
+# Square, wide and tall matrices of small integer costs, with ties
+for _ in range(N_MATRICES):
+    n_rows, n_columns = random.randint(1, MAX_SIDE), random.randint(1, MAX_SIDE)
+    check(np.random.randint(0, 10, size=(n_rows, n_columns)).astype(np.float64))
+
+print("TEST 3")
+# Path distances where some agents cannot reach some packages, as in the batched criteria
+for _ in range(N_MATRICES):
+    n_rows, n_columns = random.randint(1, MAX_SIDE), random.randint(1, MAX_SIDE)
+    cost = np.random.randint(0, 100, size=(n_rows, n_columns))
+    cost[np.random.random((n_rows, n_columns)) < UNREACHABLE_PROBABILITY] = UNREACHABLE
+    check(cost)
+
+print("TEST 4")
+# Every pair unreachable
+check(np.full((3, 4), UNREACHABLE))
+
+print("All the assignments are optimal")
@@ -0,0 +1,89 @@
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.agents.path_algorithms.astar import AStar
+from src.agents.path_algorithms.dijkstra import Dijkstra
+from src.agents.path_algorithms.jps import JumpPointSearch
+from src.agents.path_algorithms.routing_engine import RoutingEngine
+from src.utils.position import Position
+
+# Checks that AStar and JumpPointSearch find shortest paths, as long as the ones of Dijkstra, on random grids,
+# that they give up on unreachable goals, and that agents routed with them never step into obstacles that move.
+# Run it from the root of the repository with: python -m test.astar_jps_test
+N_GRIDS = 3000
+N_WALKS = 200
+N_STEPS = 60
+MAX_CHANGED_CELLS = 4
+MAX_SIDE = 20
+
+
+def check_path(path: list, start: Position, end: Position, occupancy: np.ndarray) -> None:
+    """ Checks that a path goes from start to end through free neighbouring cells."""
+    assert path[0] == start and path[-1] == end, f"path from {path[0]} to {path[-1]} instead of {start} to {end}"
+    for cell, next_cell in zip(path, path[1:]):
+        assert cell.dist_to(next_cell) == 1 and not occupancy[next_cell.x, next_cell.y], f"invalid step from {cell} to {next_cell}"
+
+
+random.seed(0)
+np.random.seed(0)
+dijkstra = Dijkstra()
+algorithms = [AStar(), JumpPointSearch()]
+
+print("TEST 1")
+# Same path lengths as Dijkstra
+for _ in range(N_GRIDS):
+    width, height = random.randint(1, MAX_SIDE), random.randint(1, MAX_SIDE)
+    occupancy = (np.random.random((width, height)) < random.random() * 0.4).astype(np.uint8)
+    start = Position(random.randrange(width), random.randrange(height))
+    end = Position(random.randrange(width), random.randrange(height))
+    occupancy[start.x, start.y] = 0
+    expected_path = dijkstra.find_path(start, end, occupancy)
+    for algorithm in algorithms:
+        path = algorithm.find_path(start, end, occupancy)
+        assert len(path) == len(expected_path), f"{type(algorithm).__name__} found a path of {len(path)} cells from {start} to {end} instead of {len(expected_path)}"
+        if path:
+            check_path(path, start, end, occupancy)
+
+print("TEST 2")
+# Goals walled off or occupied by an obstacle
+occupancy = np.zeros((7, 5), dtype=np.uint8)
+occupancy[3, :] = 1
+occupancy[6, 4] = 1
+start = Position(0, 2)
+for end in [Position(5, 2), Position(3, 2), Position(6, 4)]:
+    for algorithm in [dijkstra] + algorithms:
+        assert algorithm.find_path(start, end, occupancy) == [], f"{type(algorithm).__name__} found a path from {start} to {end}"
+        assert algorithm.get_next_position(start, end, 5, 7, occupancy) == start
+
+print("TEST 3")
+# Agents walking with the routing engine while obstacles appear and disappear, never under the agent or in its destination
+for _ in range(N_WALKS):
+    width, height = random.randint(2, MAX_SIDE), random.randint(2, MAX_SIDE)
+    occupancy = (np.random.random((width, height)) < random.random() * 0.3).astype(np.uint8)
+    position = Position(random.randrange(width), random.randrange(height))
+    destination = Position(random.randrange(width), random.randrange(height))
+    occupancy[position.x, position.y] = occupancy[destination.x, destination.y] = 0
+    algorithm = random.choice(algorithms)
+    routing_engine = RoutingEngine(SimpleNamespace(occupancy=occupancy, width=width, height=height))
+    for step in range(N_STEPS):
+        next_position = routing_engine.get_next_position('agent', position, destination, algorithm)
+        if next_position != position:
+            assert next_position.dist_to(position) == 1 and not occupancy[next_position.x, next_position.y], f"invalid step from {position} to {next_position}"
+        elif position != destination:
+            assert dijkstra.find_path(position, destination, occupancy) == [], f"stuck at {position} with a path to {destination}"
+        position = next_position
+
+        # The obstacles stop moving halfway, so that the agent has time to arrive
+        changed_cells = []
+        for _ in range(random.randint(0, MAX_CHANGED_CELLS) if step < N_STEPS // 2 else 0):
+            cell = Position(random.randrange(width), random.randrange(height))
+            if cell != position and cell != destination:
+                occupancy[cell.x, cell.y] ^= 1
+                changed_cells.append(cell)
+        routing_engine.update(changed_cells)
+    reachable = len(dijkstra.find_path(position, destination, occupancy)) > 0
+    assert position == destination or not reachable, f"{type(algorithm).__name__} did not reach {destination}, stopped at {position}"
+
+print("The paths are always the shortest ones")
@@ -0,0 +1,386 @@
+""" Micro and macro benchmarks of the hot paths of the simulation.
+
+It is not collected by pytest (the name of the file does not match its patterns), it is run as a script from the root of the repository:
+
+    python -m test.benchmark_hot_paths --output before.json
+    python -m test.benchmark_hot_paths --output after.json --compare before.json
+
+The results are written as JSON, with the commit and machine they were measured on, so that they can be compared between commits.
+Every benchmark builds its inputs with fixed seeds, so the same work is timed in every run.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from src.agents.path_algorithms.dijkstra import Dijkstra
+from src.agents.perception import PERCEPTION_MODE_ARRAY, PERCEPTION_MODE_DICT, Perception
+from src.agents.strategies.chain_agent import ChainAgent
+from src.agents.strategies.communication_chain_agent import CommunicationChainAgent
+from src.agents.strategies.greedy_agent import GreedyAgent
+from src.agents.strategies.roaming_agent import RoamingAgent
+from src.agents.strategies.waiter import Waiter
+from src.agents.strategies.waiter_cnp import WaiterCNP
+from src.agents.tips_functions import linear_decreasing_time_tips
+from src.environment.communication.optimality_criterias import loneliest
+from src.environment.environment import Environment
+from src.environment.grid import EnvironmentGrid
+from src.environment.kitchen import KitchenInitiator
+from src.environment.obstacle import Obstacle
+from src.environment.package import Package
+from src.environment.package_point import PACKAGE_POINT_END, PACKAGE_POINT_INTERMEDIATE, PACKAGE_POINT_START, PackagePoint
+from src.utils.automatic_environment import ENV_PP_MANUAL, ENV_PP_UNIFORM_SQUARES
+from src.utils.checkpoint import load_checkpoint, save_checkpoint
+from src.utils.grid2matrix import convert_grid_to_matrix
+from src.utils.position import Position
+from src.visualization.save import Save
+
+BENCHMARK_SEED = 1
+# Minimum time of each repetition of a benchmark, in seconds. Fast operations are run as many times as needed to reach it
+BENCHMARK_MIN_TIME = 0.2
+BENCHMARK_REPEAT = 5
+# A benchmark is a regression if its median time grows more than this fraction with respect to the baseline
+REGRESSION_THRESHOLD = 0.2
+
+PERCEPTION_RADII = [1, 3, 8]
+DIJKSTRA_GRID_SIDES = [50, 250, 500]
+DIJKSTRA_OBSTACLES_PERC = 10
+# Percentage of the cells occupied by obstacles. In the densest grid the random search of a free position mostly fails, and the whole grid is searched
+OBSTACLES_DENSITIES_PERC = [90, 99.9]
+LONELIEST_N_AGENTS = [16, 64]
+SCHEDULE_QUEUE_LENGTHS = [0, 1, 2, 4, 8, 12]
+ENVIRONMENT_GRID_SIDE = 50
+ENVIRONMENT_N_AGENTS = 16
+# Steps run before the step that is timed, so that the agents are carrying and delivering packages
+ENVIRONMENT_WARMUP_STEPS = 5
+
+# Registry of the benchmarks, by name. Each one prepares its inputs and returns the operation to time,
+# and, for the operations that change their inputs, a function that restores them before each timed call (not timed).
+BENCHMARKS: Dict[str, Callable[[], Tuple[Callable, Callable]]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    def register(setup: Callable) -> Callable:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def seed_everything(seed: int=BENCHMARK_SEED) -> None:
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def random_obstacles(grid_side: int, n_obstacles_perc: int, max_iterations: int=100) -> list:
+    """ Obstacles of 1x1 to 1x3 cells, generated as in the experiments.
+    """
+    obstacle_number = int((grid_side * grid_side) * (n_obstacles_perc/100))
+    obstacle_heights = [random.randint(1,3) for i in range(obstacle_number)]
+    obstacle_widths = list(map(lambda x: x[1] if obstacle_heights[x[0]] == 1 else 1, enumerate([random.randint(1,3) for i in range(obstacle_number)])))
+    return [
+        Obstacle(f'o{i}', Position(random.randint(0, grid_side-1), random.randint(0, grid_side-1)), width=obstacle_widths[i], height=obstacle_heights[i], starting_iteration=random.randint(1, max_iterations-1), duration=random.randint(1,5))
+        for i in range(obstacle_number)
+    ]
+
+
+def random_occupancy(grid_side: int, n_obstacles_perc: int) -> np.ndarray:
+    occupancy = (np.random.random((grid_side, grid_side)) < n_obstacles_perc / 100).astype(np.uint8)
+    occupancy[0, 0] = 0
+    occupancy[-1, -1] = 0
+    return occupancy
+
+
+def build_environment(strategy: str, grid_side: int=ENVIRONMENT_GRID_SIDE, n_agents: int=ENVIRONMENT_N_AGENTS) -> Environment:
+    """ Environment with agents of the given strategy, as set up in the experiments of each assignment.
+
+    Args:
+        strategy (str): 'greedy', 'chain', 'communication_chain', 'waiter' or 'waiter_cnp'.
+        grid_side (int, optional): Side of the grid. Defaults to ENVIRONMENT_GRID_SIDE.
+        n_agents (int, optional): Number of agents. Defaults to ENVIRONMENT_N_AGENTS.
+
+    Returns:
+        Environment: The environment, before its first step.
+    """
+    seed_everything()
+    spp_pos = Position(grid_side // 2, grid_side // 2)
+    intermediate_package_points, ending_package_points = 9, 25
+    kwargs = {'pp_distribution_strategy': ENV_PP_UNIFORM_SQUARES}
+    if strategy in ['greedy', 'chain', 'communication_chain']:
+        # Their packages go through intermediate package points, which the uniform squares do not place: they are fixed as in the experiments of the assignment 2,
+        # in a square around the starting package point, with the ending package points in the border of the grid
+        inner, outer = grid_side // 4, grid_side // 2 - 1
+        intermediate_package_points = [Position(spp_pos.x + dx, spp_pos.y + dy) for dx in [-inner, inner] for dy in [-inner, inner]]
+        ending_package_points = [Position(spp_pos.x + dx, spp_pos.y + dy) for dx in [-outer, 0, outer] for dy in [-outer, 0, outer] if (dx, dy) != (0, 0)]
+        kwargs['pp_distribution_strategy'] = ENV_PP_MANUAL
+    if strategy == 'greedy':
+        spp = PackagePoint('spp', spp_pos, PACKAGE_POINT_START, package_spawn_interval=5, n_packages_per_spawn=5)
+        agents = [GreedyAgent(f'greedy_{i}', spp_pos, [], Perception(3), 'dijkstra') for i in range(n_agents)]
+    elif strategy == 'chain':
+        spp = PackagePoint('spp', spp_pos, PACKAGE_POINT_START, package_spawn_interval=5, n_packages_per_spawn=5)
+        agents = [ChainAgent(f'chain_{i}', spp_pos, [], Perception(3), PACKAGE_POINT_INTERMEDIATE, 'dijkstra', PACKAGE_POINT_START) for i in range(n_agents // 2)]
+        agents += [ChainAgent(f'chain_{i}', None, [], Perception(3), PACKAGE_POINT_END, 'dijkstra', PACKAGE_POINT_INTERMEDIATE) for i in range(n_agents // 2, n_agents)]
+    elif strategy == 'communication_chain':
+        spp = PackagePoint('spp', spp_pos, PACKAGE_POINT_START, package_spawn_interval=5, n_packages_per_spawn=5)
+        agents = [CommunicationChainAgent(f'comcha_{i}', spp_pos, [], Perception(3), PACKAGE_POINT_INTERMEDIATE, 'dijkstra') for i in range(n_agents // 2)]
+        agents += [RoamingAgent(f'roaming_{i}', None, [], Perception(3), 'dijkstra') for i in range(n_agents // 2)]
+        kwargs['broker_optimality_criteria'] = 'loneliest'
+    elif strategy == 'waiter':
+        spp = PackagePoint('spp', spp_pos, PACKAGE_POINT_START, package_spawn_interval=5, n_packages_per_spawn=5, assign_intermediate=False)
+        agents = [Waiter(f'waiter_{i}', spp_pos, [], Perception(3), 'dijkstra', 'naive_greedy', linear_decreasing_time_tips, spp_pos) for i in range(n_agents)]
+    elif strategy == 'waiter_cnp':
+        kitchen = KitchenInitiator('kitchen')
+        spp = PackagePoint('spp', spp_pos, PACKAGE_POINT_START, package_spawn_interval=5, n_packages_per_spawn=5, assign_intermediate=False, kitchen_initiator=kitchen)
+        agents = [WaiterCNP(f'waiter_{i}', spp_pos, [], Perception(3), 'dijkstra', 'naive_greedy', linear_decreasing_time_tips, spp_pos) for i in range(n_agents)]
+        kwargs['initiator'] = kitchen
+    else:
+        raise ValueError(f"Unknown strategy {strategy}")
+    return Environment(grid_side, grid_side, agents, spp, intermediate_package_points, ending_package_points, random_obstacles(grid_side, 5), **kwargs)
+
+
+@benchmark('convert_grid_to_matrix')
+def benchmark_convert_grid_to_matrix():
+    environment = build_environment('waiter')
+    return lambda: convert_grid_to_matrix(environment.grid), None
+
+
+for radius, mode in itertools.product(PERCEPTION_RADII, [PERCEPTION_MODE_DICT, PERCEPTION_MODE_ARRAY]):
+    @benchmark(f'perception.percept[radius={radius}]' if mode == PERCEPTION_MODE_DICT else f'perception.percept[radius={radius},mode={mode}]')
+    def benchmark_percept(radius=radius, mode=mode):
+        environment = build_environment('waiter')
+        for _ in range(ENVIRONMENT_WARMUP_STEPS):
+            environment.step()
+        # Without the cache, which would return the same perception every time, as nothing changes between calls
+        perception = Perception(radius, mode, cache=False)
+        positions = [agent.pos for agent in environment.agents_l]
+        def percept():
+            # As the agents do: perceive, then look at the contents of their own cell
+            for pos in positions:
+                perception.percept(pos, environment.grid)[pos.to_tuple()]
+        return percept, None
+
+
+for grid_side in DIJKSTRA_GRID_SIDES:
+    @benchmark(f'dijkstra.get_next_position[grid={grid_side}]')
+    def benchmark_dijkstra(grid_side=grid_side):
+        seed_everything()
+        occupancy = random_occupancy(grid_side, DIJKSTRA_OBSTACLES_PERC)
+        dijkstra = Dijkstra()
+        # From corner to corner, the longest search in the grid
+        start, end = Position(0, 0), Position(grid_side - 1, grid_side - 1)
+        return lambda: dijkstra.get_next_position(start, end, grid_side, grid_side, occupancy), None
+
+
+for density in OBSTACLES_DENSITIES_PERC:
+    @benchmark(f'obstacle._appear[density={density}]')
+    def benchmark_obstacle_appear(density=density):
+        seed_everything()
+        grid_side = ENVIRONMENT_GRID_SIDE
+        grid = EnvironmentGrid(grid_side, grid_side)
+        # The given percentage of the cells is occupied, the first one of them being (0, 0)
+        cells = np.random.permutation(np.arange(1, grid_side * grid_side))[:int(grid_side * grid_side * density / 100) - 1]
+        for i, cell in enumerate([0] + cells.tolist()):
+            Obstacle(f'o{i}', Position(cell // grid_side, cell % grid_side), width=1, height=1, starting_iteration=1, duration=1)._appear(grid)
+        # Its initial position is occupied, so it looks for a free one at random, or in the whole grid when it does not find it
+        obstacle = Obstacle('o_benchmark', Position(0, 0), width=1, height=1, starting_iteration=1, duration=1)
+        def reset():
+            if obstacle.cells_with_obstacle:
+                obstacle._disappear(grid)
+            obstacle.pos = Position(0, 0)
+            random.seed(BENCHMARK_SEED)
+        return lambda: obstacle._appear(grid), reset
+
+
+for n_agents in LONELIEST_N_AGENTS:
+    @benchmark(f'optimality_criterias.loneliest[agents={n_agents}]')
+    def benchmark_loneliest(n_agents=n_agents):
+        environment = build_environment('communication_chain', n_agents=n_agents)
+        environment.step()
+        for agent in environment.agents_l:
+            # None of them accepts, so that every agent is asked and the ranking is computed in full every time
+            if isinstance(agent, RoamingAgent):
+                agent.package_task = 'busy'
+        pos = environment.starting_package_point.pos
+        return lambda: loneliest(environment.grid, 'broker', 'p_benchmark', pos), None
+
+
+for queue_length in SCHEDULE_QUEUE_LENGTHS:
+    @benchmark(f'waiter_cnp.get_optimal_schedule[queue={queue_length}]')
+    def benchmark_optimal_schedule(queue_length=queue_length):
+        environment = build_environment('waiter_cnp')
+        environment.step()
+        waiter = environment.agents_l[0]
+        waiter.pos = waiter.starting_package_point_pos
+        ending_package_points = environment.ending_package_points_list
+        packages = [
+            Package(f'p_benchmark_{i}', waiter.starting_package_point_pos, destination_pp.pos, 100, destination_pp=destination_pp)
+            for i, destination_pp in enumerate(random.choice(ending_package_points) for _ in range(queue_length + 1))
+        ]
+        waiter.scheduled_actions_queue = []
+        for package in packages[:-1]:
+            waiter.scheduled_actions_queue += [
+                ("go-start", waiter.starting_package_point_pos),
+                ("pick", package),
+                ("go-deliver", package.destination),
+                ("deliver", package.destination_pp, package),
+            ]
+        return lambda: waiter.get_optimal_schedule(packages[-1]), None
+
+
+for strategy in ['greedy', 'chain', 'communication_chain', 'waiter', 'waiter_cnp']:
+    @benchmark(f'environment.step[{strategy}]')
+    def benchmark_environment_step(strategy=strategy):
+        Save.log_dir = tempfile.mkdtemp()
+        environment = build_environment(strategy)
+        for _ in range(ENVIRONMENT_WARMUP_STEPS):
+            environment.step()
+            if strategy == 'communication_chain':
+                environment.broker.step()
+        # The same step is timed every time, from the state after the warm up
+        checkpoint_filename = f'{Save.log_dir}/warmup.ckpt'
+        save_checkpoint(environment, checkpoint_filename)
+        state = {}
+        def reset():
+            state['environment'] = load_checkpoint(checkpoint_filename)
+        def step():
+            state['environment'].step()
+            if strategy == 'communication_chain':
+                state['environment'].broker.step()
+        return step, reset
+
+
+def measure(operation: Callable, reset: Callable=None, repeat: int=BENCHMARK_REPEAT, min_time: float=BENCHMARK_MIN_TIME) -> dict:
+    """ Times an operation.
+
+    Args:
+        operation (Callable): The operation.
+        reset (Callable, optional): Restores the inputs of the operation before each call. If given, each repetition is a single call,
+            and the reset is not timed. Defaults to None.
+        repeat (int, optional): Number of repetitions. Defaults to BENCHMARK_REPEAT.
+        min_time (float, optional): Minimum time of each repetition, when there is no reset. Defaults to BENCHMARK_MIN_TIME.
+
+    Returns:
+        dict: Minimum, median and mean time per call among the repetitions, in seconds, and the number of calls per repetition.
+    """
+    number = 1
+    if reset is None:
+        # Calls per repetition, doubled until they take at least min_time
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                operation()
+            if time.perf_counter() - start >= min_time:
+                break
+            number *= 2
+    times = []
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        times.append((time.perf_counter() - start) / number)
+    return {
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'date': str(datetime.now()),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+    }
+
+
+def run_benchmarks(name_filter: str=None, repeat: int=BENCHMARK_REPEAT, min_time: float=BENCHMARK_MIN_TIME) -> dict:
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if name_filter is not None and name_filter not in name:
+            continue
+        operation, reset = setup()
+        results[name] = measure(operation, reset, repeat, min_time)
+        print(f"{name:<55} {results[name]['median'] * 1e3:12.4f} ms")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float=REGRESSION_THRESHOLD) -> bool:
+    """ Prints the ratio between the median times of the results and a baseline, for the benchmarks in both.
+
+    Args:
+        results (dict): Results of run_benchmarks.
+        baseline (dict): Results of run_benchmarks on another commit.
+        threshold (float, optional): Fraction of increase of the median time that is considered a regression. Defaults to REGRESSION_THRESHOLD.
+
+    Returns:
+        bool: Whether any benchmark regressed.
+    """
+    regressed = False
+    print(f"\n{'benchmark':<55} {'baseline ms':>12} {'current ms':>12} {'ratio':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['median'] / baseline[name]['median']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = ' REGRESSION'
+            regressed = True
+        print(f"{name:<55} {baseline[name]['median'] * 1e3:12.4f} {result['median'] * 1e3:12.4f} {ratio:8.2f}{flag}")
+    return regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks of the hot paths of the simulation.')
+    parser.add_argument('--output', help='JSON file where the results are written.')
+    parser.add_argument('--compare', help='JSON file with the results of a baseline, written with --output.')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help='Fraction of increase of the median time considered a regression.')
+    parser.add_argument('--filter', help='Only run the benchmarks whose name contains this text.')
+    parser.add_argument('--repeat', type=int, default=BENCHMARK_REPEAT, help='Repetitions of each benchmark.')
+    parser.add_argument('--min-time', type=float, default=BENCHMARK_MIN_TIME, help='Minimum time of each repetition, in seconds.')
+    parser.add_argument('--list', action='store_true', help='List the benchmarks and exit.')
+    args = parser.parse_args()
+
+    if args.list:
+        print('\n'.join(BENCHMARKS))
+        return 0
+
+    previous_log_dir = Save.log_dir
+    Save.log_dir = tempfile.mkdtemp()
+    results = run_benchmarks(args.filter, args.repeat, args.min_time)
+    Save.log_dir = previous_log_dir
+
+    if args.output is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({'metadata': metadata(), 'results': results}, f, indent=4)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline['results'], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
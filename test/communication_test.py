@@ -1,10 +1,14 @@
+import csv
+import tempfile
+
 from src.agents.perception import Perception
 from src.agents.strategies.communication_chain_agent import CommunicationChainAgent
 from src.environment.communication.broker import Broker
-from src.environment.communication.communication_layer import MSG_DELIVERY_NOTIFY, MSG_PICKUP_REQUEST, MSG_PICKUP_RESPONSE, MSG_DELIVERY_ACCEPTED, CommunicationLayer, Message
+from src.environment.communication.communication_layer import BROADCAST_DESTINATION_ID, MSG_DELIVERY_ANNOUNCE, MSG_DELIVERY_NOTIFY, MSG_PICKUP_REQUEST, MSG_PICKUP_RESPONSE, MSG_DELIVERY_ACCEPTED, CommunicationLayer, Message
 from src.environment.package_point import PACKAGE_POINT_INTERMEDIATE
 
 from src.utils.position import Position
+from src.visualization.save import Save
 
 
 # Define constants
@@ -12,8 +16,9 @@ PACKAGE_POINT_INTERMEDIATE = "IP-1"
 package_id = "123"
 intermediate_point = "A"
 intermediate_point_pos = (5,5)
+Save.log_dir = tempfile.mkdtemp()
 
-agent1 = CommunicationChainAgent(id="1", position=Position(0, 0), packages=[], perception=Perception(1), algorithm_name="dijkstra", goal_package_point=PACKAGE_POINT_INTERMEDIATE)
+agent1 = CommunicationChainAgent(id="1", position=Position(0, 0), packages=[], perception=Perception(1), algorithm_name="dijkstra", goal_package_point_type=PACKAGE_POINT_INTERMEDIATE)
 #agent2 = CommunicationChainAgent("2", Position(1, 1), [], Perception(1), PACKAGE_POINT_INTERMEDIATE, "dijkstra")
 broker = Broker(broker_id="broker1")
 
@@ -23,7 +28,7 @@ comm_layer = CommunicationLayer.instance([agent1], broker)
 
 print ("TEST 1")
 # Test: Agent1 informs the broker about delivering a package
-delivery_message = Message(MSG_DELIVERY_NOTIFY, agent1.id, "broker", {"package_id": package_id, "status": "delivered", "pos": intermediate_point_pos})
+delivery_message = Message(MSG_DELIVERY_NOTIFY, agent1.id, "broker", {"package_id": package_id, "status": "delivered", "pos": intermediate_point_pos, "grid": None})
 
 # Check if the communication layer with broker established before sending the message
 if CommunicationLayer.broker:
@@ -49,5 +54,52 @@ broker.send_message(message_to_agent1)
 
 print(f"Agent ID: {agent1.id}")
 print(f"Agent Position: {agent1.pos}")
-print(f"Agent Goal Package Point: {agent1.goal_package_point}")
-print(f"Agent Algorithm: {agent1.algorithm_name}")
\ No newline at end of file
+print(f"Agent Goal Package Point: {agent1.goal_package_point_type}")
+print(f"Agent Algorithm: {agent1.algorithm_name}")
+
+
+class ListeningAgent:
+    """ Agent that answers every message with its own name, remembering the messages it received."""
+    def __init__(self, id: str, name: str) -> None:
+        self.id = id
+        self.name = name
+        self.received = []
+
+    def receive_message(self, message):
+        self.received.append(message)
+        return self.name
+
+
+print("TEST 5")
+# Test: With repeated ids, the first registered agent receives the messages, as with the linear search through the agents
+first, second, third = ListeningAgent("a", "first"), ListeningAgent("a", "second"), ListeningAgent("b", "third")
+agents = [first, second, third]
+CommunicationLayer.init(agents, broker)
+assert CommunicationLayer.send_to_agent("a", Message(MSG_PICKUP_REQUEST, "broker", "a", {})) == "first"
+assert CommunicationLayer.broadcast(Message(MSG_DELIVERY_ANNOUNCE, "kitchen", BROADCAST_DESTINATION_ID, {})) == {"a": "first", "b": "third"}
+assert len(first.received) == 3 and len(second.received) == 0
+
+print("TEST 6")
+# Test: Agents appended to the registered list after init can be addressed
+late = ListeningAgent("c", "late")
+agents.append(late)
+assert CommunicationLayer.send_to_agent("c", Message(MSG_PICKUP_REQUEST, "broker", "c", {})) == "late"
+assert CommunicationLayer.broadcast(Message(MSG_DELIVERY_ANNOUNCE, "kitchen", BROADCAST_DESTINATION_ID, {}), ["b", "c"]) == {"b": "third", "c": "late"}
+try:
+    CommunicationLayer.send_to_agent("d", Message(MSG_PICKUP_REQUEST, "broker", "d", {}))
+    raise AssertionError("Message delivered to an unknown agent")
+except RuntimeError:
+    pass
+
+print("TEST 7")
+# Test: A broadcast is delivered to every agent once, as the same message, and logged once with its number of recipients
+agents = [ListeningAgent(f"agent_{i}", f"agent_{i}") for i in range(5)]
+CommunicationLayer.init(agents, broker)
+announcement = Message(MSG_DELIVERY_ANNOUNCE, "kitchen", BROADCAST_DESTINATION_ID, {"package": package_id})
+responses = CommunicationLayer.broadcast(announcement)
+assert responses == {agent.id: agent.name for agent in agents}
+assert all(agent.received == [announcement] for agent in agents)
+Save.close_message_log()
+with open(f"{Save.log_dir}/messages.csv") as f:
+    rows = list(csv.DictReader(f))
+assert rows[-1]["Type"] == MSG_DELIVERY_ANNOUNCE and rows[-1]["Recipients"] == "5"
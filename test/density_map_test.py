@@ -0,0 +1,82 @@
+import random
+import tempfile
+
+import numpy as np
+from mesa import Agent as MesaAgent, Model
+
+from src.environment.communication.communication_layer import CommunicationLayer
+from src.environment.communication.optimality_criterias import loneliest
+from src.environment.density_map import DensityMap
+from src.environment.entity_index import ENTITY_AGENT
+from src.environment.grid import EnvironmentGrid
+from src.utils.position import Position
+from src.visualization.save import Save
+
+# Checks that the density map used by the loneliest criteria follows the agents while they move, within the same step.
+# Run it from the root of the repository with: python -m test.density_map_test
+N_MOVES = 500
+GRID_SIDE = 12
+
+
+class ListeningAgent(MesaAgent):
+    """ Agent that refuses every pickup request, remembering the order it was asked in."""
+    asked = []
+
+    def __init__(self, id: str, model: Model) -> None:
+        super().__init__(id, model)
+        self.id = id
+
+    def receive_message(self, message):
+        ListeningAgent.asked.append(self.id)
+        return None
+
+
+def brute_force_density(grid: EnvironmentGrid, pos, radius: int) -> int:
+    """ Other agents in the square around a cell, going through all of them."""
+    _, positions = grid.entities.of_type(ENTITY_AGENT)
+    return int((np.abs(positions - np.array(pos)).max(axis=1) <= radius).sum()) - 1
+
+
+Save.log_dir = tempfile.mkdtemp()
+random.seed(0)
+model = Model()
+
+print("TEST 1")
+# An agent moves next to another one and loneliest is asked right after, before the end of the step
+grid = EnvironmentGrid(width=GRID_SIDE, height=GRID_SIDE)
+grid.density_map = DensityMap(GRID_SIDE, GRID_SIDE)
+agents = [ListeningAgent(agent_id, model) for agent_id in ['a', 'b', 'c']]
+for agent, pos in zip(agents, [(0, 0), (1, 1), (11, 11)]):
+    grid.place_agent(agent, pos)
+CommunicationLayer.init(agents, None)
+loneliest(grid, 'broker', 'p1', Position(5, 5), n_cells_around=2)
+assert ListeningAgent.asked[0] == 'c', ListeningAgent.asked
+ListeningAgent.asked = []
+grid.move_agent(agents[1], (10, 11))
+loneliest(grid, 'broker', 'p1', Position(5, 5), n_cells_around=2)
+assert ListeningAgent.asked[0] == 'a', ListeningAgent.asked
+Save.close_message_log()
+
+print("TEST 2")
+# Random moves of any length, placements and removals, compared with counting the agents one by one
+grid = EnvironmentGrid(width=GRID_SIDE, height=GRID_SIDE)
+grid.density_map = DensityMap(GRID_SIDE, GRID_SIDE)
+agents = [ListeningAgent(f'agent_{i}', model) for i in range(10)]
+for agent in agents:
+    grid.place_agent(agent, (random.randrange(GRID_SIDE), random.randrange(GRID_SIDE)))
+for _ in range(N_MOVES):
+    agent = random.choice(agents)
+    if agent.pos is None:
+        grid.place_agent(agent, (random.randrange(GRID_SIDE), random.randrange(GRID_SIDE)))
+    elif random.random() < 0.1:
+        grid.remove_agent(agent)
+    else:
+        grid.move_agent(agent, (random.randrange(GRID_SIDE), random.randrange(GRID_SIDE)))
+    radius = random.randint(0, 3)
+    _, positions = grid.entities.of_type(ENTITY_AGENT)
+    densities = grid.density_map.density(positions, radius)
+    for pos, density in zip(positions, densities):
+        assert density == brute_force_density(grid, pos, radius), f"density {density} around {tuple(pos)} with radius {radius}"
+    assert (densities >= 0).all()
+
+print("The density map follows the agents")
@@ -0,0 +1,96 @@
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.agents.path_algorithms.dijkstra import Dijkstra
+from src.agents.path_algorithms.flow_field import UNREACHABLE, FlowFieldCache
+from src.agents.perception import Perception
+from src.agents.strategies.waiter_cnp import WaiterCNP
+from src.agents.tips_functions import linear_decreasing_time_tips
+from src.agents.utility_functions import refined_greedy
+from src.environment.distance_table import DistanceTable
+from src.environment.package import Package
+from src.utils.position import Position
+
+# Checks the distances of DistanceTable against Dijkstra on random grids whose obstacles keep changing,
+# and that the utility functions using it handle UNREACHABLE before doing any arithmetic with it.
+# Run it from the root of the repository with: python -m test.distance_table_test
+N_GRIDS = 200
+N_CHANGES = 10
+N_POINTS = 5
+MAX_CHANGED_CELLS = 6
+MAX_SIDE = 25
+
+
+def path_distance(start: Position, end: Position, occupancy: np.ndarray) -> int:
+    """ Number of steps of the shortest path found by Dijkstra, or UNREACHABLE."""
+    if start == end:
+        return 0 if not occupancy[end.x, end.y] else UNREACHABLE
+    path = dijkstra.find_path(start, end, occupancy)
+    return len(path) - 1 if path else UNREACHABLE
+
+
+random.seed(0)
+np.random.seed(0)
+dijkstra = Dijkstra()
+
+print("TEST 1")
+# Distances between package points, and from any cell to a package point, while the obstacles change
+for _ in range(N_GRIDS):
+    width, height = random.randint(2, MAX_SIDE), random.randint(2, MAX_SIDE)
+    occupancy = (np.random.random((width, height)) < random.random() * 0.35).astype(np.uint8)
+    points = [Position(random.randrange(width), random.randrange(height)) for _ in range(N_POINTS)]
+    for point in points:
+        occupancy[point.x, point.y] = 0
+    table = DistanceTable(FlowFieldCache(SimpleNamespace(occupancy=occupancy, width=width, height=height)))
+    for point in points:
+        table.add_point(point)
+    for _ in range(N_CHANGES):
+        for source in points:
+            for target in points:
+                assert table.distance(source, target) == path_distance(source, target, occupancy), f"wrong distance from {source} to {target}"
+        cell = Position(random.randrange(width), random.randrange(height))
+        if not occupancy[cell.x, cell.y]:
+            point = random.choice(points)
+            assert table.distance(cell, point) == table.distance(point, cell) == path_distance(cell, point, occupancy), f"wrong distance from {cell} to {point}"
+
+        # Obstacles appear and disappear anywhere but on the package points
+        changed_cells = []
+        for _ in range(random.randint(1, MAX_CHANGED_CELLS)):
+            cell = Position(random.randrange(width), random.randrange(height))
+            if cell not in points:
+                occupancy[cell.x, cell.y] ^= 1
+                changed_cells.append(cell)
+        table.flow_fields.update(changed_cells)
+        table.update(changed_cells)
+
+# A wall splits the grid: the package point at (4, 1) cannot be reached from the others
+occupancy = np.zeros((5, 3), dtype=np.uint8)
+occupancy[3, :] = 1
+start, reachable, unreachable = Position(0, 1), Position(2, 1), Position(4, 1)
+table = DistanceTable(FlowFieldCache(SimpleNamespace(occupancy=occupancy, width=5, height=3)))
+for point in [start, reachable, unreachable]:
+    table.add_point(point)
+reachable_package = Package('reachable', start, reachable, 100)
+unreachable_package = Package('unreachable', start, unreachable, 100)
+
+print("TEST 2")
+# A schedule that goes through an unreachable package point is worth nothing
+waiter = WaiterCNP('waiter', start, [], Perception(1), 'dijkstra', 'naive_fast', linear_decreasing_time_tips, start)
+waiter.distance_table = table
+assert waiter.estimate_delivery_tips([('pick', reachable_package), ('go-deliver', reachable), ('deliver', reachable, reachable_package)]) > 0
+for schedule in [[('pick', unreachable_package), ('go-deliver', unreachable), ('deliver', unreachable, unreachable_package)],
+                 [('go-deliver', unreachable), ('go-start', start)]]:
+    assert waiter.estimate_delivery_tips(schedule) == 0, schedule
+
+print("TEST 3")
+# Going to deliver a package to an unreachable package point is never preferred to any other action
+agent = SimpleNamespace(pos=start, packages=[unreachable_package, reachable_package])
+grid = SimpleNamespace(distance_table=table)
+actions_values = refined_greedy([('go-deliver', unreachable), ('go-deliver', reachable), ('go-random', None)], grid, agent)
+assert max(actions_values, key=lambda x: x[0])[2] == reachable, actions_values
+assert min(actions_values, key=lambda x: x[0])[2] == unreachable, actions_values
+assert all(abs(value) < UNREACHABLE for value, _, _ in actions_values if value != -float('inf')), actions_values
+
+print("The distances are always up to date")
@@ -0,0 +1,72 @@
+import random
+
+import numpy as np
+
+from src.agents.path_algorithms.dijkstra import Dijkstra
+from src.agents.path_algorithms.dstar_lite import INFINITY, DStarLite
+from src.utils.position import Position
+
+# Checks the incremental repair of DStarLite on random grids whose obstacles change while the agent moves.
+# After every repair, the next position must be on a shortest path to the destination (as found by Dijkstra on the current grid),
+# and the distance the repaired search knows must be the one of a planner that searches from scratch.
+# Run it from the root of the repository with: python -m test.dstar_lite_test
+N_GRIDS = 300
+N_STEPS = 30
+MAX_CHANGED_CELLS = 4
+MAX_SIDE = 20
+
+
+random.seed(0)
+np.random.seed(0)
+dijkstra = Dijkstra()
+
+print("TEST 1")
+# Repaired search versus search from scratch
+for _ in range(N_GRIDS):
+    width, height = random.randint(2, MAX_SIDE), random.randint(2, MAX_SIDE)
+    occupancy = (np.random.random((width, height)) < random.random() * 0.35).astype(np.uint8)
+    position = Position(random.randrange(width), random.randrange(height))
+    destination = Position(random.randrange(width), random.randrange(height))
+    occupancy[position.x, position.y] = occupancy[destination.x, destination.y] = 0
+    planner = DStarLite()
+    for _ in range(N_STEPS):
+        next_position = planner.get_next_position(position, destination, height, width, occupancy)
+        fresh_planner = DStarLite()
+        fresh_position = fresh_planner.get_next_position(position, destination, height, width, occupancy)
+        start = position.x * height + position.y
+        assert planner.g.get(start, INFINITY) == fresh_planner.g.get(start, INFINITY), f"outdated distance from {position} to {destination}"
+
+        path = dijkstra.find_path(position, destination, occupancy)
+        if len(path) > 1:
+            assert next_position.dist_to(position) == 1 and not occupancy[next_position.x, next_position.y], f"invalid step from {position} to {next_position}"
+            assert len(dijkstra.find_path(next_position, destination, occupancy)) == len(path) - 1, f"{next_position} is not on a shortest path from {position}"
+            assert planner.g[start] == len(path) - 1
+        else:
+            assert next_position == position == fresh_position, f"moved from {position} to {next_position} without a path"
+        position = next_position
+
+        # Obstacles appear and disappear anywhere but under the agent and in its destination
+        changed_cells = []
+        for _ in range(random.randint(0, MAX_CHANGED_CELLS)):
+            cell = Position(random.randrange(width), random.randrange(height))
+            if cell != position and cell != destination:
+                occupancy[cell.x, cell.y] ^= 1
+                changed_cells.append(cell)
+        planner.update(changed_cells, height)
+
+print("TEST 2")
+# The only way to the destination is blocked and opened again
+occupancy = np.zeros((5, 3), dtype=np.uint8)
+occupancy[2, :] = 1
+occupancy[2, 1] = 0
+planner = DStarLite()
+position, destination = Position(0, 1), Position(4, 1)
+assert planner.get_next_position(position, destination, 3, 5, occupancy) == Position(1, 1)
+occupancy[2, 1] = 1
+planner.update([Position(2, 1)], 3)
+assert planner.get_next_position(position, destination, 3, 5, occupancy) == position
+occupancy[2, 1] = 0
+planner.update([Position(2, 1)], 3)
+assert planner.get_next_position(position, destination, 3, 5, occupancy) == Position(1, 1)
+
+print("The repaired searches are always optimal")
@@ -0,0 +1,72 @@
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.agents.path_algorithms.flow_field import UNREACHABLE, FlowField, FlowFieldCache
+from src.utils.position import Position
+
+# Checks that FlowField.repair gives the same distances as computing the field from scratch, on random grids whose obstacles keep changing.
+# Run it from the root of the repository with: python -m test.flow_field_test
+N_GRIDS = 300
+N_CHANGES = 20
+MAX_CHANGED_CELLS = 6
+MAX_SIDE = 30
+
+
+def check_next_positions(field: FlowField, occupancy: np.ndarray) -> None:
+    """ Checks that every cell with a path steps to a free neighbour one step closer to the target, and the others stay in place."""
+    width, height = occupancy.shape
+    for x in range(width):
+        for y in range(height):
+            pos = Position(x, y)
+            distance = field.distance(pos)
+            next_position = field.next_position(pos)
+            if distance == 0 or distance == UNREACHABLE:
+                assert next_position == pos, f"moved from {pos} to {next_position} at distance {distance}"
+            else:
+                assert next_position.dist_to(pos) == 1 and not occupancy[next_position.x, next_position.y], f"invalid step from {pos} to {next_position}"
+                assert field.distance(next_position) == distance - 1, f"{next_position} is not closer to the target than {pos}"
+
+
+random.seed(0)
+np.random.seed(0)
+
+print("TEST 1")
+# Repaired field versus field computed from scratch, obstacles appearing and disappearing anywhere, the target included
+for _ in range(N_GRIDS):
+    width, height = random.randint(1, MAX_SIDE), random.randint(1, MAX_SIDE)
+    occupancy = (np.random.random((width, height)) < random.random() * 0.35).astype(np.uint8)
+    target = Position(random.randrange(width), random.randrange(height))
+    field = FlowField(target)
+    field.refresh(occupancy)
+    for _ in range(N_CHANGES):
+        for _ in range(random.randint(1, MAX_CHANGED_CELLS)):
+            cell = Position(random.randrange(width), random.randrange(height))
+            occupancy[cell.x, cell.y] ^= 1
+            field.changed_cells.add(cell.x * height + cell.y)
+        field.refresh(occupancy)
+        fresh_field = FlowField(target)
+        fresh_field.compute(occupancy)
+        assert np.array_equal(field.distances, fresh_field.distances), f"outdated distances towards {target}"
+        check_next_positions(field, occupancy)
+
+print("TEST 2")
+# The only way to the target is blocked and opened again, through the cache
+occupancy = np.zeros((5, 3), dtype=np.uint8)
+occupancy[2, :] = 1
+occupancy[2, 1] = 0
+cache = FlowFieldCache(SimpleNamespace(occupancy=occupancy, width=5, height=3))
+target = Position(4, 1)
+cache.add_target(target)
+assert cache.get(target).distance(Position(0, 1)) == 4
+occupancy[2, 1] = 1
+cache.update([Position(2, 1)])
+assert cache.get(target).distance(Position(0, 1)) == UNREACHABLE
+assert cache.get(target).next_position(Position(0, 1)) == Position(0, 1)
+occupancy[2, 1] = 0
+cache.update([Position(2, 1)])
+assert cache.get(target).distance(Position(0, 1)) == 4
+assert cache.get(Position(0, 0)) is None
+
+print("The repaired fields are always up to date")
@@ -0,0 +1,88 @@
+import random
+
+import numpy as np
+
+from src.agents.path_algorithms.dijkstra import Dijkstra
+from src.agents.path_algorithms.hpa import ClusterHierarchy
+from src.utils.position import Position
+
+# Checks that ClusterHierarchy.update discards everything the changed obstacles invalidate, on random grids whose obstacles keep changing.
+# A hierarchy that is kept up to date with update must answer exactly like one built from scratch on the same grid,
+# and following its segments must reach the destination whenever Dijkstra finds a path.
+# Run it from the root of the repository with: python -m test.hpa_test
+N_GRIDS = 200
+N_CHANGES = 8
+MAX_CHANGED_CELLS = 6
+MAX_SIDE = 40
+
+
+def follow(hierarchy: ClusterHierarchy, occupancy: np.ndarray, start: Position, end: Position) -> Position:
+    """ Walks the segments of the hierarchy from start, checking that they are made of free neighbouring cells.
+
+    Returns:
+        Position: Where the walk stopped: end, or the cell where no segment was found.
+    """
+    position, n_steps = start, 0
+    while position != end and n_steps <= occupancy.size:
+        segment = hierarchy.find_path(position, end)
+        if not segment:
+            break
+        assert segment[0] == position, f"segment starting at {segment[0]} instead of {position}"
+        for cell, next_cell in zip(segment, segment[1:]):
+            assert cell.dist_to(next_cell) == 1 and not occupancy[next_cell.x, next_cell.y], f"invalid step from {cell} to {next_cell}"
+        n_steps += len(segment) - 1
+        position = segment[-1]
+    return position
+
+
+random.seed(0)
+np.random.seed(0)
+dijkstra = Dijkstra()
+
+print("TEST 1")
+# Hierarchy kept up to date versus hierarchy built from scratch
+for _ in range(N_GRIDS):
+    width, height = random.randint(2, MAX_SIDE), random.randint(2, MAX_SIDE)
+    occupancy = (np.random.random((width, height)) < random.random() * 0.35).astype(np.uint8)
+    hierarchy = ClusterHierarchy(occupancy, cluster_size=random.choice([2, 3, 5, 10]))
+    for _ in range(N_CHANGES):
+        start = Position(random.randrange(width), random.randrange(height))
+        end = Position(random.randrange(width), random.randrange(height))
+        changed_cells = []
+        if occupancy[start.x, start.y]:
+            occupancy[start.x, start.y] = 0
+            changed_cells.append(start)
+        for _ in range(random.randint(0, MAX_CHANGED_CELLS)):
+            cell = Position(random.randrange(width), random.randrange(height))
+            if cell != start:
+                occupancy[cell.x, cell.y] ^= 1
+                changed_cells.append(cell)
+        hierarchy.update(changed_cells)
+
+        fresh_hierarchy = ClusterHierarchy(occupancy, cluster_size=hierarchy.cluster_size)
+        assert hierarchy.find_path(start, end) == fresh_hierarchy.find_path(start, end), f"outdated segment from {start} to {end}"
+        for key, transitions in hierarchy.borders.items():
+            assert transitions == fresh_hierarchy.get_border(*key, memoryview(occupancy).cast('B')), f"outdated border {key}"
+        for cluster, edges in hierarchy.intra_edges.items():
+            assert edges == fresh_hierarchy.get_intra_edges(cluster, memoryview(occupancy).cast('B')), f"outdated cluster {cluster}"
+
+        reachable = start == end or len(dijkstra.find_path(start, end, occupancy)) > 1
+        reached = follow(hierarchy, occupancy, start, end) == end
+        assert reached == reachable, f"end {end} {'not ' if reachable else ''}reached from {start}"
+
+print("TEST 2")
+# Blocking the only entrance between two clusters, and opening it again
+occupancy = np.zeros((10, 5), dtype=np.uint8)
+occupancy[5, :] = 1
+occupancy[5, 2] = 0
+hierarchy = ClusterHierarchy(occupancy, cluster_size=5)
+start, end = Position(0, 0), Position(9, 4)
+assert follow(hierarchy, occupancy, start, end) == end
+occupancy[5, 2] = 1
+hierarchy.update([Position(5, 2)])
+assert hierarchy.find_path(start, end) == []
+occupancy[5, 2] = 0
+hierarchy.update([Position(5, 2)])
+assert follow(hierarchy, occupancy, start, end) == end
+
+print("The hierarchy is always up to date")
@@ -0,0 +1,58 @@
+import os
+import tempfile
+
+from src.agents.perception import Perception
+from src.agents.strategies.waiter import Waiter
+from src.agents.tips_functions import linear_decreasing_time_tips
+from src.environment.environment import Environment
+from src.environment.package_point import PACKAGE_POINT_START, PackagePoint
+from src.utils.automatic_environment import ENV_PP_UNIFORM_SQUARES
+from src.utils.position import Position
+from src.utils.sweep import parameter_grid, run_sweep
+
+# Smoke check of the process-pool sweep runner: a small grid of waiter configurations runs end-to-end in worker processes.
+# Run it from the root of the repository with: python -m test.sweep_test
+PARAMETER_SPACE = {
+    'n_waiters': [1, 3],
+    'utility_function': ['naive_fast', 'naive_greedy'],
+    'max_iterations': [30],
+}
+GRID_SIDE = 12
+
+
+def run(configuration: dict) -> dict:
+    spp_pos = Position(GRID_SIDE // 2, GRID_SIDE // 2)
+    spp = PackagePoint('spp', spp_pos, PACKAGE_POINT_START, package_spawn_interval=5, n_packages_per_spawn=3, assign_intermediate=False)
+    agents = [Waiter(f'waiter_{i}', spp_pos, [], Perception(3), 'dijkstra', configuration['utility_function'], linear_decreasing_time_tips, spp_pos)
+              for i in range(configuration['n_waiters'])]
+    environment = Environment(GRID_SIDE, GRID_SIDE, agents, spp, 4, 6, [], pp_distribution_strategy=ENV_PP_UNIFORM_SQUARES)
+    for _ in range(configuration['max_iterations']):
+        environment.step()
+    return {'collected_tips': sum(agent.collected_tips for agent in agents)}
+
+
+if __name__ == '__main__':
+    base_log_dir = tempfile.mkdtemp()
+
+    print("TEST 1")
+    # Every configuration runs in its own process, with its own log directory and seed
+    results = run_sweep(run, PARAMETER_SPACE, base_log_dir, n_workers=2)
+    configurations = parameter_grid(PARAMETER_SPACE)
+    assert len(results) == len(configurations)
+    for configuration, result in zip(configurations, results):
+        assert 'exception' not in result, result['exception']
+        assert all(result[parameter] == value for parameter, value in configuration.items()), f"{result} out of order"
+        assert os.path.isdir(result['log_dir']) and 'collected_tips' in result
+    assert len({result['log_dir'] for result in results}) == len(results)
+    assert sum(result['collected_tips'] for result in results) > 0, "no package was delivered"
+
+    print("TEST 2")
+    # The same sweep gives the same results
+    assert [result['collected_tips'] for result in run_sweep(run, PARAMETER_SPACE, base_log_dir, n_workers=2)] == [result['collected_tips'] for result in results]
+
+    print("TEST 3")
+    # A failing configuration is reported in its result instead of stopping the sweep
+    failing = run_sweep(run, dict(PARAMETER_SPACE, utility_function=['unknown']), base_log_dir, n_workers=2)
+    assert all('exception' in result and os.path.isfile(f"{result['log_dir']}/exception.log") for result in failing)
+
+    print("The sweep runs end-to-end")